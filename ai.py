@@ -0,0 +1,323 @@
+"""Adversaire informatique : recherche arborescente Monte-Carlo (MCTS) à budget de temps fixe.
+
+La recherche tourne dans un processus séparé (AIController), si bien que la boucle d'affichage
+garde sa cadence pendant que l'IA réfléchit. Elle travaille sur un état réduit (SearchState) :
+les unités et la file d'initiative, le terrain étant partagé en lecture seule. Un clone ne copie
+que ces deux listes ; une unité n'est dupliquée qu'au moment où une action la modifie.
+
+Les objets, fumées et venins ne sont pas simulés par la recherche.
+
+    python ai.py --budget 0.5 --seed 1      # partie sans fenêtre : ennemis MCTS contre alliés gloutons
+"""
+import argparse
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from environment import Environment
+from pathfinding import compute_reachable
+from scheduler import REGEN_INTERVAL
+from simulation import Simulation, faction_of, ACTION_MOVE, ACTION_ATTACK, ACTION_SKILL, ACTION_WAIT
+from world import ChunkedWorld
+
+EXPLORATION = 1.4
+MOVE_CANDIDATES = 4   # Cases de déplacement examinées : les plus proches d'un ennemi
+ROLLOUT_ROUNDS = 2    # Longueur des simulations aléatoires, en tours de toutes les unités
+
+
+def copy_unit(unit):
+    clone = object.__new__(type(unit))
+    clone.__dict__ = unit.__dict__.copy()
+    return clone
+
+
+class SearchState:
+    """Unités, file d'initiative, unité courante et compteur de tours ; les règles suivent Simulation."""
+    __slots__ = ("units", "scheduler", "current", "turn")
+
+    def __init__(self, units, scheduler, current, turn):
+        self.units = units
+        self.scheduler = scheduler
+        self.current = current
+        self.turn = turn
+
+    def clone(self):
+        # Les unités sont partagées avec l'état parent, et copiées avant d'être modifiées
+        return SearchState(list(self.units), self.scheduler.copy(), self.current, self.turn)
+
+    def own(self, index):
+        unit = self.units[index] = copy_unit(self.units[index])
+        return unit
+
+    def winner(self):
+        """Faction victorieuse, ou None si les deux ont encore des unités en vie."""
+        alive = {faction_of(unit) for unit in self.units if unit.health > 0}
+        if len(alive) == 1:
+            return alive.pop()
+        return "draw" if not alive else None
+
+    def actions(self, environment):
+        """Actions possibles de l'unité courante, codées comme pour Simulation.apply."""
+        unit = self.units[self.current]
+        if unit.health <= 0:
+            return [(ACTION_WAIT, 0, 0)]
+        occupied = {(other.x, other.y): other for other in self.units if other is not unit}
+        reach = compute_reachable(environment, (unit.x, unit.y), unit.speed, occupied)
+        faction = faction_of(unit)
+        enemies = [other for other in self.units if other.health > 0 and faction_of(other) != faction]
+
+        actions = [(ACTION_ATTACK, x, y) for x, y in sorted(reach.targets)
+                   if occupied[(x, y)].health > 0 and faction_of(occupied[(x, y)]) != faction]
+        if enemies:
+            def distance(cell):
+                return min(max(abs(cell[0] - enemy.x), abs(cell[1] - enemy.y)) for enemy in enemies)
+            cells = sorted(reach.reachable - {(unit.x, unit.y)}, key=lambda cell: (distance(cell), cell))
+            actions += [(ACTION_MOVE, x, y) for x, y in cells[:MOVE_CANDIDATES]]
+        for skill_number in (1, 2, 3):
+            if copy_unit(unit).use_skill(skill_number):  # Essai sur une copie : le coût n'est connu que des compétences
+                actions.append((ACTION_SKILL, skill_number, 0))
+        actions.append((ACTION_WAIT, 0, 0))
+        return actions
+
+    def apply(self, action):
+        code, x, y = action
+        if code == ACTION_MOVE:
+            unit = self.own(self.current)
+            unit.x, unit.y = x, y
+        elif code == ACTION_ATTACK:
+            attacker = self.units[self.current]
+            index = next(i for i, unit in enumerate(self.units) if unit.x == x and unit.y == y)
+            attacker.attack(self.own(index))
+        elif code == ACTION_SKILL:
+            self.own(self.current).use_skill(x)
+        self.end_turn()
+
+    def end_turn(self):
+        self.turn += 1
+        index = self.scheduler.next(self.units)
+        if index is None:
+            return  # Plus aucune unité vivante : winner() le signale
+        self.current = index
+        if self.scheduler.synced[index] != self.turn // REGEN_INTERVAL:
+            self.own(index)  # La régénération va modifier l'unité
+        self.scheduler.sync(self.units, index, self.turn)
+
+    def evaluate(self, faction):
+        """Score dans [0, 1] pour faction : 1 pour une victoire, sinon selon l'écart de points de vie."""
+        winner = self.winner()
+        if winner is not None:
+            return 1.0 if winner == faction else 0.5 if winner == "draw" else 0.0
+        balance = sum(max(0, unit.health) * (1 if faction_of(unit) == faction else -1) for unit in self.units)
+        return 0.5 + 0.5 * math.tanh(balance / 200)
+
+
+class Node:
+    __slots__ = ("state", "parent", "action", "faction", "children", "untried", "visits", "value")
+
+    def __init__(self, state, parent, action, faction, environment):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.faction = faction  # Faction qui a joué l'action menant à ce nœud
+        self.children = []
+        self.untried = state.actions(environment) if state.winner() is None else []
+        self.visits = 0
+        self.value = 0.0
+
+    def best_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.value / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+def rollout(state, environment, rng):
+    """Joue des coups simples jusqu'à la fin ou ROLLOUT_ROUNDS tours ; retourne le nombre de coups joués."""
+    plies = 0
+    for _ in range(ROLLOUT_ROUNDS * len(state.units)):
+        if state.winner() is not None:
+            break
+        actions = state.actions(environment)
+        attacks = [action for action in actions if action[0] == ACTION_ATTACK]
+        moves = [action for action in actions if action[0] == ACTION_MOVE]
+        if attacks and rng.random() < 0.9:
+            action = rng.choice(attacks)
+        elif moves and rng.random() < 0.8:
+            action = moves[0]  # La case la plus proche d'un ennemi
+        else:
+            action = rng.choice(actions)
+        state.apply(action)
+        plies += 1
+    return plies
+
+
+def search(environment, units, scheduler, current, turn, budget, seed=0):
+    """Cherche le meilleur coup de l'unité courante pendant budget secondes.
+
+    Retourne l'action (code, x, y) et des statistiques : itérations, profondeur maximale
+    de l'arbre, coups simulés et clones par seconde.
+    """
+    start = time.perf_counter()
+    deadline = start + budget
+    rng = random.Random(seed)
+    root_state = SearchState(list(units), scheduler.copy(), current, turn)
+    root = Node(root_state, None, None, None, environment)
+    if len(root.untried) == 1:
+        return root.untried[0], {"iterations": 0, "depth": 0, "plies": 0, "elapsed": 0.0, "plies_per_second": 0.0, "clones_per_second": 0.0}
+
+    iterations = plies = clones = max_depth = 0
+    while time.perf_counter() < deadline:
+        node = root
+        depth = 0
+        # Sélection
+        while not node.untried and node.children:
+            node = node.best_child()
+            depth += 1
+        # Expansion
+        if node.untried:
+            action = node.untried.pop(rng.randrange(len(node.untried)))
+            state = node.state.clone()
+            clones += 1
+            faction = faction_of(state.units[state.current])
+            state.apply(action)
+            child = Node(state, node, action, faction, environment)
+            node.children.append(child)
+            node = child
+            depth += 1
+            plies += 1
+        max_depth = max(max_depth, depth)
+        # Simulation
+        state = node.state.clone()
+        clones += 1
+        plies += rollout(state, environment, rng)
+        # Rétropropagation
+        scores = {}
+        while node is not root:
+            if node.faction not in scores:
+                scores[node.faction] = state.evaluate(node.faction)
+            node.visits += 1
+            node.value += scores[node.faction]
+            node = node.parent
+        root.visits += 1
+        iterations += 1
+
+    elapsed = time.perf_counter() - start
+    best = max(root.children, key=lambda child: child.visits)
+    return best.action, {
+        "iterations": iterations,
+        "depth": max_depth,
+        "plies": plies,
+        "elapsed": elapsed,
+        "plies_per_second": plies / elapsed,
+        "clones_per_second": clones / elapsed,
+    }
+
+
+# Côté processus de recherche : le terrain est transmis une seule fois, à la création du processus.
+# Un monde par blocs n'est pas copié : le processus le régénère à partir de sa graine (world_seed).
+_environment = None
+
+
+def _init_worker(width, height, terrain, zones, world_seed=None):
+    global _environment
+    if world_seed is not None:
+        _environment = ChunkedWorld(width, height, seed=world_seed, cache_dir=None, background=False)
+        return
+    _environment = Environment(width, height, seed=None)
+    _environment.set_terrain(terrain, zones)
+
+
+def _think(units, scheduler, current, turn, budget, seed):
+    return search(_environment, units, scheduler, current, turn, budget, seed)
+
+
+class AIController:
+    """Joue les unités des factions données ; la recherche tourne dans un processus séparé."""
+    def __init__(self, environment, factions=("enemies",), budget=1.0):
+        self.factions = set(factions)
+        self.budget = budget
+        # "spawn" : le processus ne reçoit pas de copie de l'état de SDL
+        if isinstance(environment, ChunkedWorld):
+            initargs = (environment.width, environment.height, None, environment.zones, environment.seed)
+        else:
+            initargs = (environment.width, environment.height, environment.terrain, environment.zones)
+        self.executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=initargs
+        )
+        self.pending = None  # (version de la simulation, Future) de la recherche en cours
+        self.last_stats = None
+
+    def controls(self, unit):
+        return faction_of(unit) in self.factions
+
+    @property
+    def thinking(self):
+        return self.pending is not None
+
+    def update(self, simulation):
+        """Lance la recherche pour l'unité courante si elle est contrôlée, ou applique son résultat.
+
+        Ne bloque jamais : à appeler à chaque image. Retourne l'action jouée, ou None.
+        """
+        if simulation.game_over or not self.controls(simulation.current_unit):
+            return None
+        unit = simulation.current_unit
+        if unit.health <= 0:
+            simulation.wait()
+            return (ACTION_WAIT, 0, 0)
+
+        if self.pending is None:
+            future = self.executor.submit(_think, simulation.units, simulation.scheduler, simulation.current_unit_index,
+                                          simulation.turn_counter, self.budget, simulation.turn_counter)
+            self.pending = (simulation.version, future)
+            return None
+
+        version, future = self.pending
+        if not future.done():
+            return None
+        self.pending = None
+        action, self.last_stats = future.result()
+        if version != simulation.version:
+            return None  # La partie a changé pendant la recherche : on recommencera
+        print(f"AI {unit.unit_type}: {action} after {self.last_stats['iterations']} iterations, "
+              f"depth {self.last_stats['depth']}, {self.last_stats['plies_per_second']:.0f} plies/s")
+        simulation.apply(*action)
+        return action
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless match: MCTS enemies against greedy allies")
+    parser.add_argument("--budget", type=float, default=0.5, help="search time per enemy turn, in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-turns", type=int, default=60)
+    args = parser.parse_args()
+
+    from policies import greedy_action
+    simulation = Simulation(seed=args.seed)
+    stats = []
+    while not simulation.game_over and simulation.turn_counter < args.max_turns:
+        unit = simulation.current_unit
+        if faction_of(unit) == "enemies" and unit.health > 0:
+            action, result = search(simulation.environment, simulation.units, simulation.scheduler,
+                                    simulation.current_unit_index, simulation.turn_counter, args.budget, simulation.turn_counter)
+            simulation.apply(*action)
+            stats.append(result)
+        else:
+            greedy_action(simulation)
+        simulation.pop_messages()
+        if stats and faction_of(unit) == "enemies" and unit.health > 0:
+            result = stats[-1]
+            print(f"turn {simulation.turn_counter:3}  {unit.unit_type:7} {result['iterations']:6} iterations  depth {result['depth']:2}  "
+                  f"{result['plies_per_second']:8.0f} plies/s  {result['clones_per_second']:8.0f} clones/s")
+
+    alive = {faction_of(unit) for unit in simulation.units if unit.health > 0}
+    print(f"finished after {simulation.turn_counter} turns, factions alive: {sorted(alive)}")
+    if stats:
+        print(f"mean {sum(s['plies_per_second'] for s in stats) / len(stats):.0f} plies/s, "
+              f"mean depth {sum(s['depth'] for s in stats) / len(stats):.1f} at {args.budget}s per turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Chargement centralisé des images.
+
+Chaque fichier est décodé au plus une fois, à la première utilisation, et les fichiers au contenu
+identique (Orc.png et Urukh.png par exemple) partagent la même surface. Avec un dossier de cache,
+les variantes redimensionnées sont enregistrées sur disque : aux lancements suivants, l'image
+d'origine (jusqu'à 1024x1024) n'est plus décodée du tout.
+
+    python assets.py      # compare le temps de démarrage et la mémoire, avant et après
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import pygame
+
+DEFAULT_CACHE_DIR = ".asset_cache"
+
+
+class AssetManager:
+    """Images décodées une seule fois, partagées par contenu, converties au format de l'écran."""
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.digests = {}  # chemin -> empreinte du contenu
+        self.images = {}   # empreinte -> Surface d'origine, ou None si le fichier est illisible
+        self.loads = 0     # Nombre de fichiers réellement décodés
+
+    def digest(self, path):
+        """Empreinte du contenu du fichier, lue une seule fois par chemin."""
+        digest = self.digests.get(path)
+        if digest is None:
+            try:
+                with open(path, "rb") as file:
+                    digest = hashlib.sha1(file.read()).hexdigest()
+            except OSError:
+                digest = "missing:" + path
+            self.digests[path] = digest
+        return digest
+
+    def image(self, path):
+        """Surface d'origine du fichier, ou None s'il ne peut pas être chargé."""
+        digest = self.digest(path)
+        if digest not in self.images:
+            try:
+                self.images[digest] = self._prepare(pygame.image.load(path))
+                self.loads += 1
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Error loading image {path}: {e}")
+                self.images[digest] = None
+        return self.images[digest]
+
+    def scaled(self, path, size):
+        """Copie redimensionnée (lissée) de l'image ; None si le fichier ne peut pas être chargé.
+
+        Le résultat n'est pas gardé en mémoire ici : c'est à l'appelant de le conserver.
+        """
+        digest = self.digest(path)
+        cache_path = None
+        if self.cache_dir and not digest.startswith("missing:"):
+            cache_path = os.path.join(self.cache_dir, f"{digest}-{size[0]}x{size[1]}.png")
+            if os.path.exists(cache_path):
+                try:
+                    return self._prepare(pygame.image.load(cache_path))
+                except pygame.error:
+                    pass  # Fichier de cache abîmé : on le régénère
+
+        image = self.image(path)
+        if image is None:
+            return None
+        surface = self._prepare(pygame.transform.smoothscale(image, size))
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pygame.image.save(surface, cache_path)
+        return surface
+
+    def _prepare(self, surface):
+        # Conversion au format de l'écran pour des blits rapides (impossible sans fenêtre)
+        if pygame.display.get_surface() is None:
+            return surface
+        if surface.get_flags() & pygame.SRCALPHA:
+            return surface.convert_alpha()
+        return surface.convert()
+
+    def clear(self):
+        """Oublie les images chargées (le cache disque est conservé)."""
+        self.images.clear()
+
+    def stats(self):
+        return {"files": len(self.digests), "decoded": self.loads, "shared": len(self.digests) - len(self.images)}
+
+
+assets = AssetManager()
+
+
+def _max_rss_megabytes():
+    """Mémoire résidente maximale du processus, en Mo, ou None si elle ne peut pas être mesurée."""
+    try:
+        import resource  # Unix seulement
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset // (1024 * 1024)  # Windows : pic de l'ensemble de travail
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def _measure_startup(mode):
+    """Crée une partie et dessine la première image ; retourne le temps écoulé et la mémoire résidente maximale."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import game
+    from assets import assets as manager  # Instance partagée avec le jeu (ce fichier tourne en __main__)
+    start = time.perf_counter()
+    loaded = []
+    if mode == "eager":
+        # Comportement d'origine : toutes les images décodées au démarrage, certaines plusieurs fois
+        pygame.init()
+        pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+        paths = ["2.png", "1.png", "3.png", "ob1.png", "1.png", "7.png", "6.png", "4.png", "5.png",
+                 "Elf.png", "Human.png", "Orc.png", "Dwarf.png", "Goblin.png", "Orc.png",
+                 "Elf.png", "Human.png", "Dwarf.png", "Orc.png", "Goblin.png", "Urukh.png", "smoke.png", "venom.png"]
+        for path in paths + ["weapon.png", "health_potion.png"] * 10:
+            surface = pygame.image.load(path).convert_alpha()
+            loaded.append(surface)
+            manager.images.setdefault(manager.digest(path), surface)  # La partie réutilise ces surfaces
+    game.Game(seed=1, asset_cache=DEFAULT_CACHE_DIR if mode == "cached" else None).draw()
+    return time.perf_counter() - start, _max_rss_megabytes()
+
+
+def report():
+    """Lance chaque mode dans un processus neuf pour mesurer la mémoire indépendamment."""
+    for mode in ("eager", "lazy", "cached", "cached"):
+        output = subprocess.run([sys.executable, __file__, "--mode", mode], capture_output=True, text=True, check=True).stdout
+        milliseconds, megabytes = output.split()[-2:]
+        print(f"{mode:8} {milliseconds:>6} ms  {megabytes:>5} MB max RSS" if megabytes != "None" else f"{mode:8} {milliseconds:>6} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare startup time and memory of asset loading strategies")
+    parser.add_argument("--mode", choices=("eager", "lazy", "cached"))
+    args = parser.parse_args()
+    if args.mode:
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                elapsed, megabytes = _measure_startup(args.mode)
+            finally:
+                sys.stdout = stdout
+        print(f"{elapsed * 1000:.0f} {megabytes}")
+    else:
+        report()
@@ -0,0 +1,133 @@
+"""Run many seeded headless matches across all CPU cores and aggregate the results.
+
+Example:
+    python batch.py --allies Elf,Human,Dwarf --enemies Orc,Goblin,Troll --size 96 --seeds 0:1000 --output results.jsonl
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from simulation import Simulation, ALLY_TYPES
+from policies import greedy_action
+from unit import Elf, Human, Orc, Dwarf, Goblin, Troll
+
+UNIT_CLASSES = {cls.__name__: cls for cls in (Elf, Human, Dwarf, Orc, Goblin, Troll)}
+CSV_FIELDS = ["seed", "winner", "turns", "allies_damage", "enemies_damage", "allies_alive", "enemies_alive"]
+
+
+def run_match(job):
+    """Play one match to the end (or max_turns) with the greedy policy and summarise it."""
+    seed, allies, enemies, size, max_turns = job
+    simulation = Simulation(size, size, seed=seed, armies=([UNIT_CLASSES[name] for name in allies], [UNIT_CLASSES[name] for name in enemies]))
+    while not simulation.game_over and simulation.turn_counter < max_turns:
+        greedy_action(simulation)
+        simulation.pop_messages()
+
+    winner = "draw"
+    if simulation.game_over:
+        winner = "allies" if any(unit.health > 0 for unit in simulation.units if isinstance(unit, ALLY_TYPES)) else "enemies"
+    units = [
+        {
+            "type": type(unit).__name__,
+            "faction": "allies" if isinstance(unit, ALLY_TYPES) else "enemies",
+            "damage": simulation.damage_dealt[unit],
+            "alive": unit.health > 0,
+        }
+        for unit in simulation.units
+    ]
+    return {"seed": seed, "winner": winner, "turns": simulation.turn_counter, "units": units}
+
+
+def csv_row(result):
+    row = {"seed": result["seed"], "winner": result["winner"], "turns": result["turns"]}
+    for faction in ("allies", "enemies"):
+        row[f"{faction}_damage"] = sum(unit["damage"] for unit in result["units"] if unit["faction"] == faction)
+        row[f"{faction}_alive"] = sum(unit["alive"] for unit in result["units"] if unit["faction"] == faction)
+    return row
+
+
+def summarize(results):
+    """Win rates per faction and per unit class, average match length and damage."""
+    matches = len(results)
+    total = max(matches, 1)  # An empty seed range gives zero rates instead of dividing by zero
+    wins = {"allies": 0, "enemies": 0, "draw": 0}
+    classes = {}
+    for result in results:
+        wins[result["winner"]] += 1
+        for unit in result["units"]:
+            stats = classes.setdefault(unit["type"], {"appearances": 0, "wins": 0, "damage": 0})
+            stats["appearances"] += 1
+            stats["wins"] += unit["faction"] == result["winner"]
+            stats["damage"] += unit["damage"]
+    return {
+        "matches": matches,
+        "win_rate": {faction: count / total for faction, count in wins.items()},
+        "average_turns": sum(result["turns"] for result in results) / total,
+        "unit_classes": {
+            name: {"win_rate": stats["wins"] / stats["appearances"], "average_damage": stats["damage"] / stats["appearances"]}
+            for name, stats in sorted(classes.items())
+        },
+    }
+
+
+def parse_seeds(text):
+    """'0:1000' -> range(0, 1000); '7' -> range(7, 8)."""
+    if ":" in text:
+        start, end = text.split(":")
+        return range(int(start), int(end))
+    return range(int(text), int(text) + 1)
+
+
+def parse_army(text):
+    names = [name.strip() for name in text.split(",") if name.strip()]
+    for name in names:
+        if name not in UNIT_CLASSES:
+            raise argparse.ArgumentTypeError(f"unknown unit class {name!r} (choose from {', '.join(UNIT_CLASSES)})")
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--allies", type=parse_army, default=["Elf", "Human"])
+    parser.add_argument("--enemies", type=parse_army, default=["Orc"])
+    parser.add_argument("--size", type=int, default=96, help="map width and height in tiles")
+    parser.add_argument("--seeds", type=parse_seeds, default=range(0, 100), help="seed range, e.g. 0:1000")
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="stream per-match results to a .csv or .jsonl file")
+    args = parser.parse_args(argv)
+
+    jobs = [(seed, args.allies, args.enemies, args.size, args.max_turns) for seed in args.seeds]
+    results = []
+    output = open(args.output, "w", newline="") if args.output else None
+    writer = csv.DictWriter(output, CSV_FIELDS) if output and args.output.endswith(".csv") else None
+    if writer:
+        writer.writeheader()
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        for result in pool.imap_unordered(run_match, jobs, chunksize=max(1, len(jobs) // (args.workers * 8))):
+            results.append(result)
+            if writer:
+                writer.writerow(csv_row(result))
+            elif output:
+                output.write(json.dumps(result) + "\n")
+            if output:
+                output.flush()  # An interrupted batch keeps every finished match
+    elapsed = time.perf_counter() - start
+    if output:
+        output.close()
+
+    summary = summarize(results)
+    summary["matches_per_second"] = len(results) / elapsed
+    summary["workers"] = args.workers
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Reproducible performance benchmarks, run without a window (SDL dummy video driver).
+
+Every scenario is seeded. It is timed `repeat` times after `warmup` untimed runs, and the median
+is kept. The results can be saved as a baseline and later runs compared against it: the command
+exits with status 1 when a scenario is slower than its baseline by more than the threshold.
+
+Examples:
+    python benchmarks.py --save-baseline                  # measure and store bench_baseline.json
+    python benchmarks.py                                  # compare with the stored baseline
+    python benchmarks.py --filter generate --repeat 10 --threshold 0.1
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from environment import Environment
+from simulation import Simulation
+from terrain_render import TerrainLayer
+from interface import Interface
+from batch import run_match
+from world import ChunkedWorld
+
+BASELINE_PATH = "bench_baseline.json"
+SCREEN_SIZE = (1860, 960)
+SCENARIOS = {}  # name -> setup function returning the function to time
+
+
+def scenario(name):
+    """Register a setup function: it builds the (untimed) state and returns the function to time."""
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+
+for size in (96, 512, 2048):
+    @scenario(f"generate_environment[{size}]")
+    def _generate(size=size):
+        def run():
+            Environment(size, size, seed=1).generate_environment()
+        return run
+
+
+for cell_size in (30, 60, 90):
+    @scenario(f"terrain_draw[cell={cell_size}]")
+    def _terrain_draw(cell_size=cell_size):
+        # The camera sweeps the map, so chunks leave and re-enter the cache as they do in play
+        screen = pygame.display.get_surface()
+        environment = Environment(96, 96, seed=1)
+        environment.generate_environment()
+        layer = TerrainLayer(environment)
+        view_width, view_height = SCREEN_SIZE[0] // cell_size, SCREEN_SIZE[1] // cell_size
+        cameras = [(x, y) for y in range(0, 96 - view_height, 7) for x in range(0, 96 - view_width, 5)]
+
+        def run():
+            for camera_x, camera_y in cameras:
+                layer.draw(screen, cell_size, camera_x, camera_y, view_width, view_height)
+        return run
+
+
+@scenario("interface_draw")
+def _interface_draw():
+    screen = pygame.display.get_surface()
+    simulation = Simulation(seed=1)
+    interface = Interface(width=300)
+    for value in range(20):
+        interface.add_message("attack", unit_type="Orc", value=value)
+
+    def run():
+        for _ in range(100):
+            interface.draw(screen, simulation.units)
+    return run
+
+
+for speed in (2, 3, 4, 8, 16):
+    @scenario(f"calculate_accessible_tiles[speed={speed}]")
+    def _accessible_tiles(speed=speed):
+        simulation = Simulation(seed=1)
+        simulation.current_unit.speed = speed
+
+        def run():
+            for _ in range(100):
+                simulation.calculate_accessible_tiles()
+        return run
+
+
+@scenario("check_for_item[5000 items]")
+def _check_for_item():
+    simulation = Simulation(seed=1, num_weapons=2500, num_potions=2500)
+    rng = random.Random(1)
+    cells = [(rng.randrange(96), rng.randrange(96)) for _ in range(2000)]
+    state = simulation.get_state()
+
+    def run():
+        simulation.set_state(state)  # Put picked-up items back before each run
+        unit = simulation.current_unit
+        for unit.x, unit.y in cells:
+            simulation.check_for_item(unit)
+        simulation.pop_messages()
+    return run
+
+
+@scenario("headless_match[96]")
+def _headless_match():
+    def run():
+        run_match((1, ["Elf", "Human", "Dwarf"], ["Orc", "Goblin", "Troll"], 96, 500))
+    return run
+
+
+@scenario("chunked_world_march[4096]")
+def _chunked_world_march():
+    # Units walk away from the centre of a chunked world while the camera follows them: the chunks
+    # ahead are generated in the background, requested by the renderer and by Simulation.move, and
+    # the fog of war is kept in chunk-sized rasters around the units
+    screen = pygame.display.get_surface()
+    cell_size = 30
+    view_width, view_height = SCREEN_SIZE[0] // cell_size, SCREEN_SIZE[1] // cell_size
+
+    def run():
+        world = ChunkedWorld(4096, 4096, seed=1, max_chunks=64, cache_dir=None)
+        simulation = Simulation(4096, 4096, seed=1, num_weapons=0, num_potions=0, environment=world)
+        layer = TerrainLayer(world)
+        for _ in range(600):
+            unit = simulation.current_unit
+            target = max(simulation.accessible_tiles, key=lambda cell: (cell[0] + cell[1], cell))
+            if not simulation.move(*target):
+                simulation.wait()
+            simulation.update_fog()
+            layer.draw(screen, cell_size, unit.x - view_width // 2, unit.y - view_height // 2, view_width, view_height)
+        world.close()
+    return run
+
+
+def measure(setup, warmup, repeat):
+    """Durations (in seconds) of `repeat` runs, after `warmup` untimed runs."""
+    run = setup()
+    for _ in range(warmup):
+        run()
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run scenarios whose name matches this regular expression")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare with or to write")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown over the baseline (0.15 = 15%%)")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    regressions = []
+    for name, setup in SCENARIOS.items():
+        if not re.search(args.filter, name):
+            continue
+        timings = measure(setup, args.warmup, args.repeat)
+        median = statistics.median(timings)
+        results[name] = {"median_ms": median * 1000, "min_ms": min(timings) * 1000, "max_ms": max(timings) * 1000}
+
+        line = f"{name:40} {median * 1000:10.3f} ms  (min {min(timings) * 1000:.3f}, max {max(timings) * 1000:.3f})"
+        if name in baseline:
+            change = median * 1000 / baseline[name]["median_ms"] - 1
+            line += f"  {change:+7.1%} vs baseline"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line, flush=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+
+    if regressions:
+        print(f"{len(regressions)} scenario(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
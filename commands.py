@@ -0,0 +1,97 @@
+"""Commandes de jeu discrètes, produites par le clavier, un script ou un robot.
+
+Chaque commande s'exécute sur une Simulation et la case sélectionnée :
+
+    selection = command.execute(simulation, selection)
+
+La sélection retournée est la nouvelle case sélectionnée (seul Select la déplace). Move et Attack
+visent la case sélectionnée, ou la case donnée explicitement (entrée scriptée, sans curseur).
+Les commandes sont immuables : une même instance peut être mise plusieurs fois en file.
+"""
+
+
+class Select:
+    """Déplace la sélection d'une case, si la nouvelle case est accessible ou attaquable."""
+    __slots__ = ("dx", "dy")
+
+    def __init__(self, dx, dy):
+        self.dx = dx
+        self.dy = dy
+
+    def execute(self, simulation, selection):
+        cell = (selection[0] + self.dx, selection[1] + self.dy)
+        if cell in simulation.accessible_tiles or cell in simulation.attack_tiles:
+            return cell
+        return selection
+
+    def __repr__(self):
+        return f"Select({self.dx}, {self.dy})"
+
+
+class Move:
+    """Déplace l'unité courante sur la case visée (par défaut la case sélectionnée)."""
+    __slots__ = ("cell",)
+
+    def __init__(self, cell=None):
+        self.cell = cell
+
+    def execute(self, simulation, selection):
+        simulation.move(*(self.cell or selection))
+        return selection
+
+    def __repr__(self):
+        return f"Move({self.cell})"
+
+
+class Attack:
+    """Attaque l'unité sur la case visée (par défaut la case sélectionnée)."""
+    __slots__ = ("cell",)
+
+    def __init__(self, cell=None):
+        self.cell = cell
+
+    def execute(self, simulation, selection):
+        simulation.attack(*(self.cell or selection))
+        return selection
+
+    def __repr__(self):
+        return f"Attack({self.cell})"
+
+
+class Skill:
+    """Utilise la compétence numéro number (1 à 3) de l'unité courante."""
+    __slots__ = ("number",)
+
+    def __init__(self, number):
+        self.number = number
+
+    def execute(self, simulation, selection):
+        simulation.use_skill(self.number)
+        return selection
+
+    def __repr__(self):
+        return f"Skill({self.number})"
+
+
+class Special:
+    """Compétence spéciale à usage unique (venin de l'Elf, fumée de l'Human)."""
+    __slots__ = ()
+
+    def execute(self, simulation, selection):
+        simulation.use_special()
+        return selection
+
+    def __repr__(self):
+        return "Special()"
+
+
+class Wait:
+    """Passe le tour de l'unité courante."""
+    __slots__ = ()
+
+    def execute(self, simulation, selection):
+        simulation.wait()
+        return selection
+
+    def __repr__(self):
+        return "Wait()"
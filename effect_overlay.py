@@ -0,0 +1,36 @@
+import numpy as np
+import pygame
+from assets import assets
+
+
+class EffectOverlay:
+    """Surface de la vue couvrant toutes les cases d'un EffectLayer, reconstruite seulement si besoin."""
+    def __init__(self, layer, image_path):
+        self.layer = layer
+        self.image_path = image_path
+        self.scaled = {}  # cell_size -> image redimensionnée
+        self.surface = None
+        self.key = None
+
+    def _tile(self, cell_size):
+        tile = self.scaled.get(cell_size)
+        if tile is None:
+            tile = assets.scaled(self.image_path, (cell_size, cell_size))
+            self.scaled[cell_size] = tile
+        return tile
+
+    def draw(self, screen, camera_x, camera_y, cell_size, view_width, view_height):
+        if not len(self.layer):
+            return
+
+        key = (self.layer.version, camera_x, camera_y, cell_size, view_width, view_height)
+        if key != self.key:
+            self.key = key
+            self.surface = pygame.Surface((view_width * cell_size, view_height * cell_size), pygame.SRCALPHA)
+            tile = self._tile(cell_size)
+            covered = self.layer.counts[camera_y:camera_y + view_height, camera_x:camera_x + view_width]
+            ys, xs = np.nonzero(covered)
+            # Les cases ne se chevauchent pas : copie directe des pixels RGBA, sans fondu sur le fond transparent
+            self.surface.blits([(tile, (int(x) * cell_size, int(y) * cell_size), None, pygame.BLEND_RGBA_MAX) for x, y in zip(xs, ys)], False)
+
+        screen.blit(self.surface, (0, 0))
@@ -0,0 +1,61 @@
+import math
+import numpy as np
+
+
+class EffectLayer:
+    """Raster de comptage des zones d'effet d'un même type (fumées ou venins).
+
+    counts[y, x] indique combien d'effets couvrent la case. Ajouter ou retirer un effet
+    coûte O(surface de l'effet) ; tester une case coûte O(1). version augmente à chaque
+    changement pour que les surfaces dérivées sachent quand se reconstruire.
+
+    counts est par défaut un tableau de toute la carte ; sur un monde par blocs, on passe le
+    raster de l'environnement (world.ChunkedRaster), qui n'alloue que les blocs couverts.
+    """
+    def __init__(self, width, height, counts=None):
+        self.width = width
+        self.height = height
+        self.counts = counts if counts is not None else np.zeros((height, width), dtype=np.uint16)
+        self.effects = {}  # dict utilisé comme ensemble ordonné
+        self.version = 0
+        self.expiring = 0  # Effets à durée finie : tant qu'il y en a, l'affichage doit continuer à avancer
+
+    def __len__(self):
+        return len(self.effects)
+
+    def __iter__(self):
+        return iter(self.effects)
+
+    def _area(self, effect):
+        """Tranches de la grille couvertes par un effet carré centré sur (x, y), rognées aux bords."""
+        start_x = effect.x - effect.size // 2
+        start_y = effect.y - effect.size // 2
+        return (
+            slice(max(0, start_y), max(0, min(start_y + effect.size, self.height))),
+            slice(max(0, start_x), max(0, min(start_x + effect.size, self.width))),
+        )
+
+    @staticmethod
+    def _expires(effect):
+        return math.isfinite(getattr(effect, "duration", math.inf))
+
+    def add(self, effect):
+        self.effects[effect] = None
+        self.counts[self._area(effect)] += 1
+        self.expiring += self._expires(effect)
+        self.version += 1
+
+    def remove(self, effect):
+        del self.effects[effect]
+        self.counts[self._area(effect)] -= 1
+        self.expiring -= self._expires(effect)
+        self.version += 1
+
+    def count(self, x, y):
+        """Nombre d'effets couvrant la case (x, y)."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.counts[y, x])
+        return 0
+
+    def contains(self, x, y):
+        return self.count(x, y) > 0
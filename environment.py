@@ -1,165 +1,264 @@
-import random
-import pygame
-
-# Préchargement des textures
-def load_textures():
-    return {
-        "swamp": pygame.image.load("2.png"),
-        "forest": pygame.image.load("1.png"),
-        "mountain": pygame.image.load("3.png"),
-        "obstacle": pygame.image.load("ob1.png"),  # Texture spécifique pour obstacle
-        "plain": pygame.image.load("1.png"),
-        "river": pygame.image.load("7.png"),
-        "dead_forest": pygame.image.load("6.png"),
-        "volcanic": pygame.image.load("4.png"),
-        "ruins": pygame.image.load("5.png"),
-    }
-
-textures = load_textures()
-
-# Classe Tile
-class Tile:
-    def __init__(self, x, y, texture_key, visibility=1, speed=1, obstacle=False, special=""):
-        self.x = x
-        self.y = y
-        self.texture = textures[texture_key]
-        self.visibility = visibility
-        self.speed = speed
-        self.obstacle = obstacle
-        self.special = special
-
-    def draw(self, screen, cell_size, offset_x, offset_y):
-        """Dessine la tuile avec sa texture."""
-        rect = pygame.Rect(
-            (self.x - offset_x) * cell_size,
-            (self.y - offset_y) * cell_size,
-            cell_size,
-            cell_size
-        )
-        screen.blit(pygame.transform.scale(self.texture, (cell_size, cell_size)), rect)
-
-class Swamp(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "swamp", visibility=2, speed=2, obstacle=False, special="swamp")
-
-class Forest(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "forest", visibility=3, speed=5, obstacle=False, special="dark forest")
-
-class Mountain(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "mountain", visibility=1, speed=1, obstacle=False, special="mountain")
-
-class Obstacle(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "obstacle", visibility=0, speed=0, obstacle=True, special="unpassable rock")
-
-class Plain(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "plain", visibility=4, speed=4, obstacle=False, special="plain")
-
-class River(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "river", visibility=1, speed=1, obstacle=True, special="river")
-
-class DeadForest(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "dead_forest", visibility=2, speed=2, obstacle=False, special="dead forest")
-
-class Volcanic(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "volcanic", visibility=1, speed=1, obstacle=False, special="volcanic")
-
-class Ruins(Tile):
-    def __init__(self, x, y):
-        super().__init__(x, y, "ruins", visibility=2, speed=1, obstacle=False, special="ruins")
-
-class Environment:
-    def __init__(self, width=96, height=96):
-        self.width = width
-        self.height = height
-        self.grid = [[None for _ in range(self.width)] for _ in range(self.height)]
-        self.zones = {}
-
-    def is_within_bounds(self, x, y):
-        """Check if the given (x, y) coordinates are within the grid boundaries."""
-        return 0 <= x < self.width and 0 <= y < self.height
-
-    def is_obstacle(self, x, y):
-        """Check if a given tile is an obstacle."""
-        if self.is_within_bounds(x, y):
-            tile = self.grid[y][x]
-            return tile.obstacle if tile else False
-        return True
-
-    def get_zone(self, x, y):
-        """Retourne la zone correspondant à une position."""
-        if not self.is_within_bounds(x, y):
-            return None
-
-        for zone_name, (x_start, y_start, x_end, y_end) in self.zones.items():
-            if x_start <= x < x_end and y_start <= y < y_end:
-                return zone_name
-        return None
-
-    def generate_environment(self):
-        self.zones = {
-            "elf": (0, 0, self.width // 2, self.height // 2),
-            "dwarf": (0, self.height // 2, self.width // 2, self.height),
-            "human": (self.width // 4, self.height // 4, 3 * self.width // 4, 3 * self.height // 4),
-            "orc": (self.width // 2, 0, self.width, self.height // 2),
-            "troll": (self.width // 2, self.height // 2, self.width, self.height)
-        }
-
-        self._fill_zone(self.zones["elf"], forest_pct=0.7, plain_pct=0.1, swamp_pct=0.1, river_pct=0.1)
-        self._fill_zone(self.zones["dwarf"], forest_pct=0.1, plain_pct=0.2, mountain_pct=0.6, river_pct=0.1)
-        self._fill_zone(self.zones["human"], forest_pct=0.3, plain_pct=0.5, swamp_pct=0.1, river_pct=0.1)
-        self._fill_zone(self.zones["orc"], dead_forest_pct=0.3, swamp_pct=0.3, volcanic_pct=0.2, mountain_pct=0.2)
-        self._fill_zone(self.zones["troll"], dead_forest_pct=0.4, ruins_pct=0.3, swamp_pct=0.2, mountain_pct=0.1)
-
-    def _fill_zone(self, zone, forest_pct=0, plain_pct=0, swamp_pct=0, mountain_pct=0, river_pct=0, volcanic_pct=0, dead_forest_pct=0, ruins_pct=0):
-        x_start, y_start, x_end, y_end = zone
-        num_tiles = (x_end - x_start) * (y_end - y_start)
-
-        num_forest = int(num_tiles * forest_pct)
-        num_plain = int(num_tiles * plain_pct)
-        num_swamp = int(num_tiles * swamp_pct)
-        num_mountain = int(num_tiles * mountain_pct)
-        num_river = int(num_tiles * river_pct)
-        num_volcanic = int(num_tiles * volcanic_pct)
-        num_dead_forest = int(num_tiles * dead_forest_pct)
-        num_ruins = int(num_tiles * ruins_pct)
-
-        tiles = (
-            [Forest(0, 0) for _ in range(num_forest)] +
-            [Plain(0, 0) for _ in range(num_plain)] +
-            [Swamp(0, 0) for _ in range(num_swamp)] +
-            [Mountain(0, 0) for _ in range(num_mountain)] +
-            [River(0, 0) for _ in range(num_river)] +
-            [Volcanic(0, 0) for _ in range(num_volcanic)] +
-            [DeadForest(0, 0) for _ in range(num_dead_forest)] +
-            [Ruins(0, 0) for _ in range(num_ruins)]
-        )
-        random.shuffle(tiles)
-
-        for y in range(y_start, y_end):
-            for x in range(x_start, x_end):
-                if tiles:
-                    tile = tiles.pop()
-                    tile.x = x
-                    tile.y = y
-                    self.grid[y][x] = tile
- 
-    def draw_with_camera(self, screen, cell_size, camera_x, camera_y, view_width, view_height):
-        for y in range(camera_y, min(camera_y + view_height, self.height)):
-            for x in range(camera_x, min(camera_x + view_width, self.width)):
-                tile = self.grid[y][x]
-                if tile:
-                    tile.draw(screen, cell_size, camera_x, camera_y)
-
-    def draw(self, screen, cell_size):
-        for y in range(self.height):
-            for x in range(self.width):
-                tile = self.grid[y][x]
-                if tile:
-                    tile.draw(screen, cell_size, 0, 0)
+import numpy as np
+
+# Classe Tile
+class Tile:
+    def __init__(self, x, y, texture_key, visibility=1, speed=1, obstacle=False, special=""):
+        self.x = x
+        self.y = y
+        self.texture_key = texture_key
+        self.visibility = visibility
+        self.speed = speed
+        self.obstacle = obstacle
+        self.special = special
+
+class Swamp(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "swamp", visibility=2, speed=2, obstacle=False, special="swamp")
+
+class Forest(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "forest", visibility=3, speed=5, obstacle=False, special="dark forest")
+
+class Mountain(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "mountain", visibility=1, speed=1, obstacle=False, special="mountain")
+
+class Obstacle(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "obstacle", visibility=0, speed=0, obstacle=True, special="unpassable rock")
+
+class Plain(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "plain", visibility=4, speed=4, obstacle=False, special="plain")
+
+class River(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "river", visibility=1, speed=1, obstacle=True, special="river")
+
+class DeadForest(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "dead_forest", visibility=2, speed=2, obstacle=False, special="dead forest")
+
+class Volcanic(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "volcanic", visibility=1, speed=1, obstacle=False, special="volcanic")
+
+class Ruins(Tile):
+    def __init__(self, x, y):
+        super().__init__(x, y, "ruins", visibility=2, speed=1, obstacle=False, special="ruins")
+
+# Tables de propriétés par type de terrain, indexées par l'identifiant stocké dans Environment.terrain.
+# L'identifiant 0 correspond à une case vide (None dans l'ancienne grille).
+EMPTY = 0
+TERRAIN_TYPES = (None, Swamp, Forest, Mountain, Obstacle, Plain, River, DeadForest, Volcanic, Ruins)
+TERRAIN_IDS = {tile_class: terrain_id for terrain_id, tile_class in enumerate(TERRAIN_TYPES) if tile_class}
+
+_prototypes = [tile_class(0, 0) if tile_class else None for tile_class in TERRAIN_TYPES]
+TERRAIN_OBSTACLE = np.array([bool(t and t.obstacle) for t in _prototypes], dtype=bool)
+TERRAIN_SPEED = np.array([t.speed if t else 0 for t in _prototypes], dtype=np.uint8)
+TERRAIN_VISIBILITY = np.array([t.visibility if t else 0 for t in _prototypes], dtype=np.uint8)
+TERRAIN_TEXTURE_KEYS = [t.texture_key if t else None for t in _prototypes]
+del _prototypes
+
+# Coût de déplacement pour entrer sur une case : 1 sur terrain rapide (speed >= 4),
+# 2 sur terrain moyen, 3 sur terrain lent. Les obstacles ne sont jamais franchissables.
+TERRAIN_MOVE_COST = np.where(TERRAIN_SPEED >= 4, 1, np.where(TERRAIN_SPEED >= 2, 2, 3)).astype(np.uint8)
+TERRAIN_MOVE_COST[0] = 1
+
+class GridRow:
+    """Vue d'une ligne de la grille : grid[y][x] construit la tuile à la volée."""
+    __slots__ = ("environment", "y")
+
+    def __init__(self, environment, y):
+        self.environment = environment
+        self.y = y
+
+    def __len__(self):
+        return self.environment.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.environment.width:
+            raise IndexError("grid column out of range")
+        tile_class = TERRAIN_TYPES[self.environment.terrain[self.y, x]]
+        return tile_class(x, self.y) if tile_class else None
+
+    def __setitem__(self, x, tile):
+        if not 0 <= x < self.environment.width:
+            raise IndexError("grid column out of range")
+        self.environment.set_tile(x, self.y, tile)
+
+class GridView:
+    """Compatibilité avec l'ancienne liste de listes de Tile (grid[y][x])."""
+    __slots__ = ("environment",)
+
+    def __init__(self, environment):
+        self.environment = environment
+
+    def __len__(self):
+        return self.environment.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.environment.height:
+            raise IndexError("grid row out of range")
+        return GridRow(self.environment, y)
+
+# Composition de chaque zone. En mode regroupé, les terrains sont posés dans cet ordre
+# du bruit le plus bas au plus haut : les rivières occupent les creux, les montagnes les crêtes.
+ZONE_COMPOSITION = {
+    "elf": {River: 0.1, Swamp: 0.1, Plain: 0.1, Forest: 0.7},
+    "dwarf": {River: 0.1, Plain: 0.2, Forest: 0.1, Mountain: 0.6},
+    "human": {River: 0.1, Swamp: 0.1, Plain: 0.5, Forest: 0.3},
+    "orc": {Swamp: 0.3, DeadForest: 0.3, Volcanic: 0.2, Mountain: 0.2},
+    "troll": {Swamp: 0.2, DeadForest: 0.4, Ruins: 0.3, Mountain: 0.1},
+}
+
+class Environment:
+    def __init__(self, width=96, height=96, seed=None):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.terrain = np.zeros((self.height, self.width), dtype=np.uint8)  # Identifiants de terrain
+        self.grid = GridView(self)
+        self.zones = {}
+        self.zone_names = [None]
+        self.zone_ids = np.zeros((self.height, self.width), dtype=np.uint8)
+        self.listeners = []  # Objets prévenus des modifications du terrain (rendu, caches...)
+
+    def set_tile(self, x, y, tile):
+        """Remplace une tuile et prévient les observateurs du terrain."""
+        self.terrain[y, x] = TERRAIN_IDS[type(tile)] if tile else EMPTY
+        for listener in self.listeners:
+            listener.tile_changed(x, y)
+
+    def _build_zone_raster(self):
+        """Précalcule l'identifiant de zone de chaque case ; la première zone déclarée l'emporte."""
+        self.zone_names = [None] + list(self.zones)
+        self.zone_ids.fill(0)
+        for zone_id in range(len(self.zone_names) - 1, 0, -1):
+            x_start, y_start, x_end, y_end = self.zones[self.zone_names[zone_id]]
+            self.zone_ids[y_start:y_end, x_start:x_end] = zone_id
+
+    def set_terrain(self, terrain, zones):
+        """Installe un terrain existant (tableau uint8 hauteur x largeur, éventuellement projeté en mémoire)."""
+        self.terrain = terrain
+        self.zones = dict(zones)
+        self._build_zone_raster()
+        for listener in self.listeners:
+            listener.terrain_reset()
+
+    def request_region(self, x_start, y_start, x_end, y_end):
+        """Le terrain est entièrement en mémoire : toute région est prête (voir world.ChunkedWorld)."""
+        return True
+
+    def raster(self, dtype):
+        """Tableau nul de la taille de la carte, pour les couches qui suivent l'état de chaque case."""
+        return np.zeros((self.height, self.width), dtype=dtype)
+
+    def terrain_overview(self, columns, rows):
+        """Terrain pour la minimap : la carte entière, que la minimap réduit elle-même."""
+        return np.asarray(self.terrain)
+
+    def close(self):
+        """Rien à libérer : le terrain est un simple tableau (voir world.ChunkedWorld.close)."""
+
+    def is_within_bounds(self, x, y):
+        """Check if the given (x, y) coordinates are within the grid boundaries."""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_obstacle(self, x, y):
+        """Check if a given tile is an obstacle."""
+        if self.is_within_bounds(x, y):
+            return bool(TERRAIN_OBSTACLE[self.terrain[y, x]])
+        return True
+
+    def get_zone(self, x, y):
+        """Retourne la zone correspondant à une position."""
+        if not self.is_within_bounds(x, y):
+            return None
+        return self.zone_names[self.zone_ids[y, x]]
+
+    def generate_environment(self, seed=None, clustered=False):
+        """Génère le terrain de toutes les zones en une passe vectorisée.
+
+        Avec la même graine, la carte produite est identique d'une exécution à l'autre.
+        clustered=True regroupe les terrains en masses cohérentes (rivières, forêts)
+        à partir d'un bruit lissé, sans changer les proportions de chaque zone.
+        """
+        if seed is not None:
+            self.seed = seed
+        rng = np.random.default_rng(self.seed)
+
+        self.zones = {
+            "elf": (0, 0, self.width // 2, self.height // 2),
+            "dwarf": (0, self.height // 2, self.width // 2, self.height),
+            "human": (self.width // 4, self.height // 4, 3 * self.width // 4, 3 * self.height // 4),
+            "orc": (self.width // 2, 0, self.width, self.height // 2),
+            "troll": (self.width // 2, self.height // 2, self.width, self.height)
+        }
+        self._build_zone_raster()
+
+        # Propriétaire final de chaque case : la dernière zone qui la remplit écrase les précédentes.
+        # Seules ces cases sont tirées, au lieu de remplir puis écraser les zones qui se chevauchent.
+        counts_per_zone = []
+        owner = np.full(self.width * self.height, -1, dtype=np.int8)
+        for zone_index, zone_name in enumerate(self.zones):
+            x_start, y_start, x_end, y_end = self.zones[zone_name]
+            terrain_ids, counts = self._zone_counts(zone_name)
+            counts_per_zone.append((terrain_ids, counts))
+            cells = self._zone_cells(x_start, y_start, x_end, y_end)[:counts.sum()]
+            owner[cells] = zone_index
+
+        noise = self._value_noise(rng) if clustered else None
+        self.terrain.fill(EMPTY)
+        flat_terrain = self.terrain.reshape(-1)
+        for zone_index, (terrain_ids, counts) in enumerate(counts_per_zone):
+            cells = np.flatnonzero(owner == zone_index)
+            if not len(cells) or not counts.sum():
+                continue
+            # Tirage sans remise des cases visibles parmi toutes celles prévues pour la zone
+            drawn = rng.multivariate_hypergeometric(counts, len(cells))
+            values = np.repeat(terrain_ids, drawn)
+            if noise is None:
+                rng.shuffle(values)
+            else:
+                cells = cells[np.argsort(noise[cells], kind="stable")]
+            flat_terrain[cells] = values
+
+        for listener in self.listeners:
+            listener.terrain_reset()
+
+    def _zone_counts(self, zone_name):
+        """Nombre de cases de chaque terrain pour une zone, selon ZONE_COMPOSITION."""
+        x_start, y_start, x_end, y_end = self.zones[zone_name]
+        num_tiles = (x_end - x_start) * (y_end - y_start)
+        composition = ZONE_COMPOSITION[zone_name]
+        terrain_ids = np.array([TERRAIN_IDS[tile_class] for tile_class in composition], dtype=np.uint8)
+        counts = np.array([int(num_tiles * pct) for pct in composition.values()], dtype=np.int64)
+        return terrain_ids, counts
+
+    def _zone_cells(self, x_start, y_start, x_end, y_end):
+        """Indices à plat des cases d'une zone, dans l'ordre de lecture."""
+        ys = np.arange(y_start, y_end)[:, None]
+        xs = np.arange(x_start, x_end)[None, :]
+        return (ys * self.width + xs).reshape(-1)
+
+    def _value_noise(self, rng, cell=12, octaves=3):
+        """Bruit de valeur lissé (interpolation bilinéaire sur plusieurs octaves), à plat."""
+        noise = np.zeros((self.height, self.width), dtype=np.float32)
+        amplitude = 1.0
+        for _ in range(octaves):
+            lattice = rng.random((self.height // cell + 2, self.width // cell + 2), dtype=np.float32)
+            ys = np.arange(self.height, dtype=np.float32) / cell
+            xs = np.arange(self.width, dtype=np.float32) / cell
+            y0 = ys.astype(np.int64)
+            x0 = xs.astype(np.int64)
+            ty = (ys - y0)[:, None]
+            tx = (xs - x0)[None, :]
+            # Interpolation séparable : d'abord les lignes du treillis, puis entre les lignes
+            rows = lattice[:, x0] * (1 - tx) + lattice[:, x0 + 1] * tx
+            noise += (rows[y0] * (1 - ty) + rows[y0 + 1] * ty) * amplitude
+            amplitude *= 0.5
+            cell = max(1, cell // 2)
+        # Quantifié sur 16 bits : le tri stable devient un tri par base, bien plus rapide
+        noise *= 65535 / noise.max()
+        return noise.astype(np.uint16).reshape(-1)
@@ -0,0 +1,211 @@
+import heapq
+from environment import TERRAIN_MOVE_COST, TERRAIN_OBSTACLE
+
+INFINITY = float('inf')
+
+
+class FlowField:
+    """Champ de distances multi-sources vers un ensemble de cases cibles.
+
+    distance[c] est le coût minimal pour aller de c jusqu'à la cible la plus proche,
+    en payant TERRAIN_MOVE_COST à chaque case où l'on entre. Chaque case retient aussi
+    la cible qui l'a atteinte, ce qui permet de retirer une cible sans tout recalculer.
+
+    owned[cible] liste les cases rattachées à chaque cible (avec des entrées périmées, filtrées à la
+    lecture) : retirer une cible ne coûte que la surface de sa région, pas celle de la carte.
+
+    Le champ couvre le rectangle bounds (x_start, y_start, x_end, y_end), toute la carte par défaut ;
+    les cases hors de ce rectangle sont à distance infinie. Les méthodes prennent des coordonnées de la carte.
+    """
+    def __init__(self, environment, bounds=None):
+        self.environment = environment
+        self.bounds = tuple(bounds) if bounds is not None else (0, 0, environment.width, environment.height)
+        self.x_start, self.y_start, x_end, y_end = self.bounds
+        self.width = x_end - self.x_start
+        self.height = y_end - self.y_start
+        self.targets = set()
+        self.blocked = set()
+        self.owned = {}      # index de la cible -> cases qui lui ont été rattachées
+        self.appended = 0    # Entrées ajoutées à owned depuis son dernier compactage
+        self.refresh_costs()
+
+    def refresh_costs(self):
+        """Relit le terrain et recalcule entièrement le champ (après une modification de la carte)."""
+        x_start, y_start, x_end, y_end = self.bounds
+        terrain = self.environment.terrain[y_start:y_end, x_start:x_end]
+        self.costs = (TERRAIN_MOVE_COST[terrain] * ~TERRAIN_OBSTACLE[terrain]).reshape(-1).tolist()
+        for cell in self.blocked:
+            index = self._index(*cell)
+            if index is not None:
+                self.costs[index] = 0
+        self.recompute()
+
+    def _index(self, x, y):
+        """Indice de la case (x, y) dans le champ, ou None si elle est hors de ses bornes."""
+        x -= self.x_start
+        y -= self.y_start
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def recompute(self):
+        """Calcul complet en un seul balayage depuis toutes les cibles."""
+        self.distance = [INFINITY] * (self.width * self.height)
+        self.source = [-1] * (self.width * self.height)
+        self.owned = {}
+        self.appended = 0
+        self._propagate(self._seed_targets(self.targets))
+
+    def _seed_targets(self, targets):
+        seeds = []
+        for cell in targets:
+            index = self._index(*cell)
+            if index is None:
+                continue
+            self.distance[index] = 0
+            self.source[index] = index
+            self.owned.setdefault(index, []).append(index)
+            seeds.append((0, index))
+        return seeds
+
+    def _propagate(self, queue):
+        """Dijkstra à partir d'entrées (distance, index) ; ne fait que diminuer les distances."""
+        heapq.heapify(queue)
+        width, height = self.width, self.height
+        distance, source, costs, owned = self.distance, self.source, self.costs, self.owned
+        appended = 0
+        while queue:
+            current_distance, index = heapq.heappop(queue)
+            if current_distance > distance[index]:
+                continue
+            step = costs[index]
+            owner = source[index]
+            if not step and owner != index:
+                continue  # Les obstacles ne propagent pas, sauf s'ils sont eux-mêmes des cibles
+            new_distance = current_distance + (step or 1)
+            cells = owned[owner]
+            x = index % width
+            for neighbour, valid in ((index - width, index >= width), (index + width, index < (height - 1) * width),
+                                     (index - 1, x > 0), (index + 1, x < width - 1)):
+                if valid and costs[neighbour] and new_distance < distance[neighbour]:
+                    distance[neighbour] = new_distance
+                    source[neighbour] = owner
+                    cells.append(neighbour)
+                    appended += 1
+                    heapq.heappush(queue, (new_distance, neighbour))
+        self.appended += appended
+        if self.appended > 2 * len(source):
+            self._compact()
+
+    def _compact(self):
+        """Reconstruit owned sans ses entrées périmées (coût amorti sur les ajouts qui l'ont fait grossir)."""
+        owned = {}
+        for index, owner in enumerate(self.source):
+            if owner != -1:
+                owned.setdefault(owner, []).append(index)
+        self.owned = owned
+        self.appended = 0
+
+    def set_targets(self, targets):
+        """Remplace les cibles ; seules les cibles ajoutées ou retirées sont retraitées."""
+        targets = set(targets)
+        removed = self.targets - targets
+        added = targets - self.targets
+        self.targets = targets
+        # Les cibles ajoutées d'abord : pour une unité qui s'est déplacée, sa nouvelle position reprend
+        # déjà une partie de l'ancienne région, qui n'a plus besoin d'être effacée puis ré-atteinte
+        if added:
+            self._propagate(self._seed_targets(added))
+        if removed:
+            self._remove_sources({self._index(*cell) for cell in removed} - {None})
+
+    def add_target(self, cell):
+        self.set_targets(self.targets | {cell})
+
+    def remove_target(self, cell):
+        self.set_targets(self.targets - {cell})
+
+    def _remove_sources(self, removed):
+        """Efface les cases rattachées aux cibles retirées puis les ré-atteint depuis leur bordure."""
+        width, height = self.width, self.height
+        distance, source, costs, owned = self.distance, self.source, self.costs, self.owned
+        orphans = []
+        for target in removed:
+            for index in owned.pop(target, ()):
+                if source[index] == target:  # Sinon entrée périmée (ou déjà vue)
+                    distance[index] = INFINITY
+                    source[index] = -1
+                    orphans.append(index)
+
+        queue = []
+        for index in orphans:
+            x = index % width
+            for neighbour, valid in ((index - width, index >= width), (index + width, index < (height - 1) * width),
+                                     (index - 1, x > 0), (index + 1, x < width - 1)):
+                if valid and source[neighbour] != -1 and (costs[neighbour] or source[neighbour] == neighbour):
+                    candidate = distance[neighbour] + (costs[neighbour] or 1)
+                    if candidate < distance[index] and costs[index]:
+                        distance[index] = candidate
+                        source[index] = source[neighbour]
+                        queue.append((candidate, index))
+        for index in orphans:
+            if source[index] != -1:
+                owned[source[index]].append(index)
+        self._propagate(queue)
+
+    def set_blocked(self, cells):
+        """Déclare des cases infranchissables en plus du terrain (par exemple des unités alliées)."""
+        cells = set(cells)
+        if cells == self.blocked:
+            return
+        newly_blocked = cells - self.blocked
+        freed = self.blocked - cells
+        self.blocked = cells
+        if newly_blocked:
+            # Un nouvel obstacle peut allonger n'importe quel chemin : recalcul complet
+            self.refresh_costs()
+            return
+
+        # Cases libérées uniquement : les distances ne peuvent que diminuer
+        terrain = self.environment.terrain
+        queue = []
+        for x, y in freed:
+            index = self._index(x, y)
+            if index is None:
+                continue
+            terrain_id = terrain[y, x]
+            if TERRAIN_OBSTACLE[terrain_id]:
+                continue
+            self.costs[index] = int(TERRAIN_MOVE_COST[terrain_id])
+            queue.extend((self.distance[n], n) for n in self._neighbours(index) if self.source[n] != -1)
+        self._propagate(queue)
+
+    def _neighbours(self, index):
+        x = index % self.width
+        if index >= self.width:
+            yield index - self.width
+        if index < (self.height - 1) * self.width:
+            yield index + self.width
+        if x > 0:
+            yield index - 1
+        if x < self.width - 1:
+            yield index + 1
+
+    def distance_at(self, x, y):
+        index = self._index(x, y)
+        return self.distance[index] if index is not None else INFINITY
+
+    def next_step(self, x, y):
+        """Case voisine qui rapproche le plus d'une cible, ou None si aucune ne le fait."""
+        index = self._index(x, y)
+        if index is None:
+            return None
+        best = None
+        best_distance = self.distance[index]
+        for neighbour in self._neighbours(index):
+            if self.distance[neighbour] < best_distance:
+                best = neighbour
+                best_distance = self.distance[neighbour]
+        if best is None:
+            return None
+        return self.x_start + best % self.width, self.y_start + best // self.width
@@ -0,0 +1,27 @@
+import numpy as np
+import pygame
+
+FOG_ALPHA = 160  # Opacité du brouillard sur les cases non vues
+
+
+class FogOverlay:
+    """Voile sombre sur les cases de la vue qu'une faction ne voit pas, reconstruit seulement si besoin."""
+    def __init__(self, fog):
+        self.fog = fog
+        self.surface = None
+        self.key = None
+
+    def draw(self, screen, faction, camera_x, camera_y, cell_size, view_width, view_height):
+        key = (faction, self.fog.version(faction), camera_x, camera_y, cell_size, view_width, view_height)
+        if key != self.key:
+            self.key = key
+            visible = self.fog.visible_window(faction, camera_x, camera_y, camera_x + view_width, camera_y + view_height)
+            # Une case par pixel, puis agrandissement en une seule opération
+            small = pygame.Surface((view_width, view_height), pygame.SRCALPHA)
+            small.fill((0, 0, 0, 0))
+            alpha = pygame.surfarray.pixels_alpha(small)
+            alpha[:visible.shape[1], :visible.shape[0]] = np.where(visible, 0, FOG_ALPHA).T
+            del alpha  # Libère le verrou de la surface
+            self.surface = pygame.transform.scale(small, (view_width * cell_size, view_height * cell_size))
+
+        screen.blit(self.surface, (0, 0))
@@ -1,277 +1,428 @@
-import pygame
-import random
-from environment import Environment
-from unit import Elf, Human, Orc, Dwarf, Goblin, Troll, Weapon, HealthPotion
-from smoke import Smoke
-from interface import Interface
-from venom import Venom
-
-# Constantes
-GRID_WIDTH = 96
-GRID_HEIGHT = 96
-CELL_SIZE = 60
-VIEW_WIDTH = 26
-VIEW_HEIGHT = 16
-SIDEBAR_WIDTH = 300
-SCREEN_WIDTH = VIEW_WIDTH * CELL_SIZE + SIDEBAR_WIDTH
-SCREEN_HEIGHT = VIEW_HEIGHT * CELL_SIZE
-FPS = 30
-
-class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Turn-Based Combat Game with Items")
-        self.clock = pygame.time.Clock()
-
-        # Environment setup
-        self.environment = Environment(GRID_WIDTH, GRID_HEIGHT)
-        self.environment.generate_environment()
-
-        # Ajouter les unités
-        self.units = [
-            Elf(GRID_WIDTH // 2, GRID_HEIGHT // 2),
-            Human(GRID_WIDTH // 2 + 3, GRID_HEIGHT // 2 + 3),
-            Orc(GRID_WIDTH // 2 - 3, GRID_HEIGHT // 2 - 3)
-        ]
-        self.current_unit_index = 0
-        self.turn_counter = 0  # Compteur pour la régénération des points de compétence
-        self.game_over = False
- 
-        # Interface setup
-        self.interface = Interface(width=SIDEBAR_WIDTH)
-
-        # Objets et effets
-        self.weapons = []
-        self.health_potions = []
-        self.smokes = []  # 存储烟雾区域
-        self.venoms = []  # 初始化毒液区域列表
-
-        # Générer objets
-        self.generate_weapons(10)
-        self.generate_health_potions(10)
-
-        # Initialiser la sélection et la caméra
-        self.camera_x = self.units[0].x - VIEW_WIDTH // 2
-        self.camera_y = self.units[0].y - VIEW_HEIGHT // 2
-        self.selected_tile = (self.units[0].x, self.units[0].y)
-        self.accessible_tiles = []  # Tuiles accessibles
-
-    def generate_weapons(self, num_weapons):
-        for _ in range(num_weapons):
-            while True:
-                x = random.randint(0, GRID_WIDTH - 1)
-                y = random.randint(0, GRID_HEIGHT - 1)
-                if not self.environment.is_obstacle(x, y):
-                    self.weapons.append(Weapon(x, y))
-                    break
-
-    def generate_health_potions(self, num_potions):
-        for _ in range(num_potions):
-            while True:
-                x = random.randint(0, GRID_WIDTH - 1)
-                y = random.randint(0, GRID_HEIGHT - 1)
-                if not self.environment.is_obstacle(x, y):
-                    self.health_potions.append(HealthPotion(x, y))
-                    break
-
-    def calculate_accessible_tiles(self):
-        """Calcule les tuiles accessibles pour l'unité actuelle."""
-        current_unit = self.units[self.current_unit_index]
-        self.accessible_tiles = []
-        for dy in range(-current_unit.speed, current_unit.speed + 1):
-            for dx in range(-current_unit.speed, current_unit.speed + 1):
-                new_x = current_unit.x + dx
-                new_y = current_unit.y + dy
-                if abs(dx) + abs(dy) <= current_unit.speed and self.environment.is_within_bounds(new_x, new_y):
-                    tile = self.environment.grid[new_y][new_x]
-                    if tile and not tile.obstacle:
-                        self.accessible_tiles.append((new_x, new_y))
-
-    def handle_input(self):
-        if self.game_over:
-            return
-
-        current_unit = self.units[self.current_unit_index]
-        keys = pygame.key.get_pressed()
-
-
-        # 检测空格键触发毒液技能
-        if isinstance(current_unit, Elf) and keys[pygame.K_SPACE]:
-            if not current_unit.venom_used:  # 如果未使用过毒液技能
-                venom = Venom(current_unit.x, current_unit.y)
-                self.venoms.append(venom)
-                current_unit.venom_used = True  # 标记为已使用
-                print(f"{current_unit.unit_type} used Venom Skill!")
-
-        # Human 烟雾技能
-        if isinstance(current_unit, Human) and keys[pygame.K_SPACE]:
-            if not current_unit.smoke_used:  # 检查是否未使用过烟雾技能
-                smoke = Smoke(current_unit.x, current_unit.y, size=7, duration=float('inf'))  # 设置为无限持续时间
-                self.smokes.append(smoke)  # 添加到烟雾列表
-                current_unit.smoke_used = True  # 标记为已使用
-                print(f"{current_unit.unit_type} used Smoke Skill! This skill can no longer be used.")
-
-        # Navigation de la sélection
-        new_x, new_y = self.selected_tile
-        if keys[pygame.K_UP]:
-            new_y -= 1
-        if keys[pygame.K_DOWN]:
-            new_y += 1
-        if keys[pygame.K_LEFT]:
-            new_x -= 1
-        if keys[pygame.K_RIGHT]:
-            new_x += 1
-
-        if (new_x, new_y) in self.accessible_tiles:
-            self.selected_tile = (new_x, new_y)
-
-        # Déplacement
-        if keys[pygame.K_RETURN]:
-            if self.selected_tile in self.accessible_tiles:
-                current_unit.x, current_unit.y = self.selected_tile
-                self.check_for_item(current_unit)
-                self.end_turn()
-
-        # Attaque
-        if keys[pygame.K_a]:
-            target = self.get_unit_at(self.selected_tile)
-            if target and target != current_unit:
-                current_unit.attack(target)
-                self.interface.add_message("attack", unit_type=current_unit.unit_type, value=current_unit.attack_power)
-                self.check_game_status()
-                self.end_turn()
-
-        # Utilisation des compétences
-        if keys[pygame.K_1]:
-            skill_name = current_unit.use_skill(1)
-            if skill_name:
-                self.interface.add_message("skill", unit_type=current_unit.unit_type, skill_name=skill_name)
-                self.end_turn()
-        if keys[pygame.K_2]:
-            skill_name = current_unit.use_skill(2)
-            if skill_name:
-                self.interface.add_message("skill", unit_type=current_unit.unit_type, skill_name=skill_name)
-                self.end_turn()
-        if keys[pygame.K_3]:
-            skill_name = current_unit.use_skill(3)
-            if skill_name:
-                self.interface.add_message("skill", unit_type=current_unit.unit_type, skill_name=skill_name)
-                self.end_turn()
-
-        # Gestion de la caméra
-        self.camera_x = current_unit.x - VIEW_WIDTH // 2
-        self.camera_y = current_unit.y - VIEW_HEIGHT // 2
-        self.camera_x = max(0, min(self.camera_x, GRID_WIDTH - VIEW_WIDTH))
-        self.camera_y = max(0, min(self.camera_y, GRID_HEIGHT - VIEW_HEIGHT))
-
-    def check_for_item(self, unit):
-        """Vérifie si une unité est sur une case contenant un objet et applique l'effet."""
-        for weapon in self.weapons:
-            if weapon.x == unit.x and weapon.y == unit.y:
-                unit.pick_up_weapon(weapon)
-                self.interface.add_message("attack", unit_type=unit.unit_type, value=weapon.attack_boost)
-                self.weapons.remove(weapon)
-                break
-
-        for potion in self.health_potions:
-            if potion.x == unit.x and potion.y == unit.y:
-                unit.health = min(100, unit.health + potion.health_boost)
-                self.interface.add_message("skill", unit_type=unit.unit_type, skill_name="Health Potion")
-                self.health_potions.remove(potion)
-                break
-
-        for venom in self.venoms:
-            if venom.is_in_venom(unit.x, unit.y):
-                unit.health -= 5  # 每行动一次减少 5 点生命值
-                print(f"{unit.unit_type} is in venom! Health -5")
-
-    def get_unit_at(self, position):
-        for unit in self.units:
-            if (unit.x, unit.y) == position:
-                return unit
-        return None
-
-    def end_turn(self):
-        if self.game_over:
-            return
-
-        self.current_unit_index = (self.current_unit_index + 1) % len(self.units)
-        self.selected_tile = (self.units[self.current_unit_index].x, self.units[self.current_unit_index].y)
-        self.calculate_accessible_tiles()
-        self.turn_counter += 1
-
-        if self.turn_counter % 3 == 0:
-            for unit in self.units:
-                unit.update_skill_points()
-
-    def check_game_status(self):
-        allies = [unit for unit in self.units if isinstance(unit, (Elf, Human, Dwarf))]
-        enemies = [unit for unit in self.units if isinstance(unit, (Orc, Goblin, Troll))]
-
-        if all(unit.health <= 0 for unit in allies):
-            self.interface.add_message("skill", unit_type="Game", skill_name="Defeat")
-            self.game_over = True
-
-        if all(unit.health <= 0 for unit in enemies):
-            self.interface.add_message("skill", unit_type="Game", skill_name="Victory")
-            self.game_over = True
-
-    def draw(self):
-        self.screen.fill((0, 0, 0))
-        self.environment.draw_with_camera(self.screen, CELL_SIZE, self.camera_x, self.camera_y, VIEW_WIDTH, VIEW_HEIGHT)
-
-        for venom in self.venoms:
-            venom.draw(self.screen, self.camera_x, self.camera_y, CELL_SIZE)
-
-        # Dessiner les tuiles accessibles
-        for tile in self.accessible_tiles:
-            screen_x = (tile[0] - self.camera_x) * CELL_SIZE
-            screen_y = (tile[1] - self.camera_y) * CELL_SIZE
-            pygame.draw.rect(self.screen, (0, 255, 0, 100), (screen_x, screen_y, CELL_SIZE, CELL_SIZE), 2)
-
-        # Dessiner la tuile sélectionnée
-        selected_x = (self.selected_tile[0] - self.camera_x) * CELL_SIZE
-        selected_y = (self.selected_tile[1] - self.camera_y) * CELL_SIZE
-        pygame.draw.rect(self.screen, (255, 255, 0), (selected_x, selected_y, CELL_SIZE, CELL_SIZE), 3)
-
-        for weapon in self.weapons:
-            weapon.draw(self.screen, (weapon.x - self.camera_x) * CELL_SIZE, (weapon.y - self.camera_y) * CELL_SIZE)
-
-        for potion in self.health_potions:
-            potion.draw(self.screen, (potion.x - self.camera_x) * CELL_SIZE, (potion.y - self.camera_y) * CELL_SIZE)
-
-        for unit in self.units:
-            unit.draw(self.screen, (unit.x - self.camera_x) * CELL_SIZE, (unit.y - self.camera_y) * CELL_SIZE)
-
-        # 绘制烟雾区域
-        for smoke in self.smokes:
-            smoke.draw(self.screen, self.camera_x, self.camera_y, CELL_SIZE)
-
-        # Dessiner l'interface
-        self.interface.draw(self.screen, self.units)
-
-        pygame.display.flip()
-
-    def run(self):
-        self.calculate_accessible_tiles()
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-
-            # 更新烟雾区域的持续时间
-            self.smokes = [smoke for smoke in self.smokes if smoke.duration > 0]
-            for smoke in self.smokes:
-                smoke.duration -= 1
-
-            self.handle_input()
-            self.draw()
-            self.clock.tick(FPS)
-
-        pygame.quit()
-
-if __name__ == "__main__":
-    game = Game()
-    game.run()
+import argparse
+import time
+from collections import deque
+import pygame
+from interface import Interface
+from simulation import Simulation, faction_of
+from terrain_render import TerrainLayer, ZOOM_LEVELS
+from sprites import SpriteRenderer
+from effect_overlay import EffectOverlay
+from fog_overlay import FogOverlay
+from minimap import Minimap
+from replay import ReplayRecorder
+from assets import assets, DEFAULT_CACHE_DIR
+from profiler import profiler
+from profiler_overlay import ProfilerOverlay
+from ai import AIController
+from snapshot import save_snapshot, load_snapshot
+from commands import Select, Move, Attack, Skill, Special
+
+# Constantes
+GRID_WIDTH = 96
+GRID_HEIGHT = 96
+CELL_SIZE = 60  # Taille de case au zoom initial (voir ZOOM_LEVELS)
+VIEW_WIDTH = 26
+VIEW_HEIGHT = 16
+SIDEBAR_WIDTH = 300
+MINIMAP_SIZE = 280
+SCREEN_WIDTH = VIEW_WIDTH * CELL_SIZE + SIDEBAR_WIDTH
+SCREEN_HEIGHT = VIEW_HEIGHT * CELL_SIZE
+FPS = 30              # Cadence maximale d'affichage
+LOGIC_RATE = 30       # Étapes de logique par seconde, indépendamment de l'affichage
+MAX_LOGIC_STEPS = 5   # Étapes rattrapées au plus par tour de boucle après un ralentissement
+IDLE_TIMEOUT = 250  # ms : délai maximal d'attente d'un événement quand rien ne bouge
+SAVE_PATH = "savegame.bin"
+
+# Commande produite par chaque touche, une fois par appui (KEYDOWN) et non à chaque image
+KEY_COMMANDS = {
+    pygame.K_UP: Select(0, -1),
+    pygame.K_DOWN: Select(0, 1),
+    pygame.K_LEFT: Select(-1, 0),
+    pygame.K_RIGHT: Select(1, 0),
+    pygame.K_RETURN: Move(),  # Le long du chemin le moins coûteux
+    pygame.K_a: Attack(),
+    pygame.K_1: Skill(1),
+    pygame.K_2: Skill(2),
+    pygame.K_3: Skill(3),
+    pygame.K_SPACE: Special(),  # Venin de l'Elf, fumée de l'Human
+}
+
+class Game:
+    """Affichage et saisie clavier au-dessus d'une Simulation."""
+    def __init__(self, seed=None, record_path=None, asset_cache=None, full_redraw=False, profile_path=None,
+                 ai_factions=("enemies",), ai_budget=1.0, fog=True, map_size=GRID_WIDTH, simulation=None, player_faction=None,
+                 world=False):
+        pygame.init()
+        assets.cache_dir = asset_cache
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Turn-Based Combat Game with Items")
+        self.clock = pygame.time.Clock()
+
+        # Logique de la partie (ou miroir d'une partie en réseau, voir netplay.py)
+        self.simulation = simulation if simulation is not None else Simulation(map_size, map_size, seed=seed, world=world)
+        self.player_faction = player_faction  # Faction du joueur, si elle ne se déduit pas des factions de l'IA
+        print(f"Game seed: {self.simulation.seed}")
+        self.recorder = ReplayRecorder(self.simulation, record_path) if record_path else None
+
+        # Adversaire informatique (aucun si ai_factions est vide)
+        self.ai_factions = tuple(ai_factions)
+        self.ai_budget = ai_budget
+        self.ai = AIController(self.simulation.environment, self.ai_factions, ai_budget) if self.ai_factions else None
+        self.fog = fog
+
+        # Rendu
+        self.sprites = SpriteRenderer()
+        self.attach_renderers()
+
+        # Interface setup
+        self.interface = Interface(width=SIDEBAR_WIDTH)
+        self.interface.bottom_margin = MINIMAP_SIZE + 20  # Place de la minimap sous les messages
+
+        # Initialiser la sélection, le zoom et la caméra
+        self.map_rect = pygame.Rect(0, 0, VIEW_WIDTH * CELL_SIZE, VIEW_HEIGHT * CELL_SIZE)
+        self.cell_size = CELL_SIZE
+        self.camera_x = 0
+        self.camera_y = 0
+        self.selected_tile = None
+        self.turn_counter = -1  # Dernier tour affiché
+        self.sync_turn()
+        self.commands = deque()  # Commandes du joueur en attente de l'étape de logique
+
+        # Rendu par zones modifiées : état de la dernière image affichée
+        self.full_redraw = full_redraw  # Tout redessiner et flip() à chaque image, comme avant
+        self.sidebar_rect = pygame.Rect(SCREEN_WIDTH - SIDEBAR_WIDTH, 0, SIDEBAR_WIDTH, SCREEN_HEIGHT)
+        self.drawn = None
+
+        # Profilage : tableau des temps par phase, affiché avec F3
+        self.profiler_overlay = ProfilerOverlay(profiler)
+        self.show_profiler = False
+        self.profiler_rect = None  # Zone du tableau à effacer après l'avoir masqué
+        self.profile_path = profile_path  # Rapport écrit en quittant (.csv ou .json)
+        profiler.enabled = profile_path is not None
+
+    def attach_renderers(self):
+        """(Re)crée les couches de rendu liées à la simulation courante."""
+        self.terrain_layer = TerrainLayer(self.simulation.environment)
+        self.smoke_overlay = EffectOverlay(self.simulation.smokes, "smoke.png")
+        self.venom_overlay = EffectOverlay(self.simulation.venoms, "venom.png")
+        self.fog_overlay = FogOverlay(self.simulation.fog)
+        self.minimap = Minimap(self.simulation.environment, MINIMAP_SIZE)
+
+    def save_game(self):
+        try:
+            save_snapshot(self.simulation, SAVE_PATH)
+        except (OSError, ValueError) as error:
+            print(f"Could not save {SAVE_PATH}: {error}")
+            return
+        print(f"Game saved to {SAVE_PATH}")
+
+    def load_game(self):
+        try:
+            # Terrain lu en mémoire : une sauvegarde projetée ne pourrait pas être remplacée sous Windows
+            simulation = load_snapshot(SAVE_PATH, mmap=False)
+        except (OSError, ValueError) as error:
+            print(f"Could not load {SAVE_PATH}: {error}")
+            return
+        if self.recorder:
+            # Le journal ne décrit plus la partie chargée
+            self.recorder.close()
+            self.recorder = None
+        self.simulation.environment.close()
+        self.simulation = simulation
+        if self.ai:
+            # Le processus de recherche garde le terrain de l'ancienne partie
+            self.ai.close()
+            self.ai = AIController(simulation.environment, self.ai_factions, self.ai_budget)
+        self.attach_renderers()
+        self.turn_counter = -1
+        self.sync_turn()
+        self.drawn = None
+        print(f"Game loaded from {SAVE_PATH}")
+
+    def sync_turn(self):
+        """Replace la sélection et la caméra sur l'unité courante quand le tour a changé."""
+        if self.turn_counter == self.simulation.turn_counter:
+            return
+        self.turn_counter = self.simulation.turn_counter
+        current_unit = self.simulation.current_unit
+        self.selected_tile = (current_unit.x, current_unit.y)
+        self.center_camera(current_unit.x, current_unit.y)
+
+    @property
+    def view_width(self):
+        """Cases visibles en largeur au zoom courant (la dernière peut être coupée)."""
+        return -(-self.map_rect.width // self.cell_size)
+
+    @property
+    def view_height(self):
+        return -(-self.map_rect.height // self.cell_size)
+
+    def center_camera(self, x, y):
+        self.camera_x = max(0, min(x - self.view_width // 2, self.simulation.width - self.view_width))
+        self.camera_y = max(0, min(y - self.view_height // 2, self.simulation.height - self.view_height))
+
+    def zoom(self, step):
+        """Passe au niveau de zoom voisin (step > 0 : plus loin), centré sur la case sélectionnée."""
+        level = ZOOM_LEVELS.index(self.cell_size) + step
+        if 0 <= level < len(ZOOM_LEVELS):
+            self.cell_size = ZOOM_LEVELS[level]
+            self.center_camera(*self.selected_tile)
+
+    def minimap_position(self):
+        return (SCREEN_WIDTH - SIDEBAR_WIDTH + (SIDEBAR_WIDTH - self.minimap.rect.width) // 2,
+                SCREEN_HEIGHT - self.minimap.rect.height - 10)
+
+    def click(self, position):
+        """Un clic sur la minimap centre la caméra sur la case visée."""
+        minimap_x, minimap_y = self.minimap_position()
+        cell = self.minimap.cell_at(position[0] - minimap_x, position[1] - minimap_y)
+        if cell:
+            self.center_camera(*cell)
+
+    def shown_units(self, units, faction):
+        """Unités que le joueur peut voir : les siennes et les adverses hors du brouillard."""
+        if not faction:
+            return units
+        fog = self.simulation.fog
+        return [unit for unit in units if faction_of(unit) == faction or fog.is_visible(faction, unit.x, unit.y)]
+
+    def step_logic(self):
+        """Une étape de logique : vieillit les effets, exécute les commandes en file puis laisse jouer l'IA."""
+        simulation = self.simulation
+        with profiler.section("update_effects"):
+            simulation.update_effects()
+        with profiler.section("handle_input"):
+            while self.commands and not simulation.game_over and not (self.ai and self.ai.controls(simulation.current_unit)):
+                self.selected_tile = self.commands.popleft().execute(simulation, self.selected_tile)
+                self.sync_turn()  # Caméra et sélection suivent l'unité dont c'est le tour
+        self.commands.clear()  # Commandes arrivées pendant le tour de l'IA ou après la fin de partie : ignorées
+        if self.ai:
+            self.ai.update(simulation)  # Ne bloque pas : la recherche tourne dans un autre processus
+            self.sync_turn()
+        for message_type, details in simulation.pop_messages():
+            self.interface.add_message(message_type, **details)
+
+    def viewer_faction(self):
+        """Faction dont le joueur voit le brouillard : celle qu'il contrôle, None s'il n'en contrôle aucune."""
+        if not self.fog:
+            return None
+        if self.player_faction:
+            return self.player_faction
+        if not self.ai_factions:
+            return faction_of(self.simulation.current_unit)  # Deux joueurs sur le même écran
+        human = {"allies", "enemies"}.difference(self.ai_factions)
+        return human.pop() if human else None
+
+    def toggle_profiler(self):
+        """Affiche ou masque le tableau du profileur ; la mesure n'est active que s'il est affiché ou exporté."""
+        self.show_profiler = not self.show_profiler
+        profiler.enabled = self.show_profiler or self.profile_path is not None
+        # Le tableau masqué laisse une zone à redessiner
+        self.profiler_rect = self.profiler_overlay.rect
+
+    def dirty_rects(self):
+        """Zones de l'écran qui diffèrent de la dernière image affichée (liste vide si aucune)."""
+        simulation = self.simulation
+        overlay_rects = []
+        if self.profiler_rect:
+            overlay_rects.append(self.profiler_rect)
+            self.profiler_rect = None
+        if self.show_profiler:
+            previous = self.profiler_overlay.rect
+            if self.profiler_overlay.update():
+                overlay_rects.append(previous.union(self.profiler_overlay.rect))
+
+        faction = self.viewer_faction()
+        fog_version = simulation.update_fog().version(faction) if faction else None
+        state = {
+            "view": (self.camera_x, self.camera_y, self.cell_size, simulation.version, simulation.smokes.version,
+                     simulation.venoms.version, faction, fog_version),
+            "selection": self.selected_tile,
+            "sidebar": (simulation.version, faction, fog_version, self.camera_x, self.camera_y, self.cell_size),  # Minimap comprise
+        }
+        drawn, self.drawn = self.drawn, state
+        if drawn is None or self.full_redraw:
+            return [self.screen.get_rect()]
+
+        rects = overlay_rects
+        if state["view"] != drawn["view"]:
+            rects.append(self.map_rect)
+        elif state["selection"] != drawn["selection"]:
+            for tile_x, tile_y in (drawn["selection"], state["selection"]):
+                rects.append(pygame.Rect((tile_x - self.camera_x) * self.cell_size, (tile_y - self.camera_y) * self.cell_size,
+                                         self.cell_size, self.cell_size))
+        if state["sidebar"] != drawn["sidebar"]:
+            rects.append(self.sidebar_rect)
+        return rects
+
+    def draw(self):
+        """Redessine les zones modifiées et les affiche ; retourne False si rien n'a changé."""
+        rects = self.dirty_rects()
+        if not rects:
+            return False
+        self.simulation.sync_skill_points()  # Points de compétence affichés à jour
+
+        for rect in rects:
+            self.screen.set_clip(rect)
+            if rect.colliderect(self.map_rect):
+                self.draw_map()
+                if self.show_profiler:
+                    self.profiler_overlay.draw(self.screen)
+            if rect.colliderect(self.sidebar_rect):
+                with profiler.section("interface"):
+                    self.interface.draw(self.screen, self.simulation.units)
+                with profiler.section("minimap"):
+                    self.draw_minimap()
+        self.screen.set_clip(None)
+
+        with profiler.section("display"):
+            if self.full_redraw:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+        return True
+
+    def draw_minimap(self):
+        simulation = self.simulation
+        units = self.shown_units(simulation.units, self.viewer_faction())
+        self.minimap.update(units, simulation.item_index.cells, faction_of)  # Seules les cases modifiées sont redessinées
+        self.minimap.draw(self.screen, self.minimap_position(), self.camera_x, self.camera_y, self.view_width, self.view_height)
+
+    def draw_map(self):
+        simulation = self.simulation
+        faction = self.viewer_faction()
+        cell_size, view_width, view_height = self.cell_size, self.view_width, self.view_height
+        with profiler.section("terrain"):
+            self.screen.fill((0, 0, 0))
+            self.terrain_layer.draw(self.screen, cell_size, self.camera_x, self.camera_y, view_width, view_height)
+
+        with profiler.section("effects"):
+            self.venom_overlay.draw(self.screen, self.camera_x, self.camera_y, cell_size, view_width, view_height)
+
+        with profiler.section("highlights"):
+            # Dessiner les tuiles accessibles
+            for tile in simulation.accessible_tiles:
+                screen_x = (tile[0] - self.camera_x) * cell_size
+                screen_y = (tile[1] - self.camera_y) * cell_size
+                pygame.draw.rect(self.screen, (0, 255, 0, 100), (screen_x, screen_y, cell_size, cell_size), 2)
+
+            # Dessiner les unités attaquables
+            for tile in simulation.attack_tiles:
+                screen_x = (tile[0] - self.camera_x) * cell_size
+                screen_y = (tile[1] - self.camera_y) * cell_size
+                pygame.draw.rect(self.screen, (255, 0, 0), (screen_x, screen_y, cell_size, cell_size), 2)
+
+            # Dessiner la tuile sélectionnée
+            selected_x = (self.selected_tile[0] - self.camera_x) * cell_size
+            selected_y = (self.selected_tile[1] - self.camera_y) * cell_size
+            pygame.draw.rect(self.screen, (255, 255, 0), (selected_x, selected_y, cell_size, cell_size), 3)
+
+        with profiler.section("entities"):
+            # Seuls les objets et unités dans la vue de la caméra sont dessinés, en un seul appel à blits
+            # Les unités adverses dans le brouillard restent cachées
+            units = self.shown_units(simulation.unit_index.query_viewport(self.camera_x, self.camera_y, view_width, view_height), faction)
+            self.sprites.draw_entities(
+                self.screen,
+                simulation.item_index.query_viewport(self.camera_x, self.camera_y, view_width, view_height),
+                units,
+                self.camera_x, self.camera_y, cell_size
+            )
+
+        with profiler.section("effects"):
+            # 绘制烟雾区域
+            self.smoke_overlay.draw(self.screen, self.camera_x, self.camera_y, cell_size, view_width, view_height)
+
+        if faction:
+            with profiler.section("fog"):
+                self.fog_overlay.draw(self.screen, faction, self.camera_x, self.camera_y, cell_size, view_width, view_height)
+
+    def run(self):
+        running = True
+        logic_time = time.perf_counter()  # Instant prévu de la prochaine étape de logique
+        while running:
+            frame_start = time.perf_counter()
+            with profiler.section("events"):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                        self.drawn = None  # Contenu de la fenêtre perdu : tout redessiner
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        self.toggle_profiler()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                        self.save_game()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                        self.load_game()
+                    elif event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self.zoom(-1)
+                    elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self.zoom(1)
+                    elif event.type == pygame.MOUSEWHEEL and event.y:
+                        self.zoom(-1 if event.y > 0 else 1)
+                    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        self.click(event.pos)
+                    elif event.type == pygame.KEYDOWN and event.key in KEY_COMMANDS:
+                        self.commands.append(KEY_COMMANDS[event.key])
+
+            # Logique à pas fixe (LOGIC_RATE par seconde), quelle que soit la cadence d'affichage
+            steps = 0
+            while logic_time <= frame_start and steps < MAX_LOGIC_STEPS:
+                with profiler.section("logic"):
+                    self.step_logic()
+                logic_time += 1 / LOGIC_RATE
+                steps += 1
+            if logic_time <= frame_start:
+                logic_time = frame_start  # Trop de retard : abandonner les étapes manquées
+
+            drawn = self.draw()
+            if drawn:
+                profiler.record("frame", time.perf_counter() - frame_start)  # Travail de l'image, sans l'attente
+
+            if drawn or self.commands or self.simulation.smokes.expiring or (self.ai and self.ai.thinking):
+                self.clock.tick(FPS)
+            else:
+                # Rien à afficher, à exécuter ni à faire vieillir : dormir jusqu'au prochain événement
+                event = pygame.event.wait(IDLE_TIMEOUT)
+                if event.type != pygame.NOEVENT:
+                    pygame.event.post(event)  # Traité au prochain tour de boucle
+                self.clock.tick()
+                logic_time = time.perf_counter()  # Pas d'étapes à rattraper pour le temps passé à dormir
+
+        if self.recorder:
+            self.recorder.close()
+        if self.ai:
+            self.ai.close()
+        self.simulation.environment.close()
+        if self.profile_path:
+            profiler.export(self.profile_path)
+            print(f"Profile written to {self.profile_path}")
+        pygame.quit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="replay a specific map and item layout")
+    parser.add_argument("--record", metavar="PATH", help="write a replay log of every action")
+    parser.add_argument("--full-redraw", action="store_true", help="redraw and flip the whole screen every frame")
+    parser.add_argument("--profile", metavar="PATH", help="measure frame phases and write p50/p95/p99 to a .csv or .json file on exit")
+    parser.add_argument("--ai", choices=("enemies", "allies", "both", "none"), default="enemies", help="factions played by the computer")
+    parser.add_argument("--ai-budget", type=float, default=1.0, help="AI thinking time per turn, in seconds")
+    parser.add_argument("--map-size", type=int, default=GRID_WIDTH, help="width and height of the map, in tiles")
+    parser.add_argument("--world", type=int, metavar="SIZE", help="play on a SIZE x SIZE world generated in chunks around the units (e.g. 8192)")
+    parser.add_argument("--no-fog", action="store_true", help="show the whole map instead of what the player's units can see")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="play a match on a netplay.py server instead of locally")
+    parser.add_argument("--match", type=int, default=1, help="match to join on the server")
+    parser.add_argument("--faction", choices=("allies", "enemies"), default="allies", help="faction played on the server")
+    parser.add_argument("--no-asset-cache", action="store_true", help="always decode full-size images instead of cached downscaled copies")
+    args = parser.parse_args()
+    if args.connect:
+        import netplay
+        host, port = args.connect.rsplit(":", 1)
+        game = Game(asset_cache=None if args.no_asset_cache else DEFAULT_CACHE_DIR, full_redraw=args.full_redraw,
+                    profile_path=args.profile, ai_factions=(), fog=not args.no_fog,
+                    simulation=netplay.connect(host, int(port), args.match, args.faction), player_faction=args.faction)
+    else:
+        game = Game(seed=args.seed, record_path=args.record, asset_cache=None if args.no_asset_cache else DEFAULT_CACHE_DIR,
+                    full_redraw=args.full_redraw, profile_path=args.profile,
+                    ai_factions={"both": ("allies", "enemies"), "none": ()}.get(args.ai, (args.ai,)), ai_budget=args.ai_budget, fog=not args.no_fog,
+                    map_size=args.world or args.map_size, world=args.world is not None)
+    game.run()
@@ -1,86 +1,123 @@
-import pygame
-from unit import Elf
-
-class Interface:
-    """Class to manage the user interface, including messages and unit statistics."""
-
-    def __init__(self, width):
-        self.width = width
-        self.messages = []
-        self.max_messages = 15  # Increased to display more messages
-
-         # Load icons for units
-        self.unit_icons = {
-             "Elf": pygame.image.load("Elf.png"),  # Replace with actual file paths
-             "Human": pygame.image.load("Human.png"),
-             "Orc": pygame.image.load("Orc.png"),
-             "Dwarf": pygame.image.load("Dwarf.png"),
-             "Goblin": pygame.image.load("Goblin.png"),
-             "Troll": pygame.image.load("Orc.png"),
-         } 
-
-    def add_message(self, message_type, unit_type=None, skill_name=None, value=None):
-        """Adds a new message to the interface based on the action type."""
-        if message_type == "attack":
-            message = f"{unit_type} attacked for {value} damage!"
-        elif message_type == "skill":
-            message = f"{unit_type} used the skill: {skill_name}!"
-        else:
-            return  # Skip adding irrelevant messages like movement
-
-        self.messages.insert(0, message)  # New messages appear at the top
-        if len(self.messages) > self.max_messages:
-            self.messages.pop()
-
-    def draw(self, screen, units):
-        """Draws the interface including messages and unit statistics."""
-        sidebar_x = screen.get_width() - self.width
-
-        # Draw sidebar background with a gradient effect
-        for y in range(screen.get_height()):
-            color = (50 + y // 10, 50 + y // 15, 50 + y // 20)  # Gradient effect
-            pygame.draw.line(screen, color, (sidebar_x, y), (sidebar_x + self.width, y))
-
-        # Draw a title at the top
-        font_title = pygame.font.Font(None, 36)
-        title_surface = font_title.render("Game Interface", True, (255, 255, 255))
-        screen.blit(title_surface, (sidebar_x + 10, 10))
-
-        # Draw a separator below the title
-        pygame.draw.line(screen, (200, 200, 200), (sidebar_x, 50), (sidebar_x + self.width, 50), 2)
-
-        # Draw unit icons and stats at the top
-        y_offset = 60
-        for unit in units:
-            # Draw unit icon
-            if unit.unit_type in self.unit_icons:
-                unit_icon = pygame.transform.scale(self.unit_icons[unit.unit_type], (40, 40))  # Larger icons
-                screen.blit(unit_icon, (sidebar_x + 10, y_offset))
-
-            # Draw health bar
-            pygame.draw.rect(screen, (255, 0, 0), (sidebar_x + 60, y_offset + 10, 150, 15))  # Red bar
-            pygame.draw.rect(screen, (0, 255, 0), (sidebar_x + 60, y_offset + 10, int(150 * (unit.health / 100)), 15))  # Green bar
-
-            # Draw skill points bar below health
-            pygame.draw.rect(screen, (50, 50, 255), (sidebar_x + 60, y_offset + 30, 150, 15))  # Blue bar
-            pygame.draw.rect(screen, (0, 255, 255), (sidebar_x + 60, y_offset + 30, int(150 * (unit.skill_points / unit.max_skill_points)), 15))  # Cyan bar
-
-            y_offset += 60
-
-        # Divider between unit stats and messages
-        pygame.draw.line(screen, (200, 200, 200), (sidebar_x, y_offset), (sidebar_x + self.width, y_offset), 2)
-        y_offset += 10
-
-        # Draw messages
-        font = pygame.font.Font(None, 24)
-        for message in self.messages:
-            text_surface = font.render(message, True, (255, 255, 255))
-            screen.blit(text_surface, (sidebar_x + 10, y_offset))
-            y_offset += 30
-
-        # Final border for aesthetics
-        pygame.draw.rect(screen, (255, 255, 255), (sidebar_x, 0, self.width, screen.get_height()), 2)
-
-    def reset_messages(self):
-        """Clears all messages from the interface."""
-        self.messages = []
+from collections import deque
+import pygame
+from assets import assets
+
+class Interface:
+    """Class to manage the user interface, including messages and unit statistics.
+
+    The sidebar is assembled from cached layers: a pre-rendered background (gradient and title),
+    one stats surface per unit redrawn only when its health or skill points change, and message
+    text rendered once when the message is added.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.max_messages = 15  # Increased to display more messages
+        self.messages = deque(maxlen=self.max_messages)  # Newest first
+        self.message_surfaces = deque(maxlen=self.max_messages)  # Rendered text, same order as messages
+
+        # Fonts are created once
+        self.font_title = pygame.font.Font(None, 36)
+        self.font = pygame.font.Font(None, 24)
+
+        # Icon files for units, loaded on first draw
+        self.icon_files = {
+            "Elf": "Elf.png",
+            "Human": "Human.png",
+            "Orc": "Orc.png",
+            "Dwarf": "Dwarf.png",
+            "Goblin": "Goblin.png",
+            "Troll": "Urukh.png",
+        }
+        self.unit_icons = {}  # unit type -> 40x40 icon
+
+        self.background = None  # Gradient and title, built for the screen height on first draw
+        self.unit_rows = {}  # unit -> ((health, skill points, max skill points), stats surface)
+        self.bottom_margin = 0  # Height kept free at the bottom of the sidebar (minimap)
+
+    def add_message(self, message_type, unit_type=None, skill_name=None, value=None):
+        """Adds a new message to the interface based on the action type."""
+        if message_type == "attack":
+            message = f"{unit_type} attacked for {value} damage!"
+        elif message_type == "skill":
+            message = f"{unit_type} used the skill: {skill_name}!"
+        elif message_type == "defeat":
+            message = f"{unit_type} has been defeated!"
+        elif message_type == "venom":
+            message = f"{unit_type} is in venom! Health -{value}"
+        else:
+            return  # Skip adding irrelevant messages like movement
+
+        # New messages appear at the top; the oldest one falls off the end
+        self.messages.appendleft(message)
+        self.message_surfaces.appendleft(self.font.render(message, True, (255, 255, 255)))
+
+    def build_background(self, height):
+        """Renders the gradient, title and separator once."""
+        background = pygame.Surface((self.width, height))
+        for y in range(height):
+            color = (50 + y // 10, 50 + y // 15, 50 + y // 20)  # Gradient effect
+            pygame.draw.line(background, color, (0, y), (self.width, y))
+
+        title_surface = self.font_title.render("Game Interface", True, (255, 255, 255))
+        background.blit(title_surface, (10, 10))
+        pygame.draw.line(background, (200, 200, 200), (0, 50), (self.width, 50), 2)
+        if pygame.display.get_surface() is not None:
+            background = background.convert()
+        return background
+
+    def get_icon(self, unit_type):
+        if unit_type not in self.unit_icons:
+            self.unit_icons[unit_type] = assets.scaled(self.icon_files[unit_type], (40, 40)) if unit_type in self.icon_files else None
+        return self.unit_icons[unit_type]
+
+    def render_unit_row(self, unit):
+        """Draws a unit's icon, health bar and skill points bar on a transparent surface."""
+        row = pygame.Surface((self.width, 50), pygame.SRCALPHA)
+        unit_icon = self.get_icon(unit.unit_type)
+        if unit_icon:
+            row.blit(unit_icon, (10, 0))
+
+        # Health bar
+        pygame.draw.rect(row, (255, 0, 0), (60, 10, 150, 15))  # Red bar
+        pygame.draw.rect(row, (0, 255, 0), (60, 10, int(150 * (unit.health / 100)), 15))  # Green bar
+
+        # Skill points bar below health
+        pygame.draw.rect(row, (50, 50, 255), (60, 30, 150, 15))  # Blue bar
+        pygame.draw.rect(row, (0, 255, 255), (60, 30, int(150 * (unit.skill_points / unit.max_skill_points)), 15))  # Cyan bar
+        return row
+
+    def draw(self, screen, units):
+        """Draws the interface including messages and unit statistics."""
+        sidebar_x = screen.get_width() - self.width
+
+        if self.background is None or self.background.get_height() != screen.get_height():
+            self.background = self.build_background(screen.get_height())
+        screen.blit(self.background, (sidebar_x, 0))
+
+        # Unit icons and stats at the top, re-rendered only when the values change
+        rows = {}
+        y_offset = 60
+        for unit in units:
+            key = (unit.health, unit.skill_points, unit.max_skill_points)
+            cached = self.unit_rows.get(unit)
+            rows[unit] = cached if cached is not None and cached[0] == key else (key, self.render_unit_row(unit))
+            screen.blit(rows[unit][1], (sidebar_x, y_offset))
+            y_offset += 60
+        self.unit_rows = rows  # Forget units that left the list
+
+        # Divider between unit stats and messages
+        pygame.draw.line(screen, (200, 200, 200), (sidebar_x, y_offset), (sidebar_x + self.width, y_offset), 2)
+        y_offset += 10
+
+        # Draw messages, newest first, as many as fit above the bottom margin
+        fitting = max(0, (screen.get_height() - self.bottom_margin - y_offset) // 30)
+        screen.blits([(surface, (sidebar_x + 10, y_offset + 30 * i)) for i, surface in enumerate(self.message_surfaces) if i < fitting], False)
+
+        # Final border for aesthetics
+        pygame.draw.rect(screen, (255, 255, 255), (sidebar_x, 0, self.width, screen.get_height()), 2)
+
+    def reset_messages(self):
+        """Clears all messages from the interface."""
+        self.messages.clear()
+        self.message_surfaces.clear()
@@ -0,0 +1,111 @@
+import math
+import numpy as np
+import pygame
+from environment import TERRAIN_TEXTURE_KEYS
+from terrain_render import ZOOM_LEVELS, texture_cache
+
+FACTION_COLORS = {"allies": (70, 150, 255), "enemies": (235, 50, 50)}
+ITEM_COLOR = (255, 215, 0)
+VIEW_COLOR = (255, 255, 255)
+OVERVIEW_SAMPLES = 4  # Cases d'aperçu par pixel et par direction, pour un monde qui n'est pas entièrement généré
+
+
+def terrain_colors():
+    """Couleur moyenne de la texture de chaque terrain, indexée par identifiant (noir pour une case vide)."""
+    colors = np.zeros((len(TERRAIN_TEXTURE_KEYS), 3), dtype=np.uint8)
+    for terrain_id, texture_key in enumerate(TERRAIN_TEXTURE_KEYS):
+        if texture_key:
+            colors[terrain_id] = pygame.transform.average_color(texture_cache.get(texture_key, ZOOM_LEVELS[-1]))[:3]
+    return colors
+
+
+class Minimap:
+    """Carte réduite de tout le terrain, avec un marqueur par unité et par case portant des objets.
+
+    Le fond (un bloc de pixels par case, ou un pixel par case réduit si la carte dépasse size) est
+    construit une fois, à partir de environment.terrain_overview() : un monde par blocs en donne un
+    aperçu échantillonné plutôt que de générer toute la carte. Ensuite, update() ne redessine que les
+    cases dont le marqueur a changé : le fond est recopié sous l'ancien marqueur, puis les marqueurs
+    qui le recouvraient sont reposés.
+    """
+    def __init__(self, environment, size):
+        self.environment = environment
+        environment.listeners.append(self)
+        self.scale = min(size / environment.width, size / environment.height)
+        if self.scale >= 1:
+            self.scale = float(int(self.scale))  # Blocs entiers de pixels par case
+        self.rect = pygame.Rect(0, 0, int(environment.width * self.scale), int(environment.height * self.scale))
+        self.item_size = max(2, math.ceil(self.scale))
+        self.unit_size = max(4, math.ceil(self.scale))  # Unités plus visibles que les objets sur les grandes cartes
+        self.colors = None
+        self.base = None     # Terrain seul
+        self.surface = None  # Terrain et marqueurs
+        self.markers = {}    # (x, y) -> (couleur, taille) du marqueur affiché
+
+    def tile_changed(self, x, y):
+        if self.base is not None:
+            self.base.fill(self.colors[self.environment.terrain[y, x]], self._cell_rect(x, y, max(1, math.ceil(self.scale))))
+            self._restore([self._cell_rect(x, y, self.unit_size)])
+
+    def terrain_reset(self):
+        self.base = None
+
+    def _cell_rect(self, x, y, size):
+        return pygame.Rect(int(x * self.scale), int(y * self.scale), size, size)
+
+    def _build(self):
+        if self.colors is None:
+            self.colors = terrain_colors()
+        terrain = self.environment.terrain_overview(self.rect.width * OVERVIEW_SAMPLES, self.rect.height * OVERVIEW_SAMPLES)
+        pixels = self.colors[terrain].transpose(1, 0, 2)  # surfarray attend (x, y)
+        base = pygame.surfarray.make_surface(np.ascontiguousarray(pixels))
+        if self.scale >= 1:
+            base = pygame.transform.scale(base, self.rect.size)
+        else:
+            base = pygame.transform.smoothscale(base, self.rect.size)
+        if pygame.display.get_surface() is not None:
+            base = base.convert()
+        self.base = base
+        self.surface = base.copy()
+        self.markers = {}
+
+    def _restore(self, rects):
+        """Recopie le fond sur les zones données, puis repose les marqueurs qu'elles touchaient."""
+        for rect in rects:
+            self.surface.blit(self.base, rect, rect)
+        for (x, y), (color, size) in self.markers.items():
+            marker = self._cell_rect(x, y, size)
+            if marker.collidelist(rects) != -1:
+                self.surface.fill(color, marker)
+
+    def update(self, units, item_cells, faction_of):
+        """Met à jour les marqueurs ; units ne contient que les unités à montrer (par exemple hors brouillard)."""
+        if self.base is None:
+            self._build()
+        markers = dict.fromkeys(item_cells, (ITEM_COLOR, self.item_size))
+        for unit in units:
+            if unit.health > 0:
+                markers[(unit.x, unit.y)] = (FACTION_COLORS[faction_of(unit)], self.unit_size)
+
+        previous = self.markers
+        self.markers = markers
+        # Un marqueur remplacé par un plus petit doit aussi être effacé
+        removed = [self._cell_rect(*cell, size) for cell, (color, size) in previous.items() if markers.get(cell, (None, 0))[1] < size]
+        if removed:
+            self._restore(removed)
+        for cell, (color, size) in markers.items():
+            if previous.get(cell) != (color, size):
+                self.surface.fill(color, self._cell_rect(*cell, size))
+
+    def cell_at(self, x, y):
+        """Case de la carte sous le point (x, y) de la minimap, ou None."""
+        if not self.rect.collidepoint(x, y):
+            return None
+        return int(x / self.scale), int(y / self.scale)
+
+    def draw(self, screen, position, camera_x, camera_y, view_width, view_height):
+        """Affiche la minimap en position, avec le cadre de la vue de la caméra."""
+        screen.blit(self.surface, position)
+        view = pygame.Rect(int(camera_x * self.scale), int(camera_y * self.scale),
+                           max(2, int(view_width * self.scale)), max(2, int(view_height * self.scale)))
+        pygame.draw.rect(screen, VIEW_COLOR, view.move(position).clip(self.rect.move(position)), 1)
@@ -0,0 +1,536 @@
+"""Parties en réseau : un serveur asyncio fait autorité, les clients affichent un miroir local.
+
+Chaque client rejoint une partie (identifiant de partie, faction). La partie commence quand les deux
+factions ont au moins un joueur ; le serveur envoie alors la graine et la taille de la carte, et chaque
+client génère la même Simulation de départ. Ensuite, seul le joueur dont c'est le tour peut agir :
+le serveur applique l'action (Simulation.apply) puis diffuse à tous les joueurs de la partie un delta
+binaire ne contenant que ce qui a changé (champs modifiés des unités, objets ramassés, fumées et
+venins apparus ou disparus) et les messages de combat de l'action. Un joueur arrivé en cours de partie
+reçoit le delta depuis l'état initial. Les fumées vieillissent sur le serveur au rythme de la logique
+locale (EFFECT_RATE pas par seconde) ; leur disparition est diffusée dans un MSG_TICK.
+
+Trames (petit-boutiste) : longueur du corps (uint16), type de message (uint8), corps.
+
+    python netplay.py serve --port 8765                 # serveur
+    python game.py --connect 127.0.0.1:8765 --match 1 --faction allies
+    python netplay.py bench --matches 200                # serveur et clients robots en boucle locale
+"""
+import argparse
+import asyncio
+import contextlib
+import pickle
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+from simulation import (Simulation, UNIT_TYPES, faction_of, ACTION_MOVE, ACTION_ATTACK, ACTION_SKILL, ACTION_SPECIAL,
+                        ACTION_WAIT)
+from smoke import Smoke
+from venom import Venom
+
+FRAME = struct.Struct("<HB")       # longueur du corps, type de message
+JOIN = struct.Struct("<IB")        # client -> serveur : partie, faction
+ACTION = struct.Struct("<Bhh")     # client -> serveur : action, x, y (codes ACTION_* de simulation.py)
+WELCOME = struct.Struct("<IHHB")   # serveur -> client : graine, largeur, hauteur, faction du joueur
+DELTA = struct.Struct("<IH?HHHHH")  # tour, unité courante, fin de partie, unités modifiées, objets retirés,
+                                    # effets ajoutés, effets retirés, messages
+UNIT_CHANGE = struct.Struct("<HB")     # indice de l'unité, masque des champs modifiés (suivis de leurs valeurs)
+ITEM_REMOVED = struct.Struct("<I")
+EFFECT_ADDED = struct.Struct("<BIhhBf")  # type d'effet, identifiant, x, y, taille, durée
+EFFECT_REMOVED = struct.Struct("<BI")
+MESSAGE = struct.Struct("<BBdB")         # type, unité (indice dans MESSAGE_UNITS), valeur, longueur du nom
+                                         # de compétence (suivi du nom en UTF-8)
+
+MSG_JOIN = 1
+MSG_ACTION = 2
+MSG_WELCOME = 3
+MSG_DELTA = 4
+MSG_REJECT = 5  # L'action n'a pas été appliquée (pas son tour, cible invalide...)
+MSG_TICK = 6    # Delta dû au vieillissement des effets, sans lien avec une action en attente
+
+FACTIONS = ("allies", "enemies")
+PLAYER_ACTIONS = {ACTION_MOVE, ACTION_ATTACK, ACTION_SKILL, ACTION_SPECIAL, ACTION_WAIT}
+UNIT_FIELDS = ("x", "y", "health", "attack_power", "skill_points", "max_skill_points", "weapon", "specials")
+UNIT_FORMATS = ("h", "h", "f", "f", "f", "f", "H", "B")  # weapon : identifiant d'objet + 1 (0 : aucune) ;
+                                                        # specials : SPECIAL_VENOM | SPECIAL_SMOKE déjà utilisés
+SPECIAL_VENOM, SPECIAL_SMOKE = 1, 2
+SMOKE, VENOM = 0, 1
+MESSAGE_TYPES = ("attack", "skill", "defeat", "venom")  # Types de Simulation.add_message
+MESSAGE_UNITS = tuple(UNIT_TYPES) + ("Game",)
+EFFECT_RATE = 30  # Pas de vieillissement par seconde, comme game.LOGIC_RATE
+
+# État diffusé d'une partie : tout ce qu'un client ne peut pas recalculer seul
+MatchState = namedtuple("MatchState", "turn current game_over units items effects")
+
+
+@lru_cache(maxsize=None)
+def unit_layout(mask):
+    """Struct des valeurs des champs présents dans le masque, dans l'ordre de UNIT_FIELDS."""
+    return struct.Struct("<" + "".join(UNIT_FORMATS[bit] for bit in range(len(UNIT_FIELDS)) if mask >> bit & 1))
+
+
+def frame(message_type, body=b""):
+    return FRAME.pack(len(body), message_type) + body
+
+
+async def read_message(reader):
+    """Attend une trame complète ; retourne (type, corps). IncompleteReadError si la connexion est fermée."""
+    length, message_type = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return message_type, await reader.readexactly(length)
+
+
+def encode_message(message_type, details):
+    skill_name = details.get("skill_name", "").encode()
+    return MESSAGE.pack(MESSAGE_TYPES.index(message_type), MESSAGE_UNITS.index(details["unit_type"]),
+                        details.get("value") or 0, len(skill_name)) + skill_name
+
+
+def encode_delta(old, new, messages=()):
+    """Corps d'un message MSG_DELTA faisant passer un client de l'état old à l'état new.
+
+    messages sont ceux de Simulation.pop_messages() pour l'action qui a produit new.
+    """
+    units = []
+    for index, (before, after) in enumerate(zip(old.units, new.units)):
+        if before == after:
+            continue
+        mask = 0
+        values = []
+        for bit, (value_before, value_after) in enumerate(zip(before, after)):
+            if value_before != value_after:
+                mask |= 1 << bit
+                values.append(value_after)
+        units.append(UNIT_CHANGE.pack(index, mask) + unit_layout(mask).pack(*values))
+    removed_items = old.items - new.items
+    added = [key for key in new.effects if key not in old.effects]
+    removed = [key for key in old.effects if key not in new.effects]
+    return b"".join([
+        DELTA.pack(new.turn, new.current, new.game_over, len(units), len(removed_items), len(added), len(removed), len(messages)),
+        *units,
+        *(ITEM_REMOVED.pack(item_id) for item_id in sorted(removed_items)),
+        *(EFFECT_ADDED.pack(*key, *new.effects[key]) for key in added),
+        *(EFFECT_REMOVED.pack(*key) for key in removed),
+        *(encode_message(message_type, details) for message_type, details in messages),
+    ])
+
+
+class Match:
+    """Partie tenue par le serveur : simulation de référence, joueurs connectés et dernier état diffusé."""
+    def __init__(self, match_id, width, height):
+        self.match_id = match_id
+        self.simulation = Simulation(width, height, seed=match_id)
+        self.players = {}  # writer -> faction
+        self.started = False
+        # Identifiants stables des objets et des effets, partagés avec les clients
+        self.item_ids = {item: item_id for item_id, item in enumerate(list(self.simulation.weapons) + list(self.simulation.health_potions))}
+        self.effect_ids = {}  # effet -> (type, identifiant)
+        self.initial = self.capture()
+        self.state = self.initial
+
+    def capture(self):
+        simulation = self.simulation
+        effects = {}
+        for kind, layer in ((SMOKE, simulation.smokes), (VENOM, simulation.venoms)):
+            for effect in layer:
+                key = self.effect_ids.get(effect)
+                if key is None:
+                    key = self.effect_ids[effect] = (kind, len(self.effect_ids))
+                effects[key] = (effect.x, effect.y, effect.size, getattr(effect, "duration", 0.0))
+        return MatchState(
+            simulation.turn_counter, simulation.current_unit_index, simulation.game_over,
+            [self.unit_values(unit) for unit in simulation.units],
+            {self.item_ids[item] for item in simulation.item_index},
+            effects,
+        )
+
+    def unit_values(self, unit):
+        """Valeurs de UNIT_FIELDS pour une unité."""
+        weapon = self.item_ids[unit.weapon] + 1 if unit.weapon is not None else 0
+        specials = SPECIAL_VENOM * getattr(unit, "venom_used", False) | SPECIAL_SMOKE * getattr(unit, "smoke_used", False)
+        return (unit.x, unit.y, unit.health, unit.attack_power, unit.skill_points, unit.max_skill_points, weapon, specials)
+
+    def welcome(self, faction):
+        simulation = self.simulation
+        return frame(MSG_WELCOME, WELCOME.pack(self.match_id, simulation.width, simulation.height, FACTIONS.index(faction)))
+
+
+class MatchServer:
+    """Serveur de parties : plusieurs parties simultanées dans un seul processus et une seule boucle asyncio."""
+    def __init__(self, size=96):
+        self.size = size
+        self.matches = {}      # identifiant -> Match
+        self.server = None
+        self.latencies = []    # Durée de traitement de chaque action (application, delta, diffusion), en secondes
+        self.delta_bytes = []  # Taille de chaque trame de delta
+        self.bytes_sent = 0
+        self.ticker = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Écoute sur host:port (0 : port libre) ; retourne le port réellement utilisé."""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.ticker = asyncio.create_task(self.age_effects())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def age_effects(self):
+        """Fait vieillir les fumées de chaque partie EFFECT_RATE fois par seconde, comme Game.step_logic.
+
+        Seules les parties ayant des fumées à durée finie sont concernées ; un delta (MSG_TICK) n'est
+        diffusé que si des effets ont disparu.
+        """
+        loop = asyncio.get_running_loop()
+        next_step = loop.time()
+        while True:
+            next_step += 1 / EFFECT_RATE
+            await asyncio.sleep(max(0.0, next_step - loop.time()))
+            for match in list(self.matches.values()):
+                simulation = match.simulation
+                if match.started and simulation.smokes.expiring:
+                    smokes = len(simulation.smokes)
+                    simulation.update_effects()
+                    if len(simulation.smokes) != smokes:
+                        self.broadcast(match, MSG_TICK)
+
+    async def handle(self, reader, writer):
+        match = None
+        faction = None
+        try:
+            while True:
+                message_type, body = await read_message(reader)
+                if message_type == MSG_JOIN and match is None:
+                    if len(body) != JOIN.size or body[-1] >= len(FACTIONS):
+                        writer.write(frame(MSG_REJECT))  # Trame mal formée ou faction inconnue
+                        continue
+                    match_id, faction_code = JOIN.unpack(body)
+                    faction = FACTIONS[faction_code]
+                    match = self.join(match_id, writer, faction)
+                elif message_type == MSG_ACTION and match is not None:
+                    if len(body) != ACTION.size:
+                        writer.write(frame(MSG_REJECT))
+                        continue
+                    self.play(match, writer, faction, *ACTION.unpack(body))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Client parti
+        finally:
+            if match is not None:
+                del match.players[writer]
+                if not match.players:
+                    del self.matches[match.match_id]
+            writer.close()
+
+    def join(self, match_id, writer, faction):
+        match = self.matches.get(match_id)
+        if match is None:
+            match = self.matches[match_id] = Match(match_id, self.size, self.size)
+        match.players[writer] = faction
+        if match.started:
+            # Arrivée en cours de partie : tout ce qui a changé depuis l'état initial
+            writer.write(match.welcome(faction) + frame(MSG_DELTA, encode_delta(match.initial, match.state)))
+        elif set(match.players.values()) == set(FACTIONS):
+            match.started = True
+            for player, player_faction in match.players.items():
+                player.write(match.welcome(player_faction))
+        return match
+
+    def play(self, match, writer, faction, action, x, y):
+        """Applique l'action d'un joueur et diffuse le delta, ou la refuse."""
+        start = time.perf_counter()
+        simulation = match.simulation
+        if (not match.started or simulation.game_over or action not in PLAYER_ACTIONS
+                or faction_of(simulation.current_unit) != faction):
+            writer.write(frame(MSG_REJECT))
+            return
+        applied = simulation.apply(action, x, y)
+        if not applied:
+            simulation.pop_messages()
+            writer.write(frame(MSG_REJECT))
+            return
+        simulation.sync_skill_points()  # Points de compétence diffusés tels qu'affichés
+        message = self.broadcast(match, MSG_DELTA, simulation.pop_messages())
+        self.latencies.append(time.perf_counter() - start)
+        self.delta_bytes.append(len(message))
+
+    def broadcast(self, match, message_type, messages=()):
+        """Envoie à tous les joueurs de la partie le delta depuis le dernier état diffusé ; retourne la trame."""
+        state = match.capture()
+        message = frame(message_type, encode_delta(match.state, state, messages))
+        match.state = state
+        for player in match.players:
+            player.write(message)
+        self.bytes_sent += len(message) * len(match.players)
+        return message
+
+    def close(self):
+        if self.ticker:
+            self.ticker.cancel()
+        if self.server:
+            self.server.close()
+
+
+class RemoteSimulation(Simulation):
+    """Miroir local d'une partie jouée sur le serveur.
+
+    S'utilise comme une Simulation (par Game ou par un robot) : les actions sont envoyées au serveur au
+    lieu d'être appliquées, et l'état n'évolue qu'en appliquant les deltas reçus, dans sync() (appelé
+    par update_effects à chaque étape de logique). Une action à la fois : waiting est vrai tant que
+    le serveur n'a pas répondu.
+    """
+    def __init__(self, width, height, seed, faction, send):
+        super().__init__(width, height, seed=seed)
+        self.faction = faction
+        self.send = send
+        self.items = list(self.weapons) + list(self.health_potions)  # identifiant -> objet, comme sur le serveur
+        self.effects = {}  # (type, identifiant) -> effet
+        self.inbox = queue.SimpleQueue()  # (type, corps) reçus, éventuellement depuis un autre fil
+        self.waiting = False
+
+    def my_turn(self):
+        return not self.game_over and not self.waiting and faction_of(self.current_unit) == self.faction
+
+    def _send(self, action, x=0, y=0):
+        if not self.my_turn():
+            return False
+        self.waiting = True
+        self.send(action, x, y)
+        return True
+
+    def move(self, x, y):
+        return self._send(ACTION_MOVE, x, y)
+
+    def attack(self, x, y):
+        return self._send(ACTION_ATTACK, x, y)
+
+    def use_skill(self, skill_number):
+        return self._send(ACTION_SKILL, skill_number)
+
+    def use_special(self):
+        return self._send(ACTION_SPECIAL)
+
+    def wait(self):
+        return self._send(ACTION_WAIT)
+
+    def update_effects(self):
+        self.sync()  # Les effets vieillissent sur le serveur (MatchServer.age_effects)
+
+    def sync(self):
+        """Applique les messages reçus depuis le dernier appel."""
+        while True:
+            try:
+                message_type, body = self.inbox.get_nowait()
+            except queue.Empty:
+                return
+            if message_type in (MSG_DELTA, MSG_TICK):
+                self.apply_delta(body)
+            if message_type in (MSG_DELTA, MSG_REJECT):
+                self.waiting = False
+
+    def apply_delta(self, body):
+        turn, current, game_over, unit_count, item_count, added_count, removed_count, message_count = DELTA.unpack_from(body)
+        offset = DELTA.size
+        for _ in range(unit_count):
+            index, mask = UNIT_CHANGE.unpack_from(body, offset)
+            layout = unit_layout(mask)
+            values = iter(layout.unpack_from(body, offset + UNIT_CHANGE.size))
+            offset += UNIT_CHANGE.size + layout.size
+            unit = self.units[index]
+            for bit, field in enumerate(UNIT_FIELDS):
+                if not mask >> bit & 1:
+                    continue
+                value = next(values)
+                if field == "weapon":
+                    unit.weapon = self.items[value - 1] if value else None
+                elif field == "specials":
+                    if hasattr(unit, "venom_used"):
+                        unit.venom_used = bool(value & SPECIAL_VENOM)
+                    if hasattr(unit, "smoke_used"):
+                        unit.smoke_used = bool(value & SPECIAL_SMOKE)
+                else:
+                    setattr(unit, field, value)
+            self.unit_index.move(unit)
+        for _ in range(item_count):
+            item = self.items[ITEM_REMOVED.unpack_from(body, offset)[0]]
+            offset += ITEM_REMOVED.size
+            self.weapons.pop(item, None)
+            self.health_potions.pop(item, None)
+            self.item_index.remove(item)
+        for _ in range(added_count):
+            kind, effect_id, x, y, size, duration = EFFECT_ADDED.unpack_from(body, offset)
+            offset += EFFECT_ADDED.size
+            effect = Smoke(x, y, size, duration) if kind == SMOKE else Venom(x, y, size)
+            (self.smokes if kind == SMOKE else self.venoms).add(effect)
+            self.effects[(kind, effect_id)] = effect
+        for _ in range(removed_count):
+            kind, effect_id = EFFECT_REMOVED.unpack_from(body, offset)
+            offset += EFFECT_REMOVED.size
+            (self.smokes if kind == SMOKE else self.venoms).remove(self.effects.pop((kind, effect_id)))
+        for _ in range(message_count):
+            type_code, unit_code, value, name_length = MESSAGE.unpack_from(body, offset)
+            offset += MESSAGE.size
+            message_type = MESSAGE_TYPES[type_code]
+            details = {"unit_type": MESSAGE_UNITS[unit_code]}
+            if name_length:
+                details["skill_name"] = body[offset:offset + name_length].decode()
+                offset += name_length
+            if message_type in ("attack", "venom"):
+                details["value"] = int(value) if value.is_integer() else value
+            self.add_message(message_type, **details)
+
+        self.turn_counter, self.current_unit_index, self.game_over = turn, current, game_over
+        self.version += 1
+        self.calculate_accessible_tiles()
+
+
+class MatchClient:
+    """Connexion d'un joueur au serveur ; simulation est le miroir local, créé à l'arrivée de MSG_WELCOME."""
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.loop = None
+        self.thread = None
+        self.simulation = None
+
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.loop = asyncio.get_running_loop()
+        self.thread = threading.get_ident()
+
+    async def join(self, match_id, faction):
+        """Rejoint la partie et attend son début ; retourne le miroir local."""
+        self.writer.write(frame(MSG_JOIN, JOIN.pack(match_id, FACTIONS.index(faction))))
+        while self.simulation is None:
+            await self.receive()
+        return self.simulation
+
+    def send(self, action, x=0, y=0):
+        """Envoie une action ; utilisable depuis un autre fil que celui de la boucle asyncio."""
+        data = frame(MSG_ACTION, ACTION.pack(action, x, y))
+        if threading.get_ident() == self.thread:
+            self.writer.write(data)
+        else:
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    async def receive(self):
+        """Attend le prochain message et le range dans la boîte du miroir ; retourne son type."""
+        message_type, body = await read_message(self.reader)
+        if message_type == MSG_WELCOME:
+            seed, width, height, faction_code = WELCOME.unpack(body)
+            self.simulation = RemoteSimulation(width, height, seed, FACTIONS[faction_code], self.send)
+        else:
+            self.simulation.inbox.put((message_type, body))
+        return message_type
+
+    async def listen(self):
+        """Reçoit les messages jusqu'à la fermeture de la connexion."""
+        with contextlib.suppress(asyncio.IncompleteReadError, ConnectionError):
+            while True:
+                await self.receive()
+
+    def close(self):
+        self.writer.close()
+
+
+def connect(host, port, match_id, faction):
+    """Rejoint une partie en gardant la connexion dans un fil dédié (pour Game) ; retourne le miroir local."""
+    ready = queue.SimpleQueue()
+
+    async def run():
+        client = MatchClient()
+        await client.connect(host, port)
+        print(f"Joined match {match_id} as {faction}, waiting for the other faction")
+        ready.put(await client.join(match_id, faction))
+        await client.listen()
+        print("Disconnected from server")
+
+    threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+    return ready.get()
+
+
+async def _bot(port, match_id, faction, max_turns, round_trips, barrier):
+    """Joueur robot (politique gloutonne) jouant sa faction jusqu'à la fin de la partie.
+
+    Tous les robots attendent à la barrière que chacun ait généré son miroir avant de jouer :
+    la génération des cartes ne compte pas dans les temps d'aller-retour.
+    """
+    from policies import greedy_action
+    client = MatchClient()
+    await client.connect("127.0.0.1", port)
+    simulation = await client.join(match_id, faction)
+    await barrier.wait()
+    sent = None
+    while not simulation.game_over and simulation.turn_counter < max_turns:
+        if simulation.my_turn():
+            sent = time.perf_counter()
+            greedy_action(simulation)
+        message_type = await client.receive()
+        simulation.sync()
+        simulation.pop_messages()  # Pas d'interface : les messages de combat sont ignorés
+        if message_type == MSG_REJECT:
+            simulation.wait()  # Compétence refusée (pas assez de points, par exemple) : passer le tour
+        elif message_type == MSG_DELTA and sent is not None and not simulation.waiting:
+            round_trips.append(time.perf_counter() - sent)
+            sent = None
+    client.close()
+    return simulation
+
+
+def _percentile(values, percentile):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+async def bench(matches, size, max_turns):
+    """Joue matches parties simultanées entre robots sur la boucle locale et mesure débit et latence."""
+    server = MatchServer(size)
+    port = await server.start("127.0.0.1", 0)
+    round_trips = []
+    barrier = asyncio.Barrier(matches * len(FACTIONS) + 1)
+    bots = asyncio.gather(*(_bot(port, match_id, faction, max_turns, round_trips, barrier)
+                            for match_id in range(matches) for faction in FACTIONS))
+    await barrier.wait()
+    start = time.perf_counter()
+    mirrors = await bots
+    elapsed = time.perf_counter() - start
+    server.close()
+
+    # Référence : état complet compressé, tel qu'une image clé de replay.py, à la fin de chaque partie
+    full_state = sum(len(zlib.compress(pickle.dumps(mirror.get_state(), pickle.HIGHEST_PROTOCOL))) for mirror in mirrors[::2])
+    full_state /= matches
+    turns = len(server.delta_bytes)
+    delta = sum(server.delta_bytes) / turns
+    print(f"{matches} matches, {turns} turns in {elapsed:.2f} s ({turns / elapsed:.0f} turns/s)")
+    print(f"delta per turn: {delta:.1f} bytes per client (full compressed state: {full_state:.0f} bytes, {full_state / delta:.0f}x)")
+    print(f"server bandwidth: {server.bytes_sent / elapsed / 1000:.1f} kB/s to {2 * matches} clients")
+    print(f"server processing: p50 {_percentile(server.latencies, 50) * 1e6:.0f} us, p99 {_percentile(server.latencies, 99) * 1e6:.0f} us")
+    print(f"client round trip: p50 {_percentile(round_trips, 50) * 1000:.2f} ms, p99 {_percentile(round_trips, 99) * 1000:.2f} ms"
+          " (bots share the server's event loop: includes the other bots' thinking time)")
+
+
+async def serve(host, port, size):
+    server = MatchServer(size)
+    port = await server.start(host, port)
+    print(f"Serving {size}x{size} matches on {host}:{port}")
+    await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Authoritative match server and loopback benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run a match server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--size", type=int, default=96)
+    bench_parser = commands.add_parser("bench", help="play many bot matches over loopback and report bandwidth and latency")
+    bench_parser.add_argument("--matches", type=int, default=100)
+    bench_parser.add_argument("--size", type=int, default=96)
+    bench_parser.add_argument("--max-turns", type=int, default=200)
+    args = parser.parse_args()
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, args.size))
+    else:
+        asyncio.run(bench(args.matches, args.size, args.max_turns))
+
+
+if __name__ == "__main__":
+    main()
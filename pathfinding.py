@@ -0,0 +1,80 @@
+from environment import TERRAIN_MOVE_COST, TERRAIN_OBSTACLE
+
+NEIGHBOURS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+class Reachability:
+    """Résultat d'un calcul d'accessibilité : coûts, prédécesseurs et cibles adjacentes."""
+    def __init__(self, origin, costs, previous, targets):
+        self.origin = origin
+        self.costs = costs          # (x, y) -> coût minimal depuis l'origine
+        self.previous = previous    # (x, y) -> case précédente sur le chemin le moins cher
+        self.targets = targets      # cases occupées adjacentes à une case accessible
+        self.reachable = set(costs)
+
+    def __contains__(self, cell):
+        return cell in self.costs
+
+    def path_to(self, cell):
+        """Retourne le chemin de l'origine jusqu'à la case, ou None si elle est inaccessible."""
+        if cell not in self.costs:
+            return None
+        path = [cell]
+        while cell != self.origin:
+            cell = self.previous[cell]
+            path.append(cell)
+        path.reverse()
+        return path
+
+
+def compute_reachable(environment, origin, budget, occupied=()):
+    """Dijkstra à seaux (algorithme de Dial) borné par le budget de déplacement.
+
+    Les coûts de terrain viennent de TERRAIN_MOVE_COST ; les obstacles et les cases
+    occupées ne sont pas traversables. Les coûts étant >= 1, seules les cases à une
+    distance de Manhattan <= budget sont examinées.
+    """
+    origin_x, origin_y = origin
+    x_start = max(0, origin_x - budget)
+    y_start = max(0, origin_y - budget)
+    x_end = min(environment.width, origin_x + budget + 1)
+    y_end = min(environment.height, origin_y + budget + 1)
+
+    # Fenêtre locale convertie une seule fois en listes Python : 0 signifie infranchissable
+    window_ids = environment.terrain[y_start:y_end, x_start:x_end]
+    window = (TERRAIN_MOVE_COST[window_ids] * ~TERRAIN_OBSTACLE[window_ids]).tolist()
+    width = x_end - x_start
+    height = y_end - y_start
+
+    occupied = set(occupied)
+    occupied.discard(origin)
+    costs = {origin: 0}
+    previous = {}
+    targets = set()
+    buckets = [[] for _ in range(budget + 1)]
+    buckets[0].append(origin)
+
+    for cost in range(budget + 1):
+        for cell in buckets[cost]:
+            if costs[cell] != cost:
+                continue  # Entrée périmée, la case a été atteinte moins cher entre-temps
+            x, y = cell
+            for dx, dy in NEIGHBOURS:
+                nx, ny = x + dx, y + dy
+                local_x, local_y = nx - x_start, ny - y_start
+                if not (0 <= local_x < width and 0 <= local_y < height):
+                    continue
+                neighbour = (nx, ny)
+                if neighbour in occupied:
+                    targets.add(neighbour)
+                    continue
+                step = window[local_y][local_x]
+                if not step:
+                    continue
+                new_cost = cost + step
+                if new_cost <= budget and new_cost < costs.get(neighbour, budget + 1):
+                    costs[neighbour] = new_cost
+                    previous[neighbour] = cell
+                    buckets[new_cost].append(neighbour)
+
+    return Reachability(origin, costs, previous, targets)
@@ -0,0 +1,38 @@
+from simulation import ALLY_TYPES
+
+
+def is_enemy(unit, other):
+    return isinstance(unit, ALLY_TYPES) != isinstance(other, ALLY_TYPES)
+
+
+def greedy_action(simulation):
+    """Joue un coup simple pour l'unité courante et renvoie son nom.
+
+    Attaque un ennemi vivant à portée, sinon se rapproche de l'ennemi le plus proche
+    grâce au champ de distances de la faction, sinon utilise la meilleure compétence
+    disponible, sinon passe le tour.
+    """
+    unit = simulation.current_unit
+    if unit.health <= 0:
+        simulation.wait()
+        return "wait"
+
+    for x, y in sorted(simulation.attack_tiles):
+        target = simulation.get_unit_at((x, y))
+        if target.health > 0 and is_enemy(unit, target):
+            simulation.attack(x, y)
+            return "attack"
+
+    field = simulation.flow_field_toward("enemies" if isinstance(unit, ALLY_TYPES) else "allies")
+    here = field.distance_at(unit.x, unit.y)
+    best = min(simulation.accessible_tiles, key=lambda cell: (field.distance_at(*cell), cell))
+    if field.distance_at(*best) < here:
+        simulation.move(*best)
+        return "move"
+
+    for skill_number in (3, 2, 1):
+        if simulation.use_skill(skill_number):
+            return "skill"
+
+    simulation.wait()
+    return "wait"
@@ -0,0 +1,128 @@
+"""Mesure du temps passé dans chaque phase d'une image ou d'un tour.
+
+Désactivé par défaut : chaque point de mesure ne coûte alors qu'un test de booléen.
+
+    with profiler.section("input"):
+        ...
+
+    @profiler.timed("end_turn")
+    def end_turn(self): ...
+
+Les durées sont gardées sur une fenêtre glissante (WINDOW dernières mesures par phase) pour
+calculer p50/p95/p99 ; export() écrit le résumé en CSV ou en JSON selon l'extension.
+"""
+import csv
+import json
+import time
+from collections import deque
+from functools import wraps
+
+WINDOW = 1000
+PERCENTILES = (50, 95, 99)
+
+
+class _Section:
+    """Chronomètre une phase ; un seul objet réutilisé par nom de phase."""
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.samples.append(time.perf_counter() - self.start)
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SECTION = _NullSection()
+
+
+class Profiler:
+    """Durées récentes de chaque phase nommée, en secondes."""
+    def __init__(self, window=WINDOW):
+        self.enabled = False
+        self.window = window
+        self.samples = {}   # nom de phase -> deque des dernières durées
+        self.sections = {}  # nom de phase -> _Section
+
+    def section(self, name):
+        """Gestionnaire de contexte mesurant le bloc sous le nom donné (sans effet si désactivé)."""
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self._samples(name))
+        return section
+
+    def timed(self, name):
+        """Décorateur mesurant chaque appel de la fonction sous le nom donné."""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self._samples(name).append(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        """Ajoute une durée mesurée par ailleurs."""
+        if self.enabled:
+            self._samples(name).append(seconds)
+
+    def _samples(self, name):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        return samples
+
+    def reset(self):
+        self.samples.clear()
+        self.sections.clear()
+
+    def stats(self, name):
+        """Nombre de mesures, moyenne, maximum et percentiles (en millisecondes) d'une phase."""
+        values = sorted(self.samples.get(name, ()))
+        if not values:
+            return None
+        result = {"count": len(values), "mean_ms": sum(values) / len(values) * 1000, "max_ms": values[-1] * 1000}
+        for percentile in PERCENTILES:
+            index = min(len(values) - 1, int(len(values) * percentile / 100))
+            result[f"p{percentile}_ms"] = values[index] * 1000
+        return result
+
+    def report(self):
+        """Statistiques de toutes les phases mesurées, dans l'ordre de première mesure."""
+        return {name: self.stats(name) for name in self.samples if self.samples[name]}
+
+    def export(self, path):
+        """Écrit le rapport dans path, en JSON si l'extension est .json, en CSV sinon."""
+        report = self.report()
+        with open(path, "w", newline="") as file:
+            if path.endswith(".json"):
+                json.dump(report, file, indent=2)
+                return
+            fields = ["count", "mean_ms"] + [f"p{percentile}_ms" for percentile in PERCENTILES] + ["max_ms"]
+            writer = csv.writer(file)
+            writer.writerow(["phase"] + fields)
+            for name, stats in report.items():
+                writer.writerow([name] + [stats["count"]] + [f"{stats[field]:.4f}" for field in fields[1:]])
+
+
+profiler = Profiler()
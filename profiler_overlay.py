@@ -0,0 +1,47 @@
+import time
+import pygame
+from profiler import PERCENTILES
+
+
+class ProfilerOverlay:
+    """Tableau p50/p95/p99 des phases mesurées, affiché en haut à gauche de la vue."""
+    REFRESH = 0.5  # secondes entre deux mises à jour du texte
+    NAME_WIDTH = 170
+    COLUMN_WIDTH = 60
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.font = pygame.font.Font(None, 20)
+        self.surface = None
+        self.updated = 0.0
+
+    @property
+    def rect(self):
+        """Zone de l'écran couverte par le tableau (vide tant qu'il n'a pas été construit)."""
+        return self.surface.get_rect() if self.surface else pygame.Rect(0, 0, 0, 0)
+
+    def update(self):
+        """Reconstruit le texte si la dernière mise à jour est assez ancienne ; retourne True si c'est le cas."""
+        now = time.perf_counter()
+        if self.surface is not None and now - self.updated < self.REFRESH:
+            return False
+        self.updated = now
+
+        rows = [("phase",) + tuple(f"p{percentile}" for percentile in PERCENTILES)]
+        rows += [(name,) + tuple(f"{stats[f'p{percentile}_ms']:.2f}" for percentile in PERCENTILES)
+                 for name, stats in self.profiler.report().items()]
+        self.surface = pygame.Surface((self.NAME_WIDTH + self.COLUMN_WIDTH * len(PERCENTILES) + 12, len(rows) * 16 + 8))
+        self.surface.fill((0, 0, 0))
+        self.surface.set_alpha(200)
+        for i, row in enumerate(rows):
+            y = 4 + 16 * i
+            self.surface.blit(self.font.render(row[0], True, (255, 255, 255)), (6, y))
+            for column, value in enumerate(row[1:], 1):
+                text = self.font.render(value, True, (255, 255, 255))
+                # Valeurs alignées à droite de leur colonne
+                self.surface.blit(text, (6 + self.NAME_WIDTH + self.COLUMN_WIDTH * column - text.get_width(), y))
+        return True
+
+    def draw(self, screen):
+        if self.surface:
+            screen.blit(self.surface, (0, 0))
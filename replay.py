@@ -0,0 +1,135 @@
+import bisect
+import json
+import struct
+import zlib
+from simulation import Simulation, ACTION_TICK
+from world import ChunkedWorld
+
+MAGIC = b"PPRL"
+VERSION = 3  # 2 : ordre des tours par initiative (scheduler.py) ; 3 : images clés en JSON
+HEADER = struct.Struct("<4sHI")   # magic, version, longueur de l'en-tête JSON
+RECORD = struct.Struct("<BIhh")   # action, tour, x, y (9 octets par action)
+BLOB_LENGTH = struct.Struct("<I")
+KEYFRAME = 0                      # Code d'enregistrement suivi d'un état compressé
+MAX_TICKS_PER_RECORD = 32767
+
+
+def encode_keyframe(simulation):
+    """État de get_state() en JSON compressé : un journal ne contient que des données, jamais de code."""
+    return zlib.compress(json.dumps(simulation.get_state(), separators=(",", ":")).encode())
+
+
+def decode_keyframe(blob):
+    state = json.loads(zlib.decompress(blob))
+    version, internal_state, gauss_next = state["rng"]
+    state["rng"] = (version, tuple(internal_state), gauss_next)  # random.setstate exige des tuples
+    return state
+
+
+class ReplayRecorder:
+    """Écrit le journal binaire des actions d'une simulation, avec des images clés périodiques.
+
+    Chaque action appliquée devient un enregistrement de 9 octets étiqueté par son tour.
+    Les pas d'effets (un par image affichée) sont regroupés en un seul enregistrement.
+    Une image clé (état complet compressé) est écrite au départ puis tous les
+    keyframe_interval tours, pour pouvoir sauter directement au tour N.
+    """
+    def __init__(self, simulation, path, keyframe_interval=100):
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.pending_ticks = 0
+        self.tick_turn = 0
+        header = json.dumps({
+            "seed": simulation.seed,
+            "width": simulation.width,
+            "height": simulation.height,
+            "world": isinstance(simulation.environment, ChunkedWorld),
+            "keyframe_interval": keyframe_interval,
+        }).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(header)) + header)
+        self.write_keyframe(simulation)
+        simulation.recorder = self
+
+    def record(self, simulation, action, x, y):
+        if action == ACTION_TICK:
+            if self.pending_ticks and self.tick_turn != simulation.turn_counter:
+                self.flush_ticks()
+            self.tick_turn = simulation.turn_counter
+            self.pending_ticks += 1
+            return
+        self.flush_ticks()
+        self.file.write(RECORD.pack(action, simulation.turn_counter, x, y))
+
+    def flush_ticks(self):
+        while self.pending_ticks:
+            count = min(self.pending_ticks, MAX_TICKS_PER_RECORD)
+            self.file.write(RECORD.pack(ACTION_TICK, self.tick_turn, count, 0))
+            self.pending_ticks -= count
+
+    def turn_ended(self, simulation):
+        if simulation.turn_counter % self.keyframe_interval == 0:
+            self.write_keyframe(simulation)
+
+    def write_keyframe(self, simulation):
+        self.flush_ticks()
+        blob = encode_keyframe(simulation)
+        self.file.write(RECORD.pack(KEYFRAME, simulation.turn_counter, 0, 0) + BLOB_LENGTH.pack(len(blob)) + blob)
+
+    def close(self):
+        self.flush_ticks()
+        self.file.close()
+
+
+class Replay:
+    """Lecture d'un journal écrit par ReplayRecorder."""
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, header_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        offset = HEADER.size
+        self.header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+
+        self.actions = []     # (action, tour, x, y)
+        self.keyframes = []   # (tour, position dans self.actions, état compressé)
+        while offset < len(data):
+            action, turn, x, y = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if action == KEYFRAME:
+                (length,) = BLOB_LENGTH.unpack_from(data, offset)
+                offset += BLOB_LENGTH.size
+                self.keyframes.append((turn, len(self.actions), data[offset:offset + length]))
+                offset += length
+            else:
+                self.actions.append((action, turn, x, y))
+        self.keyframe_turns = [keyframe[0] for keyframe in self.keyframes]
+
+    @property
+    def last_turn(self):
+        turns = [turn for _, turn, _, _ in self.actions[-1:]] + self.keyframe_turns[-1:]
+        return max(turns)
+
+    def simulation_at(self, turn=None):
+        """Reconstruit la partie au début du tour demandé (par défaut, l'état final).
+
+        La reconstruction part de la dernière image clé qui précède ce tour et ne
+        rejoue que les actions suivantes.
+        """
+        index = bisect.bisect_right(self.keyframe_turns, turn if turn is not None else float('inf')) - 1
+        keyframe_turn, position, blob = self.keyframes[max(index, 0)]
+        simulation = Simulation(self.header["width"], self.header["height"], seed=self.header["seed"], num_weapons=0, num_potions=0,
+                                world=self.header.get("world", False))
+        simulation.set_state(decode_keyframe(blob))
+        for action, action_turn, x, y in self.actions[position:]:
+            if turn is not None and action_turn >= turn:
+                break
+            if action == ACTION_TICK:
+                for _ in range(x):
+                    simulation.update_effects()
+            else:
+                simulation.apply(action, x, y)
+        return simulation
@@ -0,0 +1,72 @@
+import heapq
+
+# Unités de temps d'initiative : divisible par toutes les vitesses de 1 à 16
+TIME_SCALE = 720720
+REGEN_INTERVAL = 3     # Tours entre deux régénérations de points de compétence
+REGEN_AMOUNT = 0.5
+
+
+class TurnScheduler:
+    """Ordre des tours par initiative : une unité de vitesse v joue toutes les TIME_SCALE / v unités de temps.
+
+    La file de priorité contient une entrée (prochain instant, indice de l'unité) par unité vivante.
+    Les unités mortes ne sont retirées qu'au moment où elles arrivent en tête de file, et la
+    régénération des points de compétence n'est appliquée à une unité que lorsqu'elle joue
+    (ou sur demande, avec sync) : avancer d'un tour coûte O(log n).
+    """
+    def __init__(self, speeds):
+        self.time = 0
+        self.queue = [(self.interval(speed), index) for index, speed in enumerate(speeds)]
+        heapq.heapify(self.queue)
+        self.synced = [0] * len(speeds)  # Nombre de régénérations déjà appliquées à chaque unité
+
+    @staticmethod
+    def interval(speed):
+        return TIME_SCALE // max(1, speed)
+
+    def next(self, units):
+        """Retire de la file la prochaine unité vivante et la replanifie ; None s'il n'en reste aucune."""
+        queue = self.queue
+        while queue:
+            time, index = queue[0]
+            unit = units[index]
+            if unit.health <= 0:
+                heapq.heappop(queue)  # Unité morte : elle ne rejouera plus
+                continue
+            self.time = time
+            heapq.heapreplace(queue, (time + self.interval(unit.speed), index))
+            return index
+        return None
+
+    def sync(self, units, index, turn_counter):
+        """Applique à l'unité les régénérations écoulées depuis sa dernière mise à jour."""
+        regenerations = turn_counter // REGEN_INTERVAL
+        pending = regenerations - self.synced[index]
+        if pending > 0:
+            unit = units[index]
+            if unit.skill_points < unit.max_skill_points:
+                unit.skill_points = min(float(unit.max_skill_points), unit.skill_points + REGEN_AMOUNT * pending)
+            self.synced[index] = regenerations
+
+    def sync_all(self, units, turn_counter):
+        for index in range(len(units)):
+            self.sync(units, index, turn_counter)
+
+    def copy(self):
+        clone = object.__new__(TurnScheduler)
+        clone.time = self.time
+        clone.queue = list(self.queue)
+        clone.synced = list(self.synced)
+        return clone
+
+    def get_state(self):
+        return {"time": self.time, "queue": list(self.queue), "synced": list(self.synced)}
+
+    @classmethod
+    def from_state(cls, state):
+        scheduler = object.__new__(cls)
+        scheduler.time = state["time"]
+        scheduler.queue = [tuple(entry) for entry in state["queue"]]
+        heapq.heapify(scheduler.queue)
+        scheduler.synced = list(state["synced"])
+        return scheduler
@@ -0,0 +1,469 @@
+import random
+import numpy as np
+from environment import Environment
+from unit import Elf, Human, Orc, Dwarf, Goblin, Troll, Weapon, HealthPotion
+from smoke import Smoke
+from venom import Venom
+from pathfinding import compute_reachable
+from flowfield import FlowField
+from spatial import SpatialHash
+from effects import EffectLayer
+from profiler import profiler
+from scheduler import TurnScheduler
+from visibility import FogOfWar
+from world import ChunkedWorld
+
+# Factions
+ALLY_TYPES = (Elf, Human, Dwarf)
+ENEMY_TYPES = (Orc, Goblin, Troll)
+UNIT_TYPES = {unit_class.__name__: unit_class for unit_class in ALLY_TYPES + ENEMY_TYPES}
+PREFETCH_RADIUS = 48  # Terrain demandé autour d'une unité qui se déplace (blocs de world.ChunkedWorld)
+FLOW_FIELD_MAX_CELLS = 256 * 256  # Au-delà, les champs de distances ne couvrent que les abords des unités
+FLOW_FIELD_MARGIN = 32            # Cases ajoutées autour des unités par un champ borné
+
+# Codes des actions enregistrées par un recorder (voir replay.py)
+ACTION_MOVE = 1
+ACTION_ATTACK = 2
+ACTION_SKILL = 3
+ACTION_SPECIAL = 4
+ACTION_WAIT = 5
+ACTION_TICK = 6
+
+
+def faction_of(unit):
+    return "allies" if isinstance(unit, ALLY_TYPES) else "enemies"
+
+
+def default_units(width, height):
+    """Armée de départ de la partie standard."""
+    return [
+        Elf(width // 2, height // 2),
+        Human(width // 2 + 3, height // 2 + 3),
+        Orc(width // 2 - 3, height // 2 - 3)
+    ]
+
+
+def deploy_armies(environment, allies, enemies):
+    """Place deux armées (listes de classes d'unités) face à face sur des cases libres et franchissables."""
+    units = []
+    taken = set()
+    for unit_classes, anchor_x in ((allies, environment.width // 4), (enemies, 3 * environment.width // 4)):
+        for unit_class in unit_classes:
+            x, y = free_cell_near(environment, anchor_x, environment.height // 2, taken)
+            taken.add((x, y))
+            units.append(unit_class(x, y))
+    return units
+
+
+def free_cell_near(environment, x, y, taken):
+    """Case franchissable et inoccupée la plus proche de (x, y), en anneaux de distance croissante."""
+    for radius in range(max(environment.width, environment.height)):
+        for dy in range(-radius, radius + 1):
+            for dx in (-radius, radius) if abs(dy) != radius else range(-radius, radius + 1):
+                cell = (x + dx, y + dy)
+                if cell not in taken and not environment.is_obstacle(*cell):
+                    return cell
+    raise ValueError("no free cell left on the map")
+
+
+class Simulation:
+    """Logique complète d'une partie, sans aucune dépendance à pygame.
+
+    Les actions (move, attack, use_skill, use_special) s'appliquent à l'unité courante
+    et renvoient une valeur fausse si elles sont refusées. Les messages destinés à
+    l'interface sont accumulés dans self.messages et récupérés avec pop_messages().
+
+    Tout l'aléatoire (terrain et objets) provient de self.rng, initialisé avec seed :
+    une même graine et les mêmes actions redonnent exactement la même partie.
+
+    Avec world=True, le terrain est un world.ChunkedWorld généré par blocs autour des unités,
+    pour les cartes trop grandes pour tenir en mémoire.
+    """
+    def __init__(self, width=96, height=96, units=None, seed=None, num_weapons=10, num_potions=10, armies=None, environment=None,
+                 world=False):
+        self.width = width
+        self.height = height
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)  # Graine tirée au hasard mais conservée
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.recorder = None  # Reçoit les actions appliquées, pour les rejouer plus tard
+        self.version = 0  # Incrémenté à chaque action : l'affichage n'est refait que s'il a changé
+
+        # Environment setup (un terrain déjà construit, par exemple chargé depuis une sauvegarde, est repris tel quel)
+        terrain_seed = self.rng.getrandbits(64)
+        if environment is None and world:
+            environment = ChunkedWorld(width, height, seed=terrain_seed)
+        elif environment is None:
+            environment = Environment(width, height, seed=terrain_seed)
+            environment.generate_environment()
+        self.environment = environment
+        self.flow_fields = {}  # Créés à la première demande
+
+        # Unités : liste explicite, ou armées (alliés, ennemis) déployées automatiquement
+        if armies is not None:
+            units = deploy_armies(self.environment, *armies)
+        self.units = units if units is not None else default_units(width, height)
+        self.unit_index = SpatialHash()
+        for unit in self.units:
+            self.unit_index.insert(unit)
+        self.scheduler = TurnScheduler([unit.speed for unit in self.units])  # Ordre des tours selon la vitesse
+        self.current_unit_index = self.scheduler.next(self.units)
+        self.turn_counter = 0  # Compteur pour la régénération des points de compétence
+        self.game_over = False
+        self.messages = []
+        self.damage_dealt = {unit: 0 for unit in self.units}
+
+        # Objets et effets (dict utilisés comme ensembles ordonnés : retrait en O(1))
+        self.weapons = {}
+        self.health_potions = {}
+        self.item_index = SpatialHash()  # Armes et potions, indexées par position
+        self.smokes = EffectLayer(width, height, self.environment.raster(np.uint16))  # 存储烟雾区域
+        self.venoms = EffectLayer(width, height, self.environment.raster(np.uint16))  # 初始化毒液区域列表
+
+        # Générer objets
+        self.generate_weapons(num_weapons)
+        self.generate_health_potions(num_potions)
+
+        # Brouillard de guerre, mis à jour à la demande (update_fog)
+        self.fog = FogOfWar(self.environment, self.smokes, faction_of)
+        self.fog_version = None
+
+        self.reachability = None
+        self.accessible_tiles = set()  # Tuiles accessibles
+        self.attack_tiles = set()  # Unités adjacentes à une tuile accessible
+        self.calculate_accessible_tiles()
+
+    @property
+    def current_unit(self):
+        return self.units[self.current_unit_index]
+
+    def record(self, action, x=0, y=0):
+        if action != ACTION_TICK:
+            self.version += 1
+        if self.recorder:
+            self.recorder.record(self, action, x, y)
+
+    def add_message(self, message_type, **details):
+        self.messages.append((message_type, details))
+
+    def pop_messages(self):
+        """Retourne et vide la file des messages destinés à l'interface."""
+        messages, self.messages = self.messages, []
+        return messages
+
+    def generate_weapons(self, num_weapons):
+        for _ in range(num_weapons):
+            while True:
+                x = self.rng.randint(0, self.width - 1)
+                y = self.rng.randint(0, self.height - 1)
+                if not self.environment.is_obstacle(x, y):
+                    weapon = Weapon(x, y)
+                    self.weapons[weapon] = None
+                    self.item_index.insert(weapon)
+                    break
+
+    def generate_health_potions(self, num_potions):
+        for _ in range(num_potions):
+            while True:
+                x = self.rng.randint(0, self.width - 1)
+                y = self.rng.randint(0, self.height - 1)
+                if not self.environment.is_obstacle(x, y):
+                    potion = HealthPotion(x, y)
+                    self.health_potions[potion] = None
+                    self.item_index.insert(potion)
+                    break
+
+    @profiler.timed("calculate_accessible_tiles")
+    def calculate_accessible_tiles(self):
+        """Calcule les tuiles accessibles pour l'unité actuelle."""
+        current_unit = self.current_unit
+        occupied = [(unit.x, unit.y) for unit in self.units if unit is not current_unit]
+        self.reachability = compute_reachable(self.environment, (current_unit.x, current_unit.y), current_unit.speed, occupied)
+        self.accessible_tiles = self.reachability.reachable
+        self.attack_tiles = self.reachability.targets
+
+    def use_special(self):
+        """Compétence spéciale à usage unique : venin pour l'Elf, fumée pour l'Human."""
+        if self.game_over:
+            return False
+        current_unit = self.current_unit
+
+        # 毒液技能
+        if isinstance(current_unit, Elf) and not current_unit.venom_used:
+            self.venoms.add(Venom(current_unit.x, current_unit.y))
+            current_unit.venom_used = True  # 标记为已使用
+            self.add_message("skill", unit_type=current_unit.unit_type, skill_name="Venom")
+            self.record(ACTION_SPECIAL)
+            return True
+
+        # Human 烟雾技能
+        if isinstance(current_unit, Human) and not current_unit.smoke_used:
+            smoke = Smoke(current_unit.x, current_unit.y, size=7, duration=float('inf'))  # 设置为无限持续时间
+            self.smokes.add(smoke)  # 添加到烟雾列表
+            current_unit.smoke_used = True  # 标记为已使用
+            self.add_message("skill", unit_type=current_unit.unit_type, skill_name="Smoke")
+            self.record(ACTION_SPECIAL)
+            return True
+        return False
+
+    def move(self, x, y):
+        """Déplace l'unité courante le long du chemin le moins coûteux, puis termine le tour."""
+        if self.game_over:
+            return False
+        path = self.reachability.path_to((x, y))
+        if not path:
+            return False
+        current_unit = self.current_unit
+        current_unit.x, current_unit.y = path[-1]
+        self.unit_index.move(current_unit)
+        # Sur un monde par blocs, fait générer en fond le terrain vers lequel l'unité s'approche
+        self.environment.request_region(current_unit.x - PREFETCH_RADIUS, current_unit.y - PREFETCH_RADIUS,
+                                        current_unit.x + PREFETCH_RADIUS + 1, current_unit.y + PREFETCH_RADIUS + 1)
+        self.check_for_item(current_unit)
+        self.record(ACTION_MOVE, x, y)
+        self.end_turn()
+        return True
+
+    def attack(self, x, y):
+        """L'unité courante attaque l'ennemi vivant situé en (x, y), s'il est à portée, puis termine le tour."""
+        if self.game_over or (x, y) not in self.attack_tiles:
+            return False
+        current_unit = self.current_unit
+        target = self.get_unit_at((x, y))
+        if not target or target.health <= 0 or faction_of(target) == faction_of(current_unit):
+            return False
+        health_before = target.health
+        current_unit.attack(target)
+        self.damage_dealt[current_unit] += health_before - target.health
+        self.add_message("attack", unit_type=current_unit.unit_type, value=current_unit.attack_power)
+        if target.health <= 0:
+            self.add_message("defeat", unit_type=target.unit_type)
+        self.check_game_status()
+        self.record(ACTION_ATTACK, x, y)
+        self.end_turn()
+        return True
+
+    def use_skill(self, skill_number):
+        """Utilise une compétence de l'unité courante ; termine le tour en cas de succès."""
+        if self.game_over:
+            return None
+        current_unit = self.current_unit
+        skill_name = current_unit.use_skill(skill_number)
+        if skill_name:
+            self.add_message("skill", unit_type=current_unit.unit_type, skill_name=skill_name)
+            self.record(ACTION_SKILL, skill_number)
+            self.end_turn()
+        return skill_name
+
+    def wait(self):
+        """L'unité courante passe son tour."""
+        if self.game_over:
+            return False
+        self.record(ACTION_WAIT)
+        self.end_turn()
+        return True
+
+    def update_effects(self):
+        """Fait vieillir les fumées d'un pas et retire celles qui sont dissipées."""
+        self.record(ACTION_TICK)
+        for smoke in [smoke for smoke in self.smokes if smoke.duration <= 0]:
+            self.smokes.remove(smoke)
+        for smoke in self.smokes:
+            smoke.duration -= 1
+
+    def check_for_item(self, unit):
+        """Vérifie si une unité est sur une case contenant un objet et applique l'effet."""
+        items = self.item_index.at(unit.x, unit.y)
+        weapon = next((item for item in items if isinstance(item, Weapon)), None)
+        if weapon:
+            unit.pick_up_weapon(weapon)
+            self.add_message("attack", unit_type=unit.unit_type, value=weapon.attack_boost)
+            del self.weapons[weapon]
+            self.item_index.remove(weapon)
+
+        potion = next((item for item in items if isinstance(item, HealthPotion)), None)
+        if potion:
+            unit.health = min(100, unit.health + potion.health_boost)
+            self.add_message("skill", unit_type=unit.unit_type, skill_name="Health Potion")
+            del self.health_potions[potion]
+            self.item_index.remove(potion)
+
+        venom_count = self.venoms.count(unit.x, unit.y)
+        if venom_count:
+            unit.health -= 5 * venom_count  # 每行动一次减少 5 点生命值（每个毒液区域）
+            self.add_message("venom", unit_type=unit.unit_type, value=5 * venom_count)
+
+    def flow_field_toward(self, faction):
+        """Champ de distances vers les unités vivantes d'une faction ("allies" ou "enemies").
+
+        Le champ est partagé par toutes les unités adverses et n'est mis à jour
+        que pour les cibles qui ont bougé depuis la dernière demande.
+        """
+        unit_types = ALLY_TYPES if faction == "allies" else ENEMY_TYPES
+        field = self.flow_fields.get(faction)
+        bounds = self.flow_field_bounds(field)
+        if field is None or field.bounds != bounds:
+            field = self.flow_fields[faction] = FlowField(self.environment, bounds)
+        field.set_targets((unit.x, unit.y) for unit in self.units if isinstance(unit, unit_types) and unit.health > 0)
+        return field
+
+    def flow_field_bounds(self, field=None):
+        """Rectangle (x_start, y_start, x_end, y_end) que doit couvrir un champ de distances.
+
+        Toute la carte si elle a au plus FLOW_FIELD_MAX_CELLS cases. Sinon (monde par blocs), les unités
+        vivantes et FLOW_FIELD_MARGIN cases autour : les bornes de field sont gardées tant qu'aucune unité
+        n'approche de leur bord à moins de la moitié de cette marge.
+        """
+        if self.width * self.height <= FLOW_FIELD_MAX_CELLS:
+            return (0, 0, self.width, self.height)
+        units = [unit for unit in self.units if unit.health > 0] or self.units
+        xs = [unit.x for unit in units]
+        ys = [unit.y for unit in units]
+
+        def around(margin):
+            return (max(0, min(xs) - margin), max(0, min(ys) - margin),
+                    min(self.width, max(xs) + margin + 1), min(self.height, max(ys) + margin + 1))
+
+        if field is not None:
+            x_start, y_start, x_end, y_end = around(FLOW_FIELD_MARGIN // 2)
+            bounds = field.bounds
+            if bounds[0] <= x_start and bounds[1] <= y_start and x_end <= bounds[2] and y_end <= bounds[3]:
+                return bounds
+        return around(FLOW_FIELD_MARGIN)
+
+    def next_step_toward_enemy(self, unit):
+        """Prochaine case d'une unité vers l'ennemi le plus proche, ou None."""
+        faction = "enemies" if isinstance(unit, ALLY_TYPES) else "allies"
+        return self.flow_field_toward(faction).next_step(unit.x, unit.y)
+
+    def get_unit_at(self, position):
+        units = self.unit_index.at(*position)
+        return units[0] if units else None
+
+    @profiler.timed("end_turn")
+    def end_turn(self):
+        """Passe à la prochaine unité vivante dans l'ordre d'initiative (O(log n) en nombre d'unités)."""
+        if self.game_over:
+            return
+
+        self.turn_counter += 1
+        index = self.scheduler.next(self.units)
+        if index is None:
+            self.game_over = True  # Plus aucune unité vivante
+            return
+        self.current_unit_index = index
+        self.scheduler.sync(self.units, index, self.turn_counter)  # Régénération des points de compétence, appliquée en retard
+        self.calculate_accessible_tiles()
+
+        if self.recorder:
+            self.recorder.turn_ended(self)
+
+    def update_fog(self):
+        """Met à jour les champs de vision qui ont changé depuis le dernier appel et retourne le FogOfWar."""
+        version = (self.version, self.smokes.version)
+        if version != self.fog_version:
+            self.fog.update(self.units)
+            self.fog_version = version
+        return self.fog
+
+    def sync_skill_points(self):
+        """Met à jour les points de compétence de toutes les unités, par exemple avant de les afficher."""
+        self.scheduler.sync_all(self.units, self.turn_counter)
+
+    def apply(self, action, x=0, y=0):
+        """Rejoue une action enregistrée."""
+        if action == ACTION_MOVE:
+            return self.move(x, y)
+        if action == ACTION_ATTACK:
+            return self.attack(x, y)
+        if action == ACTION_SKILL:
+            return self.use_skill(x)
+        if action == ACTION_SPECIAL:
+            return self.use_special()
+        if action == ACTION_WAIT:
+            return self.wait()
+        if action == ACTION_TICK:
+            self.update_effects()
+            return True
+        raise ValueError(f"unknown action {action}")
+
+    def get_state(self):
+        """Capture l'état mutable de la partie (le terrain se régénère à partir de la graine)."""
+        def entity_state(entity):
+            state = dict(vars(entity))
+            state["__class__"] = type(entity).__name__
+            return state
+
+        units = []
+        for unit in self.units:
+            state = entity_state(unit)
+            state["weapon"] = entity_state(unit.weapon) if unit.weapon else None
+            units.append(state)
+        return {
+            "units": units,
+            "damage_dealt": [self.damage_dealt[unit] for unit in self.units],
+            "weapons": [entity_state(weapon) for weapon in self.weapons],
+            "health_potions": [entity_state(potion) for potion in self.health_potions],
+            "smokes": [entity_state(smoke) for smoke in self.smokes],
+            "venoms": [entity_state(venom) for venom in self.venoms],
+            "current_unit_index": self.current_unit_index,
+            "turn_counter": self.turn_counter,
+            "scheduler": self.scheduler.get_state(),
+            "game_over": self.game_over,
+            "rng": self.rng.getstate(),
+        }
+
+    def set_state(self, state):
+        """Restaure un état capturé par get_state() sur une simulation de même carte."""
+        classes = dict(UNIT_TYPES, Weapon=Weapon, HealthPotion=HealthPotion, Smoke=Smoke, Venom=Venom)
+
+        def build(entity_state):
+            entity_state = dict(entity_state)
+            entity = object.__new__(classes[entity_state.pop("__class__")])
+            entity.__dict__.update(entity_state)
+            return entity
+
+        self.units = []
+        for unit_state in state["units"]:
+            unit = build(unit_state)
+            if unit.weapon:
+                unit.weapon = build(unit.weapon)
+            self.units.append(unit)
+        self.unit_index = SpatialHash()
+        for unit in self.units:
+            self.unit_index.insert(unit)
+        self.damage_dealt = dict(zip(self.units, state["damage_dealt"]))
+
+        self.weapons = {build(weapon): None for weapon in state["weapons"]}
+        self.health_potions = {build(potion): None for potion in state["health_potions"]}
+        self.item_index = SpatialHash()
+        for item in list(self.weapons) + list(self.health_potions):
+            self.item_index.insert(item)
+        for layer, key in ((self.smokes, "smokes"), (self.venoms, "venoms")):
+            for effect in list(layer):
+                layer.remove(effect)
+            for effect in state[key]:
+                layer.add(build(effect))
+
+        self.current_unit_index = state["current_unit_index"]
+        self.turn_counter = state["turn_counter"]
+        self.scheduler = TurnScheduler.from_state(state["scheduler"])
+        self.game_over = state["game_over"]
+        self.rng.setstate(state["rng"])
+        self.messages = []
+        self.fog.reset()  # Les unités ont été recréées
+        self.version += 1
+        self.calculate_accessible_tiles()
+
+    def check_game_status(self):
+        allies = [unit for unit in self.units if isinstance(unit, ALLY_TYPES)]
+        enemies = [unit for unit in self.units if isinstance(unit, ENEMY_TYPES)]
+
+        if all(unit.health <= 0 for unit in allies):
+            self.add_message("skill", unit_type="Game", skill_name="Defeat")
+            self.game_over = True
+
+        if all(unit.health <= 0 for unit in enemies):
+            self.add_message("skill", unit_type="Game", skill_name="Victory")
+            self.game_over = True
@@ -0,0 +1,224 @@
+"""Versioned binary save files for a Simulation.
+
+Layout (little-endian):
+    header      magic, version, map size, seed, section offsets
+    state       fixed-size records: counters, zones, RNG, units, items, smokes, venoms
+    terrain     raw uint8 terrain ids (height x width), page-aligned so it can be memory-mapped
+"""
+import argparse
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+from environment import Environment
+from simulation import Simulation, UNIT_TYPES
+from scheduler import TurnScheduler
+from unit import Weapon, HealthPotion
+from smoke import Smoke
+from venom import Venom
+
+MAGIC = b"PPSV"
+VERSION = 2  # 2 : file d'initiative et régénérations (scheduler.py)
+PAGE_SIZE = 4096
+
+HEADER = struct.Struct("<4sHHIIqQQQ")   # magic, version, reserved, width, height, seed, state offset/length, terrain offset
+COUNTS = struct.Struct("<IIIIIIiI?q")   # units, items, smokes, venoms, zones, queue entries, current_unit_index, turn_counter,
+                                        # game_over, scheduler time
+ZONE = struct.Struct("<iiii")
+RNG = struct.Struct("<i625I?d")         # version, état de Mersenne Twister, gauss_next
+UNIT = struct.Struct("<BiiddiddBBiiidI")  # classe, x, y, health, attack_power, speed, skill_points, max_skill_points,
+                                           # drapeaux, champs flottants, arme (x, y, bonus), dégâts infligés, régénérations appliquées
+ITEM = struct.Struct("<Biii")             # type, x, y, bonus
+SMOKE = struct.Struct("<iiid")          # x, y, size, duration
+VENOM = struct.Struct("<iii")           # x, y, size
+QUEUE = struct.Struct("<qI")            # file d'initiative : instant, indice de l'unité
+
+UNIT_CLASSES = ("Elf", "Human", "Dwarf", "Orc", "Goblin", "Troll")  # Identifiants stables dans le fichier
+ITEM_WEAPON = 0
+ITEM_POTION = 1
+FLAG_VENOM_USED = 1
+FLAG_SMOKE_USED = 2
+FLAG_WEAPON = 4
+FLOAT_FIELDS = ("health", "attack_power", "skill_points", "max_skill_points")  # int ou float selon l'historique de l'unité
+
+
+def pack_state(simulation):
+    environment = simulation.environment
+    items = [(ITEM_WEAPON, weapon) for weapon in simulation.weapons] + [(ITEM_POTION, potion) for potion in simulation.health_potions]
+    scheduler = simulation.scheduler
+    parts = [COUNTS.pack(len(simulation.units), len(items), len(simulation.smokes), len(simulation.venoms), len(environment.zones),
+                         len(scheduler.queue), simulation.current_unit_index, simulation.turn_counter, simulation.game_over, scheduler.time)]
+
+    for name, bounds in environment.zones.items():
+        encoded = name.encode()
+        parts.append(bytes([len(encoded)]) + encoded + ZONE.pack(*bounds))
+
+    version, internal_state, gauss_next = simulation.rng.getstate()
+    parts.append(RNG.pack(version, *internal_state, gauss_next is not None, gauss_next or 0.0))
+
+    for index, unit in enumerate(simulation.units):
+        weapon = unit.weapon
+        flags = (FLAG_VENOM_USED * getattr(unit, "venom_used", False) | FLAG_SMOKE_USED * getattr(unit, "smoke_used", False)
+                 | FLAG_WEAPON * (weapon is not None))
+        damage = simulation.damage_dealt[unit]
+        floats = sum(1 << bit for bit, value in enumerate([getattr(unit, name) for name in FLOAT_FIELDS] + [damage]) if isinstance(value, float))
+        parts.append(UNIT.pack(UNIT_CLASSES.index(type(unit).__name__), unit.x, unit.y, unit.health, unit.attack_power, unit.speed,
+                               unit.skill_points, unit.max_skill_points, flags, floats, weapon.x if weapon else 0, weapon.y if weapon else 0,
+                               weapon.attack_boost if weapon else 0, damage, scheduler.synced[index]))
+    for kind, item in items:
+        parts.append(ITEM.pack(kind, item.x, item.y, item.attack_boost if kind == ITEM_WEAPON else item.health_boost))
+    for smoke in simulation.smokes:
+        parts.append(SMOKE.pack(smoke.x, smoke.y, smoke.size, smoke.duration))
+    for venom in simulation.venoms:
+        parts.append(VENOM.pack(venom.x, venom.y, venom.size))
+    for time, index in scheduler.queue:
+        parts.append(QUEUE.pack(time, index))
+    return b"".join(parts)
+
+
+def save_snapshot(simulation, path):
+    """Écrit l'état complet de la partie dans path.
+
+    Le fichier est écrit à côté puis renommé : path peut être la sauvegarde dont le terrain est
+    encore projeté en mémoire par load_snapshot, qu'il ne faut pas tronquer. Sous Windows, un fichier
+    projeté ne peut pas non plus être remplacé (PermissionError) : charger avec mmap=False une
+    sauvegarde destinée à être réécrite.
+
+    Le terrain est écrit en entier : une partie sur un monde par blocs (world.ChunkedWorld), qui ne
+    tient pas en mémoire, ne peut pas être sauvegardée (ValueError).
+    """
+    if not isinstance(simulation.environment, Environment):
+        raise ValueError("games on a chunked world cannot be saved")
+    state = pack_state(simulation)
+    state_offset = HEADER.size
+    terrain_offset = -(-(state_offset + len(state)) // PAGE_SIZE) * PAGE_SIZE
+    header = HEADER.pack(MAGIC, VERSION, 0, simulation.width, simulation.height, simulation.seed, state_offset, len(state), terrain_offset)
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header)
+            file.write(state)
+            file.write(b"\0" * (terrain_offset - state_offset - len(state)))
+            file.write(np.ascontiguousarray(simulation.environment.terrain, dtype=np.uint8).tobytes())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def load_snapshot(path, mmap=True):
+    """Recrée une Simulation depuis un fichier écrit par save_snapshot.
+
+    Avec mmap=True, le terrain n'est pas lu : il est projeté en mémoire (copie à l'écriture),
+    et seules les pages effectivement consultées sont chargées.
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+        magic, version, _, width, height, seed, state_offset, state_length, terrain_offset = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a save file")
+        if version != VERSION:
+            raise ValueError(f"unsupported save version {version}")
+        file.seek(state_offset)
+        state = file.read(state_length)
+        if mmap:
+            terrain = np.memmap(path, dtype=np.uint8, mode="c", offset=terrain_offset, shape=(height, width))
+        else:
+            file.seek(terrain_offset)
+            terrain = np.fromfile(file, dtype=np.uint8, count=width * height).reshape(height, width)
+
+    (num_units, num_items, num_smokes, num_venoms, num_zones, num_queue,
+     current_unit_index, turn_counter, game_over, scheduler_time) = COUNTS.unpack_from(state, 0)
+    offset = COUNTS.size
+
+    zones = {}
+    for _ in range(num_zones):
+        length = state[offset]
+        name = state[offset + 1:offset + 1 + length].decode()
+        offset += 1 + length
+        zones[name] = ZONE.unpack_from(state, offset)
+        offset += ZONE.size
+
+    rng_fields = RNG.unpack_from(state, offset)
+    offset += RNG.size
+    rng_state = (rng_fields[0], tuple(rng_fields[1:626]), rng_fields[627] if rng_fields[626] else None)
+
+    def records(record, count):
+        nonlocal offset
+        end = offset + record.size * count
+        values = list(record.iter_unpack(state[offset:end]))
+        offset = end
+        return values
+
+    units = []
+    damage_dealt = []
+    synced = []
+    for (class_id, x, y, health, attack_power, speed, skill_points, max_skill_points, flags, floats,
+         weapon_x, weapon_y, weapon_boost, damage, regenerations) in records(UNIT, num_units):
+        unit = UNIT_TYPES[UNIT_CLASSES[class_id]](x, y)
+        for bit, (name, value) in enumerate(zip(FLOAT_FIELDS, (health, attack_power, skill_points, max_skill_points))):
+            setattr(unit, name, value if floats >> bit & 1 else int(value))
+        unit.speed = speed
+        if hasattr(unit, "venom_used"):
+            unit.venom_used = bool(flags & FLAG_VENOM_USED)
+        if hasattr(unit, "smoke_used"):
+            unit.smoke_used = bool(flags & FLAG_SMOKE_USED)
+        if flags & FLAG_WEAPON:
+            unit.weapon = Weapon(weapon_x, weapon_y, weapon_boost)
+        units.append(unit)
+        damage_dealt.append(damage if floats >> len(FLOAT_FIELDS) & 1 else int(damage))
+        synced.append(regenerations)
+    items = records(ITEM, num_items)
+    smokes = records(SMOKE, num_smokes)
+    venoms = records(VENOM, num_venoms)
+    queue = records(QUEUE, num_queue)
+
+    environment = Environment(width, height, seed=None)
+    environment.set_terrain(terrain, zones)
+    simulation = Simulation(width, height, units=units, seed=seed, num_weapons=0, num_potions=0, environment=environment)
+    simulation.damage_dealt = dict(zip(units, damage_dealt))
+    for kind, x, y, boost in items:
+        item = Weapon(x, y, boost) if kind == ITEM_WEAPON else HealthPotion(x, y, boost)
+        (simulation.weapons if kind == ITEM_WEAPON else simulation.health_potions)[item] = None
+        simulation.item_index.insert(item)
+    for x, y, size, duration in smokes:
+        simulation.smokes.add(Smoke(x, y, size, duration))
+    for x, y, size in venoms:
+        simulation.venoms.add(Venom(x, y, size))
+    simulation.scheduler = TurnScheduler.from_state({"time": scheduler_time, "queue": queue, "synced": synced})
+    simulation.current_unit_index = current_unit_index
+    simulation.turn_counter = turn_counter
+    simulation.game_over = game_over
+    simulation.rng.setstate(rng_state)
+    simulation.calculate_accessible_tiles()
+    return simulation
+
+
+def benchmark(size, repeat):
+    """Mesure le débit d'écriture et de lecture d'une sauvegarde de taille size x size."""
+    simulation = Simulation(size, size, seed=1, num_weapons=1000, num_potions=1000)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sav")
+        timings = {"save": [], "load (mmap)": [], "load (read)": []}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            save_snapshot(simulation, path)
+            timings["save"].append(time.perf_counter() - start)
+            for label, mmap in (("load (mmap)", True), ("load (read)", False)):
+                start = time.perf_counter()
+                load_snapshot(path, mmap=mmap)
+                timings[label].append(time.perf_counter() - start)
+        file_size = os.path.getsize(path)
+    print(f"{size}x{size} map, {file_size / 1e6:.1f} MB file")
+    for label, values in timings.items():
+        best = min(values)
+        print(f"{label:12} {best * 1000:8.2f} ms  {file_size / best / 1e6:10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark save/load throughput")
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.size, args.repeat)
@@ -0,0 +1,79 @@
+class SpatialHash:
+    """Index spatial par seaux de grille pour les entités ayant des attributs x et y.
+
+    Chaque entité est rangée à la fois par case (recherche ponctuelle en O(1)) et par
+    seau de bucket_size x bucket_size cases (requêtes rectangulaires et circulaires).
+    L'index doit être prévenu des déplacements via move().
+    """
+    def __init__(self, bucket_size=8):
+        self.bucket_size = bucket_size
+        self.cells = {}      # (x, y) -> liste des entités sur la case, dans l'ordre d'insertion
+        self.buckets = {}    # (bx, by) -> ensemble des cases occupées du seau
+        self.positions = {}  # entité -> (x, y) enregistrée
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, entity):
+        return entity in self.positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def _bucket(self, x, y):
+        return x // self.bucket_size, y // self.bucket_size
+
+    def insert(self, entity):
+        position = (entity.x, entity.y)
+        self.positions[entity] = position
+        entities = self.cells.get(position)
+        if entities is None:
+            self.cells[position] = [entity]
+            self.buckets.setdefault(self._bucket(*position), set()).add(position)
+        else:
+            entities.append(entity)
+
+    def remove(self, entity):
+        position = self.positions.pop(entity)
+        entities = self.cells[position]
+        entities.remove(entity)
+        if not entities:
+            del self.cells[position]
+            bucket = self._bucket(*position)
+            self.buckets[bucket].discard(position)
+            if not self.buckets[bucket]:
+                del self.buckets[bucket]
+
+    def move(self, entity):
+        """Met à jour la position d'une entité après modification de ses coordonnées."""
+        if self.positions.get(entity) != (entity.x, entity.y):
+            self.remove(entity)
+            self.insert(entity)
+
+    def at(self, x, y):
+        """Entités présentes sur la case (x, y)."""
+        return self.cells.get((x, y), [])
+
+    def query_rect(self, x_start, y_start, x_end, y_end):
+        """Entités dans le rectangle [x_start, x_end[ x [y_start, y_end[."""
+        found = []
+        bucket_x_start, bucket_y_start = self._bucket(x_start, y_start)
+        bucket_x_end, bucket_y_end = self._bucket(x_end - 1, y_end - 1)
+        for bucket_y in range(bucket_y_start, bucket_y_end + 1):
+            for bucket_x in range(bucket_x_start, bucket_x_end + 1):
+                for position in self.buckets.get((bucket_x, bucket_y), ()):
+                    if x_start <= position[0] < x_end and y_start <= position[1] < y_end:
+                        found.extend(self.cells[position])
+        return found
+
+    def query_radius(self, x, y, radius):
+        """Entités à une distance euclidienne inférieure ou égale à radius de (x, y)."""
+        radius_squared = radius * radius
+        return [
+            entity for entity in self.query_rect(x - radius, y - radius, x + radius + 1, y + radius + 1)
+            if (entity.x - x) ** 2 + (entity.y - y) ** 2 <= radius_squared
+        ]
+
+    def query_viewport(self, camera_x, camera_y, view_width, view_height):
+        """Toutes les entités visibles dans la vue de la caméra."""
+        return self.query_rect(camera_x, camera_y, camera_x + view_width, camera_y + view_height)
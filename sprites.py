@@ -0,0 +1,60 @@
+import pygame
+from assets import assets
+
+
+class SpriteRenderer:
+    """Draws units and items from shared pre-scaled sprites and cached bar and text surfaces."""
+    HEALTH_BAR_HEIGHT = 5
+
+    def __init__(self):
+        self.font = pygame.font.Font(None, 20)
+        self.sprites = {}      # (image path, cell size) -> scaled Surface, or None if the file could not be loaded
+        self.health_bars = {}  # (cell size, green width) -> health bar Surface
+        self.skill_texts = {}  # skill points as displayed ("5", "5.5") -> rendered text
+
+    def get_sprite(self, image_path, cell_size):
+        key = (image_path, cell_size)
+        if key not in self.sprites:
+            self.sprites[key] = assets.scaled(image_path, (cell_size, cell_size))
+        return self.sprites[key]
+
+    def get_health_bar(self, health, cell_size):
+        green_width = max(0, int(cell_size * health / 100))  # Assuming max health is 100 for simplicity
+        key = (cell_size, green_width)
+        bar = self.health_bars.get(key)
+        if bar is None:
+            # Health above 100 (potions) extends past the cell, as before
+            bar = pygame.Surface((max(cell_size, green_width), self.HEALTH_BAR_HEIGHT))
+            pygame.draw.rect(bar, (255, 0, 0), (0, 0, cell_size, self.HEALTH_BAR_HEIGHT))
+            pygame.draw.rect(bar, (0, 255, 0), (0, 0, green_width, self.HEALTH_BAR_HEIGHT))
+            self.health_bars[key] = bar
+        return bar
+
+    def get_skill_text(self, skill_points):
+        label = str(skill_points)
+        text = self.skill_texts.get(label)
+        if text is None:
+            text = self.skill_texts[label] = self.font.render(label, True, (255, 255, 255))
+        return text
+
+    def draw_entities(self, screen, items, units, camera_x, camera_y, cell_size):
+        """Draws the given items, then the units with their health bar and skill points, in one blits call.
+
+        The caller passes only the entities inside the camera view (see SpatialHash.query_viewport).
+        """
+        batch = []
+        for item in items:
+            sprite = self.get_sprite(item.image_path, cell_size)
+            if sprite:
+                batch.append((sprite, ((item.x - camera_x) * cell_size, (item.y - camera_y) * cell_size)))
+
+        for unit in units:
+            screen_x = (unit.x - camera_x) * cell_size
+            screen_y = (unit.y - camera_y) * cell_size
+            sprite = self.get_sprite(unit.image_path, cell_size)
+            if sprite:
+                batch.append((sprite, (screen_x, screen_y)))
+            batch.append((self.get_health_bar(unit.health, cell_size), (screen_x, screen_y - self.HEALTH_BAR_HEIGHT)))
+            batch.append((self.get_skill_text(unit.skill_points), (screen_x + 5, screen_y + cell_size - 20)))
+
+        screen.blits(batch, False)
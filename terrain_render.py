@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import pygame
+from assets import assets
+from environment import TERRAIN_TEXTURE_KEYS
+
+# Fichier source de chaque texture, décodé à la première utilisation
+TEXTURE_FILES = {
+    "swamp": "2.png",
+    "forest": "1.png",
+    "mountain": "3.png",
+    "obstacle": "ob1.png",  # Texture spécifique pour obstacle
+    "plain": "1.png",
+    "river": "7.png",
+    "dead_forest": "6.png",
+    "volcanic": "4.png",
+    "ruins": "5.png",
+}
+
+# Tailles de case des niveaux de zoom, du plus proche au plus éloigné
+ZOOM_LEVELS = (60, 40, 30, 20, 12)
+
+class TextureCache:
+    """Cache LRU des textures redimensionnées, indexé par (clé de texture, taille de case).
+
+    Les tailles de levels forment une chaîne de mipmaps : chaque niveau est réduit depuis le niveau
+    immédiatement supérieur plutôt que depuis l'image source.
+    """
+    def __init__(self, files, levels=ZOOM_LEVELS, max_entries=64):
+        self.files = files
+        self.levels = sorted(levels)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, texture_key, cell_size):
+        """Retourne la texture à la taille demandée, en la redimensionnant au premier accès."""
+        key = (texture_key, cell_size)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        larger = [level for level in self.levels if level > cell_size]
+        if larger:
+            surface = pygame.transform.smoothscale(self.get(texture_key, larger[0]), (cell_size, cell_size))
+        else:
+            surface = assets.scaled(self.files[texture_key], (cell_size, cell_size))
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Vide le cache, par exemple après un changement de mode d'affichage."""
+        self.entries.clear()
+
+    def stats(self):
+        """Retourne les compteurs de succès et d'échecs du cache."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+texture_cache = TextureCache(TEXTURE_FILES)
+
+class TerrainLayer:
+    """Couche de terrain pré-rendue en blocs de CHUNK_SIZE x CHUNK_SIZE tuiles.
+
+    Le cache est borné en pixels plutôt qu'en nombre de blocs : en vue éloignée, les blocs sont plus
+    petits et plus nombreux à l'écran, et doivent tous y tenir pour ne pas être redessinés à chaque image.
+    """
+    CHUNK_SIZE = 16
+
+    def __init__(self, environment, max_pixels=32 * (16 * 60) ** 2):
+        self.environment = environment
+        environment.listeners.append(self)
+        self.max_pixels = max_pixels
+        self.pixels = 0
+        self.chunks = OrderedDict()  # (cell_size, chunk_x, chunk_y) -> Surface
+
+    def tile_changed(self, x, y):
+        """Invalide le bloc contenant la tuile (x, y), pour toutes les tailles de case."""
+        chunk_x, chunk_y = x // self.CHUNK_SIZE, y // self.CHUNK_SIZE
+        for key in [key for key in self.chunks if key[1] == chunk_x and key[2] == chunk_y]:
+            self._forget(key)
+
+    def terrain_reset(self):
+        self.chunks.clear()
+        self.pixels = 0
+
+    def _forget(self, key):
+        width, height = self.chunks.pop(key).get_size()
+        self.pixels -= width * height
+
+    def _render_chunk(self, cell_size, chunk_x, chunk_y):
+        """Dessine toutes les tuiles d'un bloc sur une surface dédiée."""
+        x_start = chunk_x * self.CHUNK_SIZE
+        y_start = chunk_y * self.CHUNK_SIZE
+        x_end = min(x_start + self.CHUNK_SIZE, self.environment.width)
+        y_end = min(y_start + self.CHUNK_SIZE, self.environment.height)
+
+        surface = pygame.Surface(((x_end - x_start) * cell_size, (y_end - y_start) * cell_size))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill((0, 0, 0))
+        # Une seule lecture du terrain par bloc (le terrain d'un monde découpé est assemblé à chaque accès)
+        window = self.environment.terrain[y_start:y_end, x_start:x_end].tolist()
+        for y, row in enumerate(window):
+            for x, terrain_id in enumerate(row):
+                texture_key = TERRAIN_TEXTURE_KEYS[terrain_id]
+                if texture_key:
+                    surface.blit(texture_cache.get(texture_key, cell_size), (x * cell_size, y * cell_size))
+        return surface
+
+    def get_chunk(self, cell_size, chunk_x, chunk_y):
+        """Surface d'un bloc, ou None si son terrain n'est pas encore chargé (il sera dessiné plus tard)."""
+        key = (cell_size, chunk_x, chunk_y)
+        surface = self.chunks.get(key)
+        if surface is None:
+            x_start, y_start = chunk_x * self.CHUNK_SIZE, chunk_y * self.CHUNK_SIZE
+            if not self.environment.request_region(x_start, y_start, x_start + self.CHUNK_SIZE, y_start + self.CHUNK_SIZE):
+                return None
+            surface = self._render_chunk(cell_size, chunk_x, chunk_y)
+            self.chunks[key] = surface
+            self.pixels += surface.get_width() * surface.get_height()
+            while self.pixels > self.max_pixels and len(self.chunks) > 1:
+                self._forget(next(iter(self.chunks)))
+        else:
+            self.chunks.move_to_end(key)
+        return surface
+
+    def draw(self, screen, cell_size, camera_x, camera_y, view_width, view_height):
+        """Blitte uniquement les blocs qui recouvrent la vue de la caméra."""
+        x_end = min(camera_x + view_width, self.environment.width)
+        y_end = min(camera_y + view_height, self.environment.height)
+        if x_end <= camera_x or y_end <= camera_y:
+            return
+
+        previous_clip = screen.get_clip()
+        screen.set_clip(pygame.Rect(0, 0, (x_end - camera_x) * cell_size, (y_end - camera_y) * cell_size).clip(previous_clip))
+        for chunk_y in range(camera_y // self.CHUNK_SIZE, (y_end - 1) // self.CHUNK_SIZE + 1):
+            for chunk_x in range(camera_x // self.CHUNK_SIZE, (x_end - 1) // self.CHUNK_SIZE + 1):
+                surface = self.get_chunk(cell_size, chunk_x, chunk_y)
+                if surface is not None:
+                    screen.blit(
+                        surface,
+                        ((chunk_x * self.CHUNK_SIZE - camera_x) * cell_size, (chunk_y * self.CHUNK_SIZE - camera_y) * cell_size)
+                    )
+        screen.set_clip(previous_clip)
@@ -0,0 +1,100 @@
+import asyncio
+import netplay
+from netplay import FACTIONS, MSG_TICK, MatchClient, MatchServer
+from simulation import faction_of
+from smoke import Smoke
+from unit import Elf, Human
+
+
+async def start_match(server, match_id=1):
+    """Deux clients (un par faction) rejoignent la partie ; retourne les clients, leurs miroirs et leurs écoutes."""
+    port = await server.start()
+    clients = [MatchClient() for _ in FACTIONS]
+    for client in clients:
+        await client.connect("127.0.0.1", port)
+    mirrors = await asyncio.gather(*(client.join(match_id, faction) for client, faction in zip(clients, FACTIONS)))
+    listeners = [asyncio.create_task(client.listen()) for client in clients]
+    return clients, mirrors, listeners
+
+
+async def stop_match(server, clients, listeners):
+    for client in clients:
+        client.close()
+    await asyncio.gather(*listeners)
+    await asyncio.sleep(0.05)  # Laisse les connexions du serveur se terminer
+    server.close()
+
+
+async def wait_until(condition, mirrors, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        for mirror in mirrors:
+            mirror.sync()
+        if condition():
+            return
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_smoke_expires_on_server_and_clients():
+    async def scenario():
+        server = MatchServer(30)
+        clients, mirrors, listeners = await start_match(server)
+        match = server.matches[1]
+        simulation = match.simulation
+        simulation.smokes.add(Smoke(10, 10, size=3, duration=5))
+        server.broadcast(match, MSG_TICK)
+        await wait_until(lambda: all(len(mirror.smokes) == 1 for mirror in mirrors), mirrors)
+        # 5 pas à EFFECT_RATE par seconde : la fumée doit disparaître bien avant le délai
+        await wait_until(lambda: all(len(mirror.smokes) == 0 for mirror in mirrors), mirrors)
+        assert len(simulation.smokes) == 0
+        await stop_match(server, clients, listeners)
+    asyncio.run(scenario())
+
+
+def test_weapon_specials_and_messages_reach_clients():
+    async def scenario():
+        server = MatchServer(30)
+        clients, mirrors, listeners = await start_match(server)
+        match = server.matches[1]
+        simulation = match.simulation
+
+        # Ramassage d'une arme côté serveur : arme, attaque et message diffusés
+        unit_index = 0
+        unit = simulation.units[unit_index]
+        weapon = next(iter(simulation.weapons))
+        unit.x, unit.y = weapon.x, weapon.y
+        simulation.unit_index.move(unit)
+        simulation.check_for_item(unit)
+        server.broadcast(match, MSG_TICK, simulation.pop_messages())
+        await wait_until(lambda: all(mirror.units[unit_index].weapon is not None for mirror in mirrors), mirrors)
+        for mirror in mirrors:
+            assert mirror.units[unit_index].weapon.attack_boost == weapon.attack_boost
+            assert mirror.units[unit_index].attack_power == unit.attack_power
+            assert ("attack", {"unit_type": unit.unit_type, "value": weapon.attack_boost}) in mirror.pop_messages()
+
+        # Compétence spéciale jouée par un client : drapeau et message chez tous les clients
+        while not isinstance(simulation.current_unit, (Elf, Human)):
+            turn = simulation.turn_counter
+            mirrors[FACTIONS.index(faction_of(simulation.current_unit))].wait()
+            await wait_until(lambda: all(mirror.turn_counter > turn for mirror in mirrors), mirrors)
+        special = simulation.current_unit
+        index = simulation.units.index(special)
+        mirrors[FACTIONS.index(faction_of(special))].use_special()
+        flag, name = ("venom_used", "Venom") if isinstance(special, Elf) else ("smoke_used", "Smoke")
+        await wait_until(lambda: all(getattr(mirror.units[index], flag) for mirror in mirrors), mirrors)
+        for mirror in mirrors:
+            assert ("skill", {"unit_type": special.unit_type, "skill_name": name}) in mirror.pop_messages()
+        await stop_match(server, clients, listeners)
+    asyncio.run(scenario())
+
+
+def test_delta_round_trip_preserves_messages():
+    state = netplay.MatchState(1, 0, False, [], set(), {})
+    messages = [("defeat", {"unit_type": "Orc"}), ("venom", {"unit_type": "Elf", "value": 5}),
+                ("skill", {"unit_type": "Game", "skill_name": "Victory"})]
+    body = netplay.encode_delta(state, state, messages)
+    mirror = netplay.RemoteSimulation(30, 30, 1, "allies", lambda *action: None)
+    mirror.apply_delta(body)
+    assert mirror.pop_messages() == messages
@@ -0,0 +1,25 @@
+import sys
+import numpy as np
+import pytest
+from simulation import Simulation
+from snapshot import load_snapshot, save_snapshot
+
+
+@pytest.mark.parametrize("mmap", [
+    False,  # Chargement du jeu (F9)
+    pytest.param(True, marks=pytest.mark.skipif(sys.platform == "win32", reason="un fichier projeté ne peut pas être remplacé")),
+])
+def test_save_over_loaded_snapshot(tmp_path, mmap):
+    """Recharger puis sauvegarder au même endroit (F9 puis F5) ne doit pas tronquer le terrain projeté."""
+    path = str(tmp_path / "savegame.bin")
+    save_snapshot(Simulation(64, 64, seed=3), path)
+    loaded = load_snapshot(path, mmap=mmap)
+    terrain = np.array(loaded.environment.terrain)
+    save_snapshot(loaded, path)
+    save_snapshot(loaded, path)
+    assert np.array_equal(loaded.environment.terrain, terrain)
+    reloaded = load_snapshot(path)
+    assert np.array_equal(reloaded.environment.terrain, terrain)
+    assert reloaded.seed == loaded.seed
+    assert [(unit.x, unit.y, unit.health) for unit in reloaded.units] == [(unit.x, unit.y, unit.health) for unit in loaded.units]
+    assert [name for name in tmp_path.iterdir()] == [tmp_path / "savegame.bin"]
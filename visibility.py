@@ -0,0 +1,170 @@
+import numpy as np
+from environment import TERRAIN_OBSTACLE, TERRAIN_VISIBILITY
+
+BASE_SIGHT = 3       # Portée de vue sur une case de visibilité nulle
+SIGHT_PER_LEVEL = 2  # Portée gagnée par niveau de visibilité de la case occupée (Plain : 4 -> 11 cases)
+
+# Transformations (xx, xy, yx, yy) ramenant chacun des huit octants au premier
+OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+def sight_radius(environment, x, y):
+    """Portée de vue d'une unité en (x, y), selon la visibilité du terrain qu'elle occupe."""
+    return BASE_SIGHT + SIGHT_PER_LEVEL * int(TERRAIN_VISIBILITY[environment.terrain[y, x]])
+
+
+def shadowcast(opaque, width, height, origin_x, origin_y, radius):
+    """Indices plats (y * width + x) des cases visibles depuis l'origine, par ombrage récursif.
+
+    opaque est un bytearray plat : une case non nulle arrête la vue (elle reste elle-même visible).
+    """
+    visible = {origin_y * width + origin_x}
+    radius_squared = radius * radius
+
+    def cast(row, start, end, xx, xy, yx, yy):
+        if start < end:
+            return
+        new_start = start
+        for distance in range(row, radius + 1):
+            dx, dy = -distance - 1, -distance
+            blocked = False
+            while dx <= 0:
+                dx += 1
+                left_slope = (dx - 0.5) / (dy + 0.5)
+                right_slope = (dx + 0.5) / (dy - 0.5)
+                if start < right_slope:
+                    continue
+                if end > left_slope:
+                    break
+                x = origin_x + dx * xx + dy * xy
+                y = origin_y + dx * yx + dy * yy
+                inside = 0 <= x < width and 0 <= y < height
+                index = y * width + x
+                if inside and dx * dx + dy * dy <= radius_squared:
+                    visible.add(index)
+                blocking = not inside or opaque[index]
+                if blocked:
+                    if blocking:
+                        new_start = right_slope
+                    else:
+                        blocked = False
+                        start = new_start
+                elif blocking and distance < radius:
+                    blocked = True
+                    cast(distance + 1, start, left_slope, xx, xy, yx, yy)
+                    new_start = right_slope
+            if blocked:
+                break
+
+    for octant in OCTANTS:
+        cast(1, 1.0, 0.0, *octant)
+    return visible
+
+
+class FogOfWar:
+    """Cases visibles de chaque faction, mises à jour paresseusement.
+
+    Les obstacles (rochers, rivières), les cases de visibilité nulle et les fumées arrêtent la vue.
+    Le champ de vision de chaque unité est calculé dans la fenêtre carrée de sa portée, gardé en cache
+    et recalculé seulement si l'unité a bougé, si sa portée a changé ou si une case bloquante de sa
+    fenêtre a changé. visible[faction] compte, pour chaque case, le nombre d'unités de la faction qui
+    la voient : une case est dans le brouillard si ce compte est nul. Ces comptes sont un raster de
+    l'environnement, stocké par blocs sur un monde par blocs (world.ChunkedRaster).
+    """
+    def __init__(self, environment, smokes, faction_of):
+        self.environment = environment
+        environment.listeners.append(self)
+        self.smokes = smokes
+        self.faction_of = faction_of
+        self.fields = {}    # unité -> (x, y, portée, faction, fenêtre, cases bloquantes, cases vues) de la fenêtre
+        self.visible = {}   # faction -> compte par case (raster uint16)
+        self.versions = {}  # faction -> incrémenté à chaque changement de visible[faction]
+        self.smokes_version = smokes.version
+        self.terrain_dirty = False
+
+    def tile_changed(self, x, y):
+        self.terrain_dirty = True
+
+    def terrain_reset(self):
+        self.reset()
+
+    def reset(self):
+        """Oublie tous les champs de vision (par exemple après un changement complet des unités)."""
+        self.fields.clear()
+        self.visible.clear()
+        for faction in self.versions:
+            self.versions[faction] += 1
+
+    def _opaque(self, window):
+        """Raster booléen des cases bloquantes d'une fenêtre (x_start, y_start, x_end, y_end)."""
+        x_start, y_start, x_end, y_end = window
+        terrain = self.environment.terrain[y_start:y_end, x_start:x_end]
+        smoke = self.smokes.counts[y_start:y_end, x_start:x_end]
+        return (TERRAIN_VISIBILITY[terrain] == 0) | TERRAIN_OBSTACLE[terrain] | (smoke > 0)
+
+    def _refresh_opaque(self):
+        """Oublie les champs de vision dont une case bloquante a changé depuis leur calcul."""
+        if not self.terrain_dirty and self.smokes_version == self.smokes.version:
+            return
+        for unit, (x, y, radius, faction, window, opaque, seen) in list(self.fields.items()):
+            if not np.array_equal(self._opaque(window), opaque):
+                self._drop(unit)
+        self.smokes_version = self.smokes.version
+        self.terrain_dirty = False
+
+    def _counts(self, faction):
+        counts = self.visible.get(faction)
+        if counts is None:
+            counts = self.visible[faction] = self.environment.raster(np.uint16)
+            self.versions.setdefault(faction, 0)
+        return counts
+
+    def _drop(self, unit):
+        x, y, radius, faction, (x_start, y_start, x_end, y_end), opaque, seen = self.fields.pop(unit)
+        self._counts(faction)[y_start:y_end, x_start:x_end] -= seen
+        self.versions[faction] += 1
+
+    def update(self, units):
+        """Recalcule les champs de vision périmés ; les unités mortes ne voient plus rien."""
+        self._refresh_opaque()
+        environment = self.environment
+        living = set()
+        for unit in units:
+            if unit.health <= 0:
+                continue
+            living.add(unit)
+            radius = sight_radius(environment, unit.x, unit.y)
+            field = self.fields.get(unit)
+            if field is not None and field[0] == unit.x and field[1] == unit.y and field[2] == radius:
+                continue
+            if field is not None:
+                self._drop(unit)
+            faction = self.faction_of(unit)
+            window = x_start, y_start, x_end, y_end = (max(0, unit.x - radius), max(0, unit.y - radius),
+                                                       min(environment.width, unit.x + radius + 1),
+                                                       min(environment.height, unit.y + radius + 1))
+            opaque = self._opaque(window)
+            width, height = x_end - x_start, y_end - y_start
+            cells = shadowcast(bytearray(opaque.astype(np.uint8).tobytes()), width, height, unit.x - x_start, unit.y - y_start, radius)
+            seen = np.zeros(width * height, dtype=np.uint16)
+            seen[np.fromiter(cells, dtype=np.intp)] = 1
+            seen = seen.reshape(height, width)
+            self._counts(faction)[y_start:y_end, x_start:x_end] += seen
+            self.versions[faction] += 1
+            self.fields[unit] = (unit.x, unit.y, radius, faction, window, opaque, seen)
+        for unit in [unit for unit in self.fields if unit not in living]:
+            self._drop(unit)
+
+    def version(self, faction):
+        return self.versions.get(faction, 0)
+
+    def is_visible(self, faction, x, y):
+        counts = self.visible.get(faction)
+        return counts is not None and counts[y, x] > 0
+
+    def visible_window(self, faction, x_start, y_start, x_end, y_end):
+        """Raster booléen des cases vues par la faction dans la fenêtre [y_start:y_end, x_start:x_end]."""
+        return self._counts(faction)[y_start:y_end, x_start:x_end] > 0
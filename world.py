@@ -0,0 +1,396 @@
+"""Monde découpé en blocs, généré à la demande, pour les cartes bien plus grandes que 96x96.
+
+Chaque bloc de CHUNK_SIZE x CHUNK_SIZE cases est tiré de façon déterministe à partir de la graine
+du monde et de ses coordonnées de bloc : il peut être oublié puis régénéré à l'identique. Seuls les
+blocs modifiés (set_tile) sont écrits dans le cache disque avant d'être évincés du cache LRU. Ce cache
+appartient à la partie en cours : chaque monde a son propre répertoire, effacé par close().
+
+La génération tourne dans un fil d'exécution de fond : request_region() (appelé par le rendu)
+planifie les blocs autour de la vue et retourne False tant qu'ils ne sont pas prêts, sans bloquer.
+Un accès direct au terrain (is_obstacle, get_zone, terrain[y0:y1, x0:x1]) charge au besoin le bloc
+de façon synchrone, si bien que la logique de jeu voit toujours un terrain complet. Les couches
+qui suivent l'état des cases (effets, brouillard) sont des ChunkedRaster, qui n'allouent que les blocs
+non nuls.
+
+    python game.py --world 8192      # partie sur une carte 8192x8192
+    python world.py --size 8192      # défilement d'une caméra sur une carte 8192x8192
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from environment import EMPTY, GridView, TERRAIN_IDS, TERRAIN_OBSTACLE, ZONE_COMPOSITION
+
+CHUNK_SIZE = 64
+MAX_CHUNKS = 1024     # 1024 blocs de 64 x 64 : 4 Mo de terrain en mémoire
+PREFETCH_MARGIN = 1   # Blocs planifiés au-delà de la région demandée, dans chaque direction
+DEFAULT_CACHE_DIR = ".world_cache"
+
+# Probabilités cumulées de chaque terrain par zone, dans l'ordre de ZONE_COMPOSITION
+ZONE_TERRAIN_IDS = {zone: np.array([TERRAIN_IDS[tile_class] for tile_class in composition], dtype=np.uint8)
+                    for zone, composition in ZONE_COMPOSITION.items()}
+ZONE_CUMULATIVE = {zone: np.cumsum(list(composition.values())) for zone, composition in ZONE_COMPOSITION.items()}
+
+
+def world_zones(width, height):
+    """Zones du monde, disposées comme dans Environment.generate_environment."""
+    return {
+        "elf": (0, 0, width // 2, height // 2),
+        "dwarf": (0, height // 2, width // 2, height),
+        "human": (width // 4, height // 4, 3 * width // 4, 3 * height // 4),
+        "orc": (width // 2, 0, width, height // 2),
+        "troll": (width // 2, height // 2, width, height),
+    }
+
+
+def pick_terrain(draws, zones, ys, xs):
+    """Terrain tiré pour des cases de coordonnées (ys, xs), selon les proportions de leur zone.
+
+    draws (uniformes dans [0, 1)) a la forme de la grille ys x xs ; comme dans generate_environment,
+    la dernière zone déclarée qui couvre une case l'emporte.
+    """
+    terrain = np.full(draws.shape, EMPTY, dtype=np.uint8)
+    for zone_name, (zone_x_start, zone_y_start, zone_x_end, zone_y_end) in zones.items():
+        inside = (ys >= zone_y_start) & (ys < zone_y_end) & (xs >= zone_x_start) & (xs < zone_x_end)
+        if not inside.any():
+            continue
+        terrain_ids = ZONE_TERRAIN_IDS[zone_name]
+        choices = np.minimum(np.searchsorted(ZONE_CUMULATIVE[zone_name], draws[inside], side="right"), len(terrain_ids) - 1)
+        terrain[inside] = terrain_ids[choices]
+    return terrain
+
+
+def generate_chunk(seed, zones, x_start, y_start, x_end, y_end, chunk_x, chunk_y):
+    """Terrain (uint8, hauteur x largeur) d'un bloc, ne dépendant que de la graine et des coordonnées.
+
+    Fonction pure, appelée dans le fil de fond.
+    """
+    rng = np.random.default_rng([seed, chunk_x, chunk_y])
+    draws = rng.random((y_end - y_start, x_end - x_start))
+    return pick_terrain(draws, zones, np.arange(y_start, y_end)[:, None], np.arange(x_start, x_end)[None, :])
+
+
+def chunk_pieces(rows, columns, height, width):
+    """Découpe la fenêtre raster[rows, columns] selon les blocs qu'elle recouvre.
+
+    Retourne la forme de la fenêtre et une liste de (bloc, tranches dans la fenêtre, tranches dans le bloc).
+    """
+    y_start, y_end, _ = rows.indices(height)
+    x_start, x_end, _ = columns.indices(width)
+    shape = (max(0, y_end - y_start), max(0, x_end - x_start))
+    pieces = []
+    if not shape[0] or not shape[1]:
+        return shape, pieces
+    for chunk_y in range(y_start // CHUNK_SIZE, (y_end - 1) // CHUNK_SIZE + 1):
+        top = chunk_y * CHUNK_SIZE
+        y0, y1 = max(y_start, top), min(y_end, top + CHUNK_SIZE)
+        for chunk_x in range(x_start // CHUNK_SIZE, (x_end - 1) // CHUNK_SIZE + 1):
+            left = chunk_x * CHUNK_SIZE
+            x0, x1 = max(x_start, left), min(x_end, left + CHUNK_SIZE)
+            pieces.append(((chunk_x, chunk_y), (slice(y0 - y_start, y1 - y_start), slice(x0 - x_start, x1 - x_start)),
+                           (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))))
+    return shape, pieces
+
+
+class ChunkedTerrain:
+    """Vue du terrain complet indexable comme le tableau Environment.terrain.
+
+    terrain[y, x] retourne un identifiant, terrain[y0:y1, x0:x1] une copie uint8 assemblée à partir
+    des blocs concernés.
+    """
+    def __init__(self, world):
+        self.world = world
+        self.shape = (world.height, world.width)
+        self.dtype = np.dtype(np.uint8)
+
+    def __getitem__(self, key):
+        rows, columns = key
+        if not isinstance(rows, slice):
+            chunk = self.world.get_chunk(columns // CHUNK_SIZE, rows // CHUNK_SIZE)
+            return chunk[rows % CHUNK_SIZE, columns % CHUNK_SIZE]
+
+        shape, pieces = chunk_pieces(rows, columns, self.world.height, self.world.width)
+        window = np.empty(shape, dtype=np.uint8)
+        for (chunk_x, chunk_y), window_area, chunk_area in pieces:
+            window[window_area] = self.world.get_chunk(chunk_x, chunk_y)[chunk_area]
+        return window
+
+
+class ChunkedRaster:
+    """Raster (hauteur x largeur) d'une valeur par case, stocké par blocs alloués à la demande.
+
+    Sert aux couches qui suivent l'état des cases d'un monde par blocs (effets, brouillard) : seuls
+    les blocs non nuls occupent de la mémoire. raster[y, x] et raster[y0:y1, x0:x1] se lisent (copie)
+    et s'écrivent comme un tableau numpy, si bien que raster[y0:y1, x0:x1] += 1 fonctionne.
+    """
+    def __init__(self, width, height, dtype):
+        self.shape = (height, width)
+        self.dtype = np.dtype(dtype)
+        self.chunks = {}  # (chunk_x, chunk_y) -> tableau CHUNK_SIZE x CHUNK_SIZE, jamais entièrement nul
+
+    def __getitem__(self, key):
+        rows, columns = key
+        if not isinstance(rows, slice):
+            chunk = self.chunks.get((columns // CHUNK_SIZE, rows // CHUNK_SIZE))
+            return chunk[rows % CHUNK_SIZE, columns % CHUNK_SIZE] if chunk is not None else self.dtype.type(0)
+
+        shape, pieces = chunk_pieces(rows, columns, *self.shape)
+        window = np.zeros(shape, dtype=self.dtype)
+        for key, window_area, chunk_area in pieces:
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                window[window_area] = chunk[chunk_area]
+        return window
+
+    def __setitem__(self, key, value):
+        rows, columns = key
+        if not isinstance(rows, slice):
+            rows, columns = slice(rows, rows + 1), slice(columns, columns + 1)
+        shape, pieces = chunk_pieces(rows, columns, *self.shape)
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), shape)
+        for key, window_area, chunk_area in pieces:
+            chunk = self.chunks.get(key)
+            part = value[window_area]
+            if chunk is None:
+                if not part.any():
+                    continue
+                chunk = self.chunks[key] = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=self.dtype)
+            chunk[chunk_area] = part
+            if not chunk.any():
+                del self.chunks[key]
+
+
+class ChunkedWorld:
+    """Terrain d'une très grande carte, tenu en mémoire par blocs (même interface qu'Environment).
+
+    Le cache LRU garde au plus max_chunks blocs. Un bloc évincé est simplement oublié s'il est intact ;
+    s'il a été modifié, il est écrit dans un répertoire temporaire sous cache_dir, créé au premier besoin
+    et supprimé par close() (ou gardé en mémoire si cache_dir est None). Un nouveau monde de même graine
+    repart donc toujours du terrain généré.
+    """
+    def __init__(self, width=8192, height=8192, seed=None, max_chunks=MAX_CHUNKS, cache_dir=DEFAULT_CACHE_DIR, background=True):
+        self.width = width
+        self.height = height
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+        self.zones = world_zones(width, height)
+        self.zone_names = [None] + list(self.zones)
+        self.terrain = ChunkedTerrain(self)
+        self.grid = GridView(self)
+        self.listeners = []  # Objets prévenus des modifications du terrain (rendu, caches...)
+
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> tableau uint8
+        self.modified = set()        # Blocs en mémoire différents de leur version générée ou écrite
+        self.pending = {}            # (chunk_x, chunk_y) -> Future du fil de fond
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="world") if background else None
+        self.cache_dir = cache_dir
+        self.spill_dir = None  # Répertoire de cette partie, créé à la première éviction d'un bloc modifié
+        self.spilled = set()
+        self.generated = 0
+        self.loaded_from_disk = 0
+        self.evicted = 0
+
+    def _spill_path(self, chunk_x, chunk_y):
+        return os.path.join(self.spill_dir, f"{chunk_x}_{chunk_y}.npy")
+
+    def _spill(self, key, chunk):
+        if self.spill_dir is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.spill_dir = tempfile.mkdtemp(prefix=f"{self.seed}-{self.width}x{self.height}-", dir=self.cache_dir)
+        np.save(self._spill_path(*key), chunk)
+        self.spilled.add(key)
+
+    def _bounds(self, chunk_x, chunk_y):
+        x_start, y_start = chunk_x * CHUNK_SIZE, chunk_y * CHUNK_SIZE
+        return x_start, y_start, min(x_start + CHUNK_SIZE, self.width), min(y_start + CHUNK_SIZE, self.height)
+
+    def _generate(self, chunk_x, chunk_y):
+        return generate_chunk(self.seed, self.zones, *self._bounds(chunk_x, chunk_y), chunk_x, chunk_y)
+
+    def _install(self, key, chunk):
+        self.chunks[key] = chunk
+        while len(self.chunks) > self.max_chunks and self._evict():
+            pass
+
+    def _evict(self):
+        """Retire le bloc le moins récemment utilisé, en l'écrivant sur disque s'il a été modifié.
+
+        Retourne False si aucun bloc ne peut partir (tous modifiés, sans cache disque pour les recevoir).
+        """
+        for key in self.chunks:
+            if key not in self.modified or self.cache_dir:
+                break
+        else:
+            return False
+        chunk = self.chunks.pop(key)
+        if key in self.modified:
+            self._spill(key, chunk)
+            self.modified.discard(key)
+        self.evicted += 1
+        return True
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """Terrain d'un bloc, chargé ou généré sur-le-champ s'il n'est pas en mémoire."""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        future = self.pending.pop(key, None)
+        if key in self.spilled:
+            chunk = np.load(self._spill_path(chunk_x, chunk_y))
+            self.loaded_from_disk += 1
+        elif future is not None:
+            chunk = future.result()  # Déjà en cours : attendre plutôt que de recommencer
+            self.generated += 1
+        else:
+            chunk = self._generate(chunk_x, chunk_y)
+            self.generated += 1
+        self._install(key, chunk)
+        return chunk
+
+    def poll(self):
+        """Installe les blocs terminés par le fil de fond ; retourne leurs coordonnées."""
+        done = [key for key, future in self.pending.items() if future.done()]
+        for key in done:
+            self._install(key, self.pending.pop(key).result())
+            self.generated += 1
+        return done
+
+    def prefetch(self, x_start, y_start, x_end, y_end):
+        """Planifie en fond la génération des blocs couvrant la région qui ne sont pas encore prêts."""
+        ready = True
+        for chunk_y in range(max(0, y_start) // CHUNK_SIZE, (min(y_end, self.height) - 1) // CHUNK_SIZE + 1):
+            for chunk_x in range(max(0, x_start) // CHUNK_SIZE, (min(x_end, self.width) - 1) // CHUNK_SIZE + 1):
+                key = (chunk_x, chunk_y)
+                if key in self.chunks:
+                    continue
+                if key in self.spilled or self.executor is None:
+                    self.get_chunk(chunk_x, chunk_y)  # Lecture disque ou génération sans fil de fond
+                    continue
+                ready = False
+                if key not in self.pending:
+                    self.pending[key] = self.executor.submit(self._generate, chunk_x, chunk_y)
+        return ready
+
+    def request_region(self, x_start, y_start, x_end, y_end):
+        """Demande le terrain d'une région sans bloquer ; retourne True s'il est entièrement en mémoire.
+
+        Les blocs voisins (PREFETCH_MARGIN) sont planifiés aussi, pour que le défilement les trouve prêts.
+        """
+        self.poll()
+        ready = self.prefetch(x_start, y_start, x_end, y_end)
+        if self.executor:
+            margin = PREFETCH_MARGIN * CHUNK_SIZE
+            self.prefetch(x_start - margin, y_start - margin, x_end + margin, y_end + margin)
+        return ready
+
+    def set_tile(self, x, y, tile):
+        """Remplace une tuile et prévient les observateurs du terrain."""
+        key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+        self.get_chunk(*key)[y % CHUNK_SIZE, x % CHUNK_SIZE] = TERRAIN_IDS[type(tile)] if tile else EMPTY
+        self.modified.add(key)
+        for listener in self.listeners:
+            listener.tile_changed(x, y)
+
+    def is_within_bounds(self, x, y):
+        """Check if the given (x, y) coordinates are within the grid boundaries."""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_obstacle(self, x, y):
+        """Check if a given tile is an obstacle."""
+        if self.is_within_bounds(x, y):
+            return bool(TERRAIN_OBSTACLE[self.terrain[y, x]])
+        return True
+
+    def get_zone(self, x, y):
+        """Retourne la zone correspondant à une position ; la première zone déclarée l'emporte."""
+        if not self.is_within_bounds(x, y):
+            return None
+        for zone_name, (x_start, y_start, x_end, y_end) in self.zones.items():
+            if x_start <= x < x_end and y_start <= y < y_end:
+                return zone_name
+        return None
+
+    def raster(self, dtype):
+        """Raster nul de la taille du monde, stocké par blocs (voir ChunkedRaster)."""
+        return ChunkedRaster(self.width, self.height, dtype)
+
+    def terrain_overview(self, columns, rows):
+        """Terrain approché (rows x columns) de tout le monde, pour la minimap, sans générer de bloc.
+
+        Chaque case de l'aperçu est tirée selon les proportions de sa zone, comme le seraient les
+        cases du bloc : une fois réduit, l'aperçu a les mêmes couleurs moyennes que le vrai terrain.
+        """
+        if columns >= self.width and rows >= self.height:
+            return self.terrain[0:self.height, 0:self.width]
+        draws = np.random.default_rng([self.seed]).random((rows, columns))
+        ys = ((np.arange(rows) + 0.5) * self.height / rows).astype(int)[:, None]
+        xs = ((np.arange(columns) + 0.5) * self.width / columns).astype(int)[None, :]
+        return pick_terrain(draws, self.zones, ys, xs)
+
+    def stats(self):
+        return {"chunks": len(self.chunks), "pending": len(self.pending), "modified": len(self.modified),
+                "spilled": len(self.spilled), "generated": self.generated, "loaded_from_disk": self.loaded_from_disk,
+                "evicted": self.evicted}
+
+    def close(self):
+        """Arrête le fil de fond et supprime les blocs écrits sur disque par cette partie."""
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.pending.clear()
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self.spilled.clear()
+
+
+def _scroll(size, seed, frames, cell_size, background, max_chunks):
+    """Fait défiler une caméra en diagonale sur toute la carte ; retourne les durées d'image."""
+    import pygame
+    from terrain_render import TerrainLayer
+
+    view_width, view_height = 1560 // cell_size, 960 // cell_size
+    screen = pygame.display.set_mode((view_width * cell_size, view_height * cell_size))
+    world = ChunkedWorld(size, size, seed=seed, max_chunks=max_chunks, cache_dir=None, background=background)
+    layer = TerrainLayer(world)
+    timings = []
+    for frame in range(frames):
+        camera_x = min(size - view_width, frame * 3)
+        camera_y = min(size - view_height, frame * 2)
+        start = time.perf_counter()
+        screen.fill((0, 0, 0))
+        layer.draw(screen, cell_size, camera_x, camera_y, view_width, view_height)
+        timings.append(time.perf_counter() - start)
+        time.sleep(max(0.0, 1 / 60 - timings[-1]))  # Rythme d'affichage : le fil de fond avance entre deux images
+    stats = world.stats()
+    world.close()
+    return timings, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scroll a camera across a chunked world and report frame times.")
+    parser.add_argument("--size", type=int, default=8192)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--cell-size", type=int, default=30)
+    parser.add_argument("--max-chunks", type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.init()
+    for label, background in (("synchronous", False), ("background", True)):
+        timings, stats = _scroll(args.size, args.seed, args.frames, args.cell_size, background, args.max_chunks)
+        timings.sort()
+        print(f"{label:12} p50 {timings[len(timings) // 2] * 1000:6.2f} ms  p99 {timings[len(timings) * 99 // 100] * 1000:6.2f} ms"
+              f"  max {timings[-1] * 1000:6.2f} ms  {stats}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()